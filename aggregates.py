@@ -0,0 +1,183 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import RecentVersions
+
+# -----------------------------------------------------------------------------------
+# ---- ALMACÉN DE AGREGADOS PARA LOS KPIs ----
+# Cubos (rating x año) con la suma de taquilla y el argmax del margen de beneficio.
+# Los totales por rango de años salen de sumas prefijas: O(ratings) por consulta.
+MISSING_RATING = "__missing__"
+
+
+def rating_rows(ratings, selected_ratings):
+    # Filas (índices en `ratings`) de los ratings elegidos; None -> todas. La usan los
+    # agregados por rating x año de KPIStore, RegressionStore y TimePyramid
+    if selected_ratings is None:
+        return np.arange(len(ratings))
+    selected = set(selected_ratings)
+    return np.array([i for i, r in enumerate(ratings) if r in selected], dtype=np.int64)
+
+
+class KPIStore:
+    def __init__(self):
+        self.years = np.empty(0, dtype=np.int64)
+        self.ratings = []
+        self.counts = np.zeros((0, 0), dtype=np.int64)
+        self.totals = np.zeros((0, 0))
+        self.best_margin = np.zeros((0, 0))
+        self.best_film = np.empty((0, 0), dtype=object)
+        self.prefix = np.zeros((0, 1))
+        self.grand_total = 0.0
+        self.n_rows = 0
+
+    @classmethod
+    def from_frame(cls, df):
+        store = cls()
+        store.append(df)
+        return store
+
+    # ---- Crecimiento de ejes (años / ratings nuevos) ----
+    def _ensure_axes(self, years, ratings):
+        new_ratings = [r for r in pd.unique(ratings) if r not in self.ratings]
+        new_years = np.setdiff1d(np.unique(years), self.years)
+
+        if new_ratings:
+            extra = len(new_ratings)
+            n_years = len(self.years)
+            self.ratings.extend(new_ratings)
+            self.counts = np.vstack(
+                [self.counts, np.zeros((extra, n_years), dtype=np.int64)]
+            )
+            self.totals = np.vstack([self.totals, np.zeros((extra, n_years))])
+            self.best_margin = np.vstack(
+                [self.best_margin, np.full((extra, n_years), -np.inf)]
+            )
+            self.best_film = np.vstack(
+                [self.best_film, np.full((extra, n_years), None, dtype=object)]
+            )
+
+        if len(new_years):
+            years_all = np.union1d(self.years, new_years)
+            old_cols = np.searchsorted(years_all, self.years)
+            shape = (len(self.ratings), len(years_all))
+
+            counts = np.zeros(shape, dtype=np.int64)
+            totals = np.zeros(shape)
+            best_margin = np.full(shape, -np.inf)
+            best_film = np.full(shape, None, dtype=object)
+            counts[:, old_cols] = self.counts
+            totals[:, old_cols] = self.totals
+            best_margin[:, old_cols] = self.best_margin
+            best_film[:, old_cols] = self.best_film
+
+            self.years = years_all
+            self.counts = counts
+            self.totals = totals
+            self.best_margin = best_margin
+            self.best_film = best_film
+
+    # ---- Alta incremental de filas ----
+    def append(self, rows):
+        if len(rows) == 0:
+            return self
+
+        years = rows["year"].to_numpy(dtype=np.int64)
+        ratings = rows["film_rating"].astype(object).where(
+            rows["film_rating"].notna(), MISSING_RATING
+        ).to_numpy()
+        box_office = np.nan_to_num(rows["box_office_worldwide"].to_numpy(dtype=float))
+        margin = rows["profit_margin"].to_numpy(dtype=float)
+        films = rows["film"].to_numpy(dtype=object)
+        positions = np.arange(self.n_rows, self.n_rows + len(rows))
+
+        self._ensure_axes(years, ratings)
+
+        rating_codes = {r: i for i, r in enumerate(self.ratings)}
+        r_idx = np.fromiter((rating_codes[r] for r in ratings), np.int64, len(ratings))
+        y_idx = np.searchsorted(self.years, years)
+
+        np.add.at(self.counts, (r_idx, y_idx), 1)
+        np.add.at(self.totals, (r_idx, y_idx), box_office)
+
+        # argmax por cubo: ordenamos por margen y nos quedamos con el primero de cada cubo
+        valid = ~np.isnan(margin)
+        if valid.any():
+            bucket = r_idx[valid] * len(self.years) + y_idx[valid]
+            order = np.lexsort((positions[valid], -margin[valid], bucket))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = bucket[order][1:] != bucket[order][:-1]
+            winners = order[first]
+
+            flat = bucket[winners]
+            cand_margin = margin[valid][winners]
+            current = self.best_margin.ravel()[flat]
+            better = cand_margin > current
+            flat_better = flat[better]
+            np.put(self.best_margin, flat_better, cand_margin[better])
+            np.put(self.best_film, flat_better, films[valid][winners][better])
+
+        self.prefix = np.concatenate(
+            [np.zeros((len(self.ratings), 1)), np.cumsum(self.totals, axis=1)], axis=1
+        )
+        self.grand_total += box_office.sum()
+        self.n_rows += len(rows)
+        return self
+
+    # ---- Consultas ----
+    def query(self, selected_year=None, selected_ratings=None):
+        rows = rating_rows(self.ratings, selected_ratings)
+        if selected_year is None:
+            lo, hi = 0, len(self.years)
+        else:
+            lo = np.searchsorted(self.years, selected_year[0], side="left")
+            hi = np.searchsorted(self.years, selected_year[1], side="right")
+
+        if len(rows) == 0 or hi <= lo or not self.counts[rows, lo:hi].any():
+            return {
+                "total_box_office": 0.0,
+                "most_productive_year": None,
+                "most_profitable_film": None,
+            }
+
+        if selected_ratings is None and lo == 0 and hi == len(self.years):
+            total = self.grand_total
+        else:
+            total = (self.prefix[rows, hi] - self.prefix[rows, lo]).sum()
+
+        per_year = self.totals[rows, lo:hi].sum(axis=0)
+        most_productive_year = int(self.years[lo + int(np.argmax(per_year))])
+
+        margins = self.best_margin[rows, lo:hi]
+        if np.isneginf(margins).all():
+            most_profitable_film = None
+        else:
+            r, y = np.unravel_index(np.argmax(margins), margins.shape)
+            most_profitable_film = self.best_film[rows[r], lo + y]
+
+        return {
+            "total_box_office": float(total),
+            "most_productive_year": most_productive_year,
+            "most_profitable_film": most_profitable_film,
+        }
+
+
+# -----------------------------------------------------------------------------------
+# ---- UNA INSTANCIA POR VERSIÓN DEL DATASET ----
+_recent_stores = RecentVersions()
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_kpi_store(_df, version):
+    # En streaming se parte de la versión anterior y solo se añaden las filas nuevas.
+    # Copia: las sesiones que aún usan la versión anterior no ven cambios a medias.
+    base, n_rows = _recent_stores.closest_ancestor(_df)
+    if base is not None:
+        store = copy.deepcopy(base).append(_df.iloc[n_rows:])
+    else:
+        store = KPIStore.from_frame(_df)
+    _recent_stores.put(_df, version, store)
+    return store
@@ -1,8 +1,49 @@
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import profiling  # primero: con PIXAR_PROFILE=1 mide el tiempo de import del resto
+
+import functools
+import os
+import re
+
+import numpy as np
 import streamlit as st
 
+import metrics
+from aggregates import get_kpi_store
+from assets import get_logo_html, get_stylesheet
+from data_loader import dataset_version, get_data
+from downsampling import density_bins, marker_sizes, needs_downsampling, use_webgl
+from figure_cache import get_figure_cache
+from figure_scheduler import FigureTimeout, get_figure_scheduler
+from film_cards import get_film_index
+from filters import Selection, get_filter_index
+from partitioned import (
+    PARTITION_MAX_ROWS,
+    PARTITIONED,
+    get_catalog,
+    get_catalog_film_index,
+    get_partitioned_data,
+)
+from profiling import fragment_run, lazy_module, profiled
+from pyramid import (
+    PYRAMID_COLUMNS,
+    PYRAMID_POINTS,
+    SMOOTHING_WINDOW,
+    TimePyramid,
+    as_day,
+    get_time_pyramid,
+    rolling_mean,
+    year_span,
+)
+from payload import compact_figure
+from regression import fit_ols, get_regression_store, trendline_points
+from snapshots import get_snapshot_store
+from streaming import STREAM_ENABLED, STREAM_INTERVAL, get_live_data, live_dataset
+
+# Imports pesados diferidos: se cargan la primera vez que se usan
+px = lazy_module("plotly.express")
+go = lazy_module("plotly.graph_objects")
+components = lazy_module("streamlit.components.v1")
+
 # -----------------------------------------------------------------------------------
 # ---- CONFIGURACIÓN GLOBAL ----
 st.set_page_config(
@@ -10,69 +51,33 @@ st.set_page_config(
     layout="wide",
 )
 
+profiling.start_run()
+
 # ---- CARGAR DATOS ----
-df = pd.read_csv("Data/pixar_clean_streamlit.csv")
+# Caché columnar (Feather) compartida entre sesiones; se invalida por mtime + hash del CSV.
+# Modo streaming (PIXAR_STREAM=1): además se leen las filas añadidas al CSV por offset.
+# Backend particionado (PIXAR_STORAGE=partitioned): aquí solo el catálogo (años, ratings
+# y filas por partición); las filas se leen después de los filtros (partitioned.py)
+if PARTITIONED:
+    catalog = profiled(get_catalog)()
+    df = None
+else:
+    df = profiled(get_live_data if STREAM_ENABLED else get_data)()
 
 # ---- ESTILOS ----
-st.markdown(
-    """
-    <link href="https://fonts.googleapis.com/css2?family=Cinzel:wght@700&display=swap" rel="stylesheet">
-    <style>
-        body, .stApp {
-            background-color: #f5f5f5;
-        }
-        .block-container {
-            padding-top: 3.5rem;
-        }
-        h1, h2, h3, h4 {
-            color: #333333;
-        }
-        .custom-title {
-            font-family: 'Cinzel', serif;
-            font-size: 40px;
-            color: #333333;
-        }
-        .kpi-container {
-            display: flex;
-            justify-content: center;
-            flex-wrap: nowrap;
-            gap: 10px;
-            margin-bottom: 30px;
-        }
-        .kpi-box {
-            flex: 1 1 215px;
-            max-width: 260px;
-            min-width: 180px;
-            background-color: lightgray;
-            padding: 6px 4px;
-            height: auto;
-            border-radius: 10px;
-            text-align: center;
-        }
-        .kpi-title {
-            color: #333;
-            font-size: 15px;
-            margin-bottom: 5px;
-            font-weight: bold;
-        }
-        .kpi-value {
-            color: #1f77b4;
-            font-size: 16px;
-            margin-top: 4px;
-        }
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+# Una única hoja minificada servida desde static/assets (assets.py): fuente y logo
+# locales, sin peticiones a terceros ni <style> repetidos en cada sección
+st.markdown(get_stylesheet(), unsafe_allow_html=True)
 
 
 # -----------------------------------------------------------------------------------
 # ---- TÍTULO ----
+@profiled
 def render_title():
     st.markdown(
-        """
+        f"""
         <div style='display: flex; justify-content: space-between; align-items: center;'>
-            <img src='https://upload.wikimedia.org/wikipedia/commons/thumb/4/40/Pixar_logo.svg/320px-Pixar_logo.svg.png' width='300'>
+            {get_logo_html()}
             <h1 class='custom-title' style='margin-right: 0px;'>DASHBOARD</h1>
         </div>
         """,
@@ -82,12 +87,13 @@ def render_title():
 
 # -----------------------------------------------------------------------------------
 # ---- KPIs ----
-def render_kpis():
-    total_box_office = df["box_office_worldwide"].sum()
-    most_productive_year = int(
-        df.groupby("year")["box_office_worldwide"].sum().idxmax()
-    )
-    most_profitable_film = df.loc[df["profit_margin"].idxmax()]["film"]
+@profiled
+def render_kpis(selected_year, selected_ratings, df):
+    # Agregados precalculados por versión del dataset; el rango de años sale de sumas prefijas
+    kpis = get_kpi_store(df, dataset_version(df)).query(selected_year, selected_ratings)
+    total_box_office = kpis["total_box_office"]
+    most_productive_year = kpis["most_productive_year"] or "—"
+    most_profitable_film = kpis["most_profitable_film"] or "—"
 
     st.subheader("Key Metrics")
 
@@ -112,39 +118,114 @@ def render_kpis():
     )
 
 
+# -----------------------------------------------------------------------------------
+# ---- DEPENDENCIAS WIDGET -> SECCIÓN ----
+# Qué secciones se vuelven a pintar cuando cambia cada widget (por su key).
+# - Los widgets de un fragmento (@st.fragment) solo relanzan ese fragmento.
+# - Los widgets de la barra lateral relanzan el script completo (Streamlit no permite
+#   escribir en la sidebar desde un fragmento); las secciones que no dependen de
+#   ellos salen de las cachés de datos, agregados y figuras sin recalcular nada.
+# Cada widget toma su key de widget_key(): un widget que no esté en la tabla, o que
+# esté en un fragmento que no es el suyo, falla al pintarse.
+FRAGMENT_SECTIONS = ("render_extra_critics_charts", "render_film_selector")
+WIDGET_DEPENDENCIES = {
+    "selected_year": (
+        "render_kpis",
+        "render_filtered_graph",
+        "render_additional_charts",
+        "render_extra_critics_charts",
+    ),
+    "selected_ratings": (
+        "render_kpis",
+        "render_filtered_graph",
+        "render_additional_charts",
+        "render_extra_critics_charts",
+    ),
+    # Selecciones (cross-filter): restringen todos los gráficos salvo el propio
+    "filtered_graph_selection": ("render_additional_charts", "render_extra_critics_charts"),
+    "budget_scatter_selection": (
+        "render_filtered_graph",
+        "render_additional_charts",
+        "render_extra_critics_charts",
+    ),
+    "score_evolution_zoom": ("render_additional_charts",),  # zoom de la serie
+    "film_query": ("render_film_selector",),  # fragmento (catálogos grandes)
+    "selected_film": ("render_film_selector",),  # fragmento
+    "critics_expander": ("render_extra_critics_charts",),  # fragmento
+}
+
+
+def sections_for(widget_key):
+    # Las keys de selección llevan la generación al final (selection_key)
+    return WIDGET_DEPENDENCIES.get(re.sub(r"_\d+$", "", widget_key), ())
+
+
+def fragment_widgets(section):
+    return tuple(key for key, sections in WIDGET_DEPENDENCIES.items() if sections == (section,))
+
+
+def reruns_script(sections):
+    return any(section not in FRAGMENT_SECTIONS for section in sections)
+
+
+def check_widget_dependencies():
+    # Cada widget relanza el script completo o un único fragmento, el suyo; cada
+    # fragmento tiene al menos un widget
+    for key, sections in WIDGET_DEPENDENCIES.items():
+        if not reruns_script(sections) and len(sections) != 1:
+            raise RuntimeError(f"Widget {key!r} must belong to exactly one fragment: {sections}")
+    for section in FRAGMENT_SECTIONS:
+        if not fragment_widgets(section):
+            raise RuntimeError(f"Fragment {section!r} has no widgets in WIDGET_DEPENDENCIES")
+
+
+def widget_key(key, fragment=None):
+    # `fragment`: el fragmento que pinta el widget (None: fuera de fragmentos)
+    sections = sections_for(key)
+    owned = sections == (fragment,) if fragment else reruns_script(sections)
+    if not owned:
+        raise RuntimeError(
+            f"Widget {key!r} is drawn in {fragment or 'the script'}, "
+            f"but WIDGET_DEPENDENCIES says {sections or 'nothing'}"
+        )
+    return key
+
+
+check_widget_dependencies()
+
+
 # -----------------------------------------------------------------------------------
 # ---- FILTROS SIDEBAR ----
+@profiled
 def render_sidebar_filters():
     st.sidebar.markdown(
-        """
-        <style>
-        .sidebar-title {
-            color: #ff4b4b;
-            font-size: 22px;
-            font-weight: bold;
-            text-transform: uppercase;
-            font-family: 'Source Sans Pro', sans-serif;
-            margin-bottom: 10px;
-        }
-        </style>
-        <div class="sidebar-title">Interactive Filters</div>
-        """,
+        '<div class="sidebar-title">Interactive Filters</div>',
         unsafe_allow_html=True,
     )
     st.sidebar.markdown("---")
 
-    # Slider de años
-    min_year = int(df["year"].min())
-    max_year = int(df["year"].max())
+    # Slider de años (con el backend particionado, años y ratings salen del catálogo)
+    if PARTITIONED:
+        min_year, max_year = catalog.years[0], catalog.years[-1]
+    else:
+        min_year = int(df["year"].min())
+        max_year = int(df["year"].max())
     selected_year = st.sidebar.slider(
-        "Select Year Range:", min_year, max_year, (min_year, max_year)
+        "Select Year Range:",
+        min_year,
+        max_year,
+        (min_year, max_year),
+        key=widget_key("selected_year"),
     )
     st.sidebar.markdown("---")
 
     # Film rating filter
-    rating_options = df["film_rating"].dropna().unique()
+    rating_options = catalog.ratings if PARTITIONED else df["film_rating"].dropna().unique()
     selected_ratings = st.sidebar.multiselect(
-        "Select Film Rating:", rating_options, default=rating_options
+        "Select Film Rating:",
+        rating_options,
+        default=rating_options,
+        key=widget_key("selected_ratings"),
     )
     st.sidebar.markdown(
         "<span style='color:#f5f5f5;'>*G: General Audiences (All ages admitted)*  <br>*PG: Parental Guidance Suggested*</span>",
@@ -177,15 +258,30 @@ def render_sidebar_filters():
 
 
 # -----------------------------------------------------------------------------------
-# ---- GRAFICO FILTRADO ----
-def render_filtered_graph(selected_year, selected_ratings, df):
-    filtered_df = df[
-        (df["year"] >= selected_year[0])
-        & (df["year"] <= selected_year[1])
-        & (df["film_rating"].isin(selected_ratings))
+# ---- SEPARADORES DE AÑO (GRÁFICO FILTRADO) ----
+def build_year_dividers(filtered_sorted):
+    # Inicio de cada año en una sola pasada (datos ya ordenados por año)
+    filtered_years, year_starts = np.unique(
+        filtered_sorted["year"].to_numpy(), return_index=True
+    )
+    label_y = filtered_sorted[["budget", "profit_margin"]].max().max() + 50
+
+    # Estilo, referencias y ángulo vienen de shapedefaults / annotationdefaults del
+    # template (payload.py): cada elemento solo lleva su posición y su texto
+    year_lines = [dict(x0=int(year_idx), x1=int(year_idx)) for year_idx in year_starts]
+    year_labels = [
+        dict(x=int(year_idx), y=round(float(label_y)), text=str(int(year)))
+        for year, year_idx in zip(filtered_years, year_starts)
     ]
 
-    filtered_sorted = filtered_df.sort_values(by="year").reset_index(drop=True)
+    return year_lines, year_labels
+
+
+# -----------------------------------------------------------------------------------
+# ---- GRAFICO FILTRADO ----
+def build_filtered_figure(filtered):
+    # El índice ya entrega las filas ordenadas por año; solo se copian estas columnas
+    filtered_sorted = filtered.select(["film", "year", "budget", "profit_margin"])
 
     fig_filtered = go.Figure()
     fig_filtered.add_trace(
@@ -205,314 +301,655 @@ def render_filtered_graph(selected_year, selected_ratings, df):
         )
     )
 
-    filtered_years = filtered_sorted["year"].unique()
-
-    for year in filtered_years:
-        year_idx = filtered_sorted[filtered_sorted["year"] == year].index[0]
-        fig_filtered.add_vline(
-            x=year_idx,
-            line_width=1.5,
-            line_dash="dot",
-            line_color="darkgray",
-            opacity=0.6,
-        )
-        fig_filtered.add_annotation(
-            x=year_idx,
-            y=filtered_sorted[["budget", "profit_margin"]].max().max() + 50,
-            text=str(int(year)),
-            showarrow=False,
-            font=dict(color="darkgray", size=14, family="Arial"),
-            textangle=-90,
-            xanchor="center",
-            yanchor="bottom",
-            xshift=-8,
-            yshift=-20,
-        )
+    year_lines, year_labels = build_year_dividers(filtered_sorted)
 
+    # Todas las líneas y etiquetas de año en una única actualización del layout
+    # Fuentes, colores y leyenda: template "pixar" (payload.py)
     fig_filtered.update_layout(
+        shapes=year_lines,
+        annotations=year_labels,
         barmode="group",
-        title=dict(
-            text="Budget vs Profit Margin (Interactive Filter)",
-            font=dict(size=18, family="Arial Black", color="#333333"),
-            x=0.0,  # 👈🏽 Alinear a la izquierda
-            xanchor="left",
-        ),
+        title_text="Budget vs Profit Margin (Interactive Filter)",
         xaxis_title="Film",
         yaxis_title="Millions USD",
-        xaxis_title_font=dict(size=17, color="#333333", family="Arial Black"),
-        yaxis_title_font=dict(size=17, color="#333333", family="Arial Black"),
+        xaxis_title_font_size=17,
+        yaxis_title_font_size=17,
         xaxis_tickangle=-45,
-        xaxis=dict(tickfont=dict(color="#333333")),
-        yaxis=dict(tickfont=dict(color="#333333")),
-        legend=dict(
-            title="",
-            orientation="h",
-            yanchor="bottom",
-            y=1.1,
-            xanchor="right",
-            x=1,
-            bgcolor="lightgray",
-            borderwidth=0,
-            bordercolor="lightgray",
-            font=dict(size=12, color="#333333"),
-        ),
-        plot_bgcolor="#f5f5f5",
-        paper_bgcolor="#f5f5f5",
         height=650,
     )
 
     return fig_filtered
 
 
-# ----------------------------------------------------------------------------
-# ---- GRAFICOS ADICIONALES ----
+def plotly_chart(fig, chart_id, **kwargs):
+    # Con PIXAR_METRICS se anota el tamaño del spec enviado al navegador, por gráfico.
+    # theme=None: el estilo va en el template "pixar" de la figura (payload.py); el
+    # tema de Streamlit lo sobrescribiría
+    metrics.record_payload(chart_id, fig)
+    return st.plotly_chart(fig, theme=None, **kwargs)
 
 
-def render_additional_charts(df, selected_year):
-    st.markdown(
-        """<h2 style='text-align: left; color: #333333;'>Additional Insights</h2>""",
-        unsafe_allow_html=True,
+def figure_job(chart_id, filter_key, version, builder):
+    # Caché de figuras en memoria -> snapshot de prerender.py (misma versión) -> builder.
+    # Las figuras nuevas se compactan (payload.py) una sola vez, antes de cachearlas.
+    # Las cachés se resuelven aquí, en el hilo del script: el trabajo que se devuelve no
+    # llama a st.* y puede ir al pool de figuras (figure_scheduler.py)
+    figure_cache = get_figure_cache()
+    snapshots = get_snapshot_store(version)
+
+    def build():
+        snapshot = snapshots.figure(chart_id, filter_key)
+        return snapshot if snapshot is not None else compact_figure(builder())
+
+    return functools.partial(figure_cache.get_or_build, chart_id, filter_key, version, build)
+
+
+def cached_figure(chart_id, filter_key, version, builder):
+    return figure_job(chart_id, filter_key, version, builder)()
+
+
+def figure_task(chart_id, filter_key, version, builder, wait=False):
+    job = figure_job(chart_id, filter_key, version, builder)
+    return get_figure_scheduler().submit(chart_id, job, wait=wait)
+
+
+def render_figure_tasks(slots, tasks, options):
+    # Cada figura en su hueco (st.empty dentro de st.columns) según va terminando
+    figures = {}
+    for task in get_figure_scheduler().completed(tasks):
+        with slots[task.chart_id].container():
+            try:
+                figures[task.chart_id] = task.result()
+            except FigureTimeout:
+                # Se sigue construyendo en el pool: el próximo rerun la saca de la caché
+                st.info(
+                    "⏳ This chart is taking longer than usual; it will appear on the next interaction."
+                )
+                continue
+            plotly_chart(figures[task.chart_id], task.chart_id, **options[task.chart_id])
+    return figures
+
+
+def filtered_graph_task(filtered, wait=False):
+    return figure_task(
+        "filtered_graph",
+        filtered.key,
+        filtered.version,
+        lambda: build_filtered_figure(filtered),
+        wait=wait,
     )
 
-    # Filtramos años seleccionados
-    filtered_df = df[
-        (df["year"] >= selected_year[0]) & (df["year"] <= selected_year[1])
-    ]
 
-    # -------------- PRIMER GRÁFICO -----------------
-    fig_scatter = px.scatter(
-        filtered_df,
-        x="budget",
-        y="box_office_worldwide",
-        color="year",
-        hover_data={
+@profiled
+def render_filtered_graph(filtered, task=None):
+    # El script lanza la tarea al principio del rerun; sin ella (prerender, benchmarks)
+    # se lanza aquí y se espera sin plazo
+    task = task or filtered_graph_task(filtered, wait=True)
+    options = dict(use_container_width=True, **cross_filter_source("filtered_graph", filtered, "points"))
+    figures = render_figure_tasks({"filtered_graph": st.empty()}, [task], {"filtered_graph": options})
+    return figures.get("filtered_graph")
+
+
+# -----------------------------------------------------------------------------------
+# ---- CROSS-FILTER ENTRE GRÁFICOS ----
+# Un clic en una barra del gráfico filtrado o una selección box / lasso en el scatter de
+# presupuesto restringe los demás gráficos. El callback de la selección traduce los
+# puntos a filas del dataset con la vista que el gráfico mostraba (guardada al pintarlo);
+# cada gráfico cruza después esas filas con su filtro (FilterResult.restrict).
+CROSS_FILTER = "cross_filter"  # {chart_id: Selection}
+CROSS_FILTER_SHOWN = "cross_filter_shown"  # {chart_id: vista y zoom pintados}
+CROSS_FILTER_GENERATION = "cross_filter_generation"
+CROSS_FILTER_SOURCES = {
+    "filtered_graph": "Budget vs Profit Margin",
+    "budget_scatter": "Worldwide Box Office vs Budget",
+}
+
+
+def selection_key(chart_id):
+    # La generación cambia al limpiar las selecciones: el gráfico se vuelve a montar
+    # sin la selección dibujada
+    return f"{chart_id}_selection_{st.session_state.get(CROSS_FILTER_GENERATION, 0)}"
+
+
+def cross_filter_selections():
+    return st.session_state.get(CROSS_FILTER, {})
+
+
+def box_mask(x, y, box):
+    (x0, x1), (y0, y1) = box
+    return (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+
+def box_range(box):
+    return tuple(sorted(box["x"])), tuple(sorted(box["y"]))
+
+
+def selected_rows(chart_id, selection):
+    shown = st.session_state.get(CROSS_FILTER_SHOWN, {}).get(chart_id)
+    if shown is None:
+        return None
+    view = shown["view"]
+    rows = view.rows
+
+    if chart_id == "budget_scatter" and needs_downsampling(len(rows)):
+        # Modo datos grandes: se aplica el zoom pintado y, con celdas de densidad (mismo
+        # criterio que build_budget_scatter), cuentan las filas dentro de los rectángulos
+        budget = view.index.df["budget"].to_numpy()[rows]
+        box_office = view.index.df["box_office_worldwide"].to_numpy()[rows]
+        if shown["zoom"] is not None:
+            keep = box_mask(budget, box_office, shown["zoom"])
+            rows, budget, box_office = rows[keep], budget[keep], box_office[keep]
+        if needs_downsampling(len(rows)):
+            keep = np.zeros(len(rows), dtype=bool)
+            for box in selection["box"]:
+                keep |= box_mask(budget, box_office, box_range(box))
+            return rows[keep]
+
+    points = np.unique([point["point_index"] for point in selection["points"]])
+    points = points.astype(np.int64)
+    return rows[points[points < len(rows)]]
+
+
+def on_chart_select(chart_id):
+    selection = st.session_state[selection_key(chart_id)]["selection"]
+    rows = selected_rows(chart_id, selection)
+    selections = st.session_state.setdefault(CROSS_FILTER, {})
+    if rows is None or len(rows) == 0:
+        selections.pop(chart_id, None)
+    else:
+        selections[chart_id] = Selection(chart_id, rows)
+
+
+def clear_selections():
+    st.session_state.pop(CROSS_FILTER, None)
+    st.session_state[CROSS_FILTER_GENERATION] = (
+        st.session_state.get(CROSS_FILTER_GENERATION, 0) + 1
+    )
+
+
+def cross_filter_source(chart_id, view, selection_mode, zoom=None):
+    # kwargs de st.plotly_chart para un gráfico que origina selecciones
+    st.session_state.setdefault(CROSS_FILTER_SHOWN, {})[chart_id] = dict(
+        view=view, zoom=zoom
+    )
+    return dict(
+        on_select=functools.partial(on_chart_select, chart_id),
+        selection_mode=selection_mode,
+        key=widget_key(selection_key(chart_id)),
+    )
+
+
+def render_cross_filter_status(selections):
+    if not selections:
+        return
+    summary = " · ".join(
+        f"{len(selection):,} films selected in *{CROSS_FILTER_SOURCES[chart_id]}*"
+        for chart_id, selection in sorted(selections.items())
+    )
+    col_text, col_button = st.columns([5, 1])
+    col_text.caption(f"🎯 Cross-filter: {summary}")
+    col_button.button("✖ Clear selections", on_click=clear_selections)
+
+
+# -----------------------------------------------------------------------------------
+# ---- ZOOM EN MODO DATOS GRANDES ----
+def selected_zoom(chart_key):
+    # Rango (x, y) de la última selección "box" del gráfico, redondeado para la caché
+    state = st.session_state.get(chart_key)
+    if not state or not state["selection"]["box"]:
+        return None
+    box = state["selection"]["box"][0]
+    return (
+        tuple(round(float(v), 3) for v in sorted(box["x"])),
+        tuple(round(float(v), 3) for v in sorted(box["y"])),
+    )
+
+
+def selected_date_range(chart_key):
+    # Igual, en un eje de fechas: solo el rango X, en días
+    state = st.session_state.get(chart_key)
+    if not state or not state["selection"]["box"]:
+        return None
+    return tuple(sorted(as_day(v) for v in state["selection"]["box"][0]["x"]))
+
+
+def zoom_selection(chart_key, large):
+    if not large:
+        return {}
+    return dict(on_select="rerun", selection_mode="box", key=widget_key(chart_key))
+
+
+# -----------------------------------------------------------------------------------
+# ---- FIGURAS ADICIONALES ----
+def build_budget_scatter(filtered_df, zoom=None):
+    title = "Worldwide Box Office vs Budget"
+    if zoom is not None:
+        filtered_df = filtered_df[
+            box_mask(
+                filtered_df["budget"].to_numpy(),
+                filtered_df["box_office_worldwide"].to_numpy(),
+                zoom,
+            )
+        ]
+
+    # Modo datos grandes: un punto por celda de densidad (centroide, media del año)
+    binned = needs_downsampling(len(filtered_df))
+    if binned:
+        plot_df = density_bins(
+            filtered_df["budget"],
+            filtered_df["box_office_worldwide"],
+            filtered_df["year"],
+        ).rename(
+            columns={
+                "x": "budget",
+                "y": "box_office_worldwide",
+                "value": "year",
+                "count": "films",
+            }
+        )
+        hover_data = {
+            "films": True,
+            "year": ":.0f",
+            "budget": ":.1f",
+            "box_office_worldwide": ":.1f",
+        }
+        title += (
+            f"<br><sup>{len(filtered_df):,} films in {len(plot_df):,} density cells"
+            " · box-select to zoom, double-click to reset</sup>"
+        )
+    else:
+        plot_df = filtered_df
+        hover_data = {
             "film": True,
             "year": True,
             "budget": ":.1f",
             "box_office_worldwide": ":.1f",
-        },
+        }
+
+    fig_scatter = px.scatter(
+        plot_df,
+        x="budget",
+        y="box_office_worldwide",
+        color="year",
+        hover_data=hover_data,
         color_continuous_scale="Magma",
         labels={
             "budget": "Budget (M USD)",
             "box_office_worldwide": "Worldwide Box Office (M USD)",
             "year": "Year",
         },
-        title="Worldwide Box Office vs Budget",
+        render_mode="webgl" if use_webgl(len(plot_df)) else "svg",
+        title=title,
     )
 
     fig_scatter.update_traces(marker=dict(size=12, line=dict(width=1, color="#333333")))
-    fig_scatter.update_layout(
-        title_font=dict(size=18, family="Arial Black", color="#333333"),
-        xaxis_title_font=dict(size=14, family="Arial Black", color="#333333"),
-        yaxis_title_font=dict(size=14, family="Arial Black", color="#333333"),
-        plot_bgcolor="#f5f5f5",
-        paper_bgcolor="#f5f5f5",
-        coloraxis_colorbar=dict(
-            tickfont=dict(color="#333333"),
-            title=dict(  # Aquí es donde cambia
-                text="Year",  # Texto que aparece en la barra de colores
-                font=dict(color="#333333"),
-            ),
-        ),
-        height=600,
-        xaxis=dict(
-            tickfont=dict(color="#333333"),
-            title_font=dict(size=14, family="Arial Black", color="#333333"),
-            showgrid=True,
-            gridcolor="lightgrey",
-        ),
-        yaxis=dict(
-            tickfont=dict(color="#333333"),
-            title_font=dict(size=14, family="Arial Black", color="#333333"),
-            showgrid=True,
-            gridcolor="lightgrey",
-        ),
-    )
-
-    # -------------- SEGUNDO GRÁFICO -----------------
-    pixar_sorted = filtered_df.sort_values("year")
+    if binned:
+        fig_scatter.update_traces(marker_size=marker_sizes(plot_df["films"]))
+    fig_scatter.update_layout(coloraxis_colorbar_title_text="Year", height=600)
+
+    return fig_scatter
+
+
+LEVEL_LABELS = {
+    "day": ("daily", "%d %b %Y"),
+    "week": ("weekly", "week of %d %b %Y"),
+    "month": ("monthly", "%b %Y"),
+    "quarter": ("quarterly", "%b %Y"),
+    "year": ("yearly", "%Y"),
+}
+
+
+def build_score_evolution(pyramid, selected_year, selected_ratings=None, zoom=None):
+    # Series por fecha de estreno desde la pirámide (pyramid.py): el nivel (día ...
+    # año) es el más fino que cabe en el rango visible y la media móvil sale de sus
+    # cubos, así que el número de puntos no depende del número de películas
+    title = "Score Evolution"
+    start, end = year_span(selected_year)
+    if zoom is not None:
+        # Zoom con selección "box": solo cuenta el eje X (fechas)
+        start = max(start, np.datetime64(zoom[0]))
+        end = min(end, np.datetime64(zoom[1]))
+    level = pyramid.level_for(start, end, selected_ratings)
+    adjective, hover_date = LEVEL_LABELS[level]
+
+    series = {
+        col: pyramid.series(col, level, start, end, selected_ratings)
+        for col in ("rotten_tomatoes", "metacritic")
+    }
+    aggregated = any((s["count"] > 1).any() for s in series.values())
+    if aggregated:
+        title += (
+            f"<br><sup>{adjective} means · {SMOOTHING_WINDOW}-{level} rolling average"
+            " · box-select to zoom, double-click to reset</sup>"
+        )
 
     fig_scores = go.Figure()
 
-    fig_scores.add_trace(
-        go.Scatter(
-            x=pixar_sorted["year"],
-            y=pixar_sorted["rotten_tomatoes"],
-            mode="lines+markers",
-            name="Rotten Tomatoes",
-            line=dict(color="tomato", shape="spline"),
-            marker=dict(size=8),
+    for col, name, color in (
+        ("rotten_tomatoes", "Rotten Tomatoes", "tomato"),
+        ("metacritic", "Metacritic", "dimgrey"),
+    ):
+        points = series[col]
+        # Fechas como "AAAA-MM-DD": la mitad de bytes que con la hora
+        x = np.datetime_as_string(points["period"].to_numpy(dtype="datetime64[D]"), unit="D")
+        if not aggregated:
+            # Una película por cubo: un punto por película, como siempre
+            fig_scores.add_trace(
+                go.Scatter(
+                    x=x,
+                    y=points["mean"],
+                    mode="lines+markers",
+                    name=name,
+                    line=dict(color=color, shape="spline"),
+                    marker=dict(size=8),
+                    hovertemplate=f"%{{x|{hover_date}}}<br>{name}: %{{y:.0f}}<extra></extra>",
+                )
+            )
+            continue
+        fig_scores.add_trace(
+            go.Scatter(
+                x=x,
+                y=points["mean"],
+                customdata=points[["count", "min", "max"]].to_numpy(),
+                mode="markers",
+                name=f"{name} ({adjective})",
+                marker=dict(color=color, size=5, opacity=0.45),
+                hovertemplate=(
+                    f"%{{x|{hover_date}}}<br>{name}: %{{y:.1f}}"
+                    "<br>min %{customdata[1]:.0f} · max %{customdata[2]:.0f}"
+                    "<br>%{customdata[0]:,.0f} films<extra></extra>"
+                ),
+            )
         )
-    )
-
-    fig_scores.add_trace(
-        go.Scatter(
-            x=pixar_sorted["year"],
-            y=pixar_sorted["metacritic"],
-            mode="lines+markers",
-            name="Metacritic",
-            line=dict(color="dimgrey", shape="spline"),
-            marker=dict(size=8),
+        fig_scores.add_trace(
+            go.Scatter(
+                x=x,
+                y=rolling_mean(points, level),
+                mode="lines",
+                name=name,
+                line=dict(color=color, width=3, shape="spline"),
+                hoverinfo="skip",
+            )
         )
-    )
 
     fig_scores.update_layout(
-        title="Score Evolution",
-        title_font=dict(size=18, family="Arial Black", color="#333333"),
-        xaxis_title="Year",
+        title_text=title,
+        xaxis_title="Release date",
         yaxis_title="Score (0-100)",
         height=600,
-        legend=dict(
-            title="",
-            orientation="h",
-            yanchor="bottom",
-            y=1.1,
-            xanchor="right",
-            x=1,
-            bgcolor="lightgray",
-            bordercolor="lightgray",
-            borderwidth=1,
-            font=dict(size=12, color="#333333"),
+        legend_borderwidth=1,
+    )
+
+    # Marcas cada 2 años con rangos largos; con zoom, las que elija Plotly
+    if (end - start).astype(int) > 6 * 365:
+        fig_scores.update_xaxes(dtick="M24", tickformat="%Y")
+    fig_scores.update_xaxes(tickangle=45)
+
+    return fig_scores
+
+
+def score_evolution_builder(view, zoom=None):
+    # Rango de años + ratings: series de la pirámide del dataset (una por versión), sin
+    # tocar las filas. Con selecciones de otros gráficos (filas sueltas), pirámide de
+    # solo esas filas, dentro del trabajo de la figura
+    if view.selections:
+        return lambda: build_score_evolution(
+            TimePyramid.from_frame(view.select(PYRAMID_COLUMNS)), view.selected_year, None, zoom
+        )
+    pyramid = get_time_pyramid(view.index.df, view.version)
+    return lambda: build_score_evolution(
+        pyramid, view.selected_year, view.selected_ratings, zoom
+    )
+
+
+# ----------------------------------------------------------------------------
+# ---- GRAFICOS ADICIONALES ----
+SCATTER_COLUMNS = ["film", "year", "budget", "box_office_worldwide"]
+
+
+def schedule_additional_charts(filtered, selections=None, wait=False):
+    # Años + ratings de la barra lateral, cruzados con las selecciones de los otros
+    # gráficos: índices sobre el frame compartido; las columnas de cada figura solo se
+    # copian si la figura no está en caché
+    selections = selections or {}
+    scatter_view = filtered.cross_filtered(selections, exclude="budget_scatter")
+    scores_view = filtered.cross_filtered(selections)
+
+    # Con muchos puntos las figuras van reducidas; en el scatter la selección "box"
+    # además hace de zoom y vuelve a pedir ese rango a resolución completa
+    large = needs_downsampling(len(scatter_view))
+    scatter_zoom = selected_zoom(selection_key("budget_scatter")) if large else None
+    # Con más películas que puntos la serie va agregada: el zoom pide más resolución
+    scores_zoomable = len(scores_view) > PYRAMID_POINTS
+    scores_zoom = selected_date_range("score_evolution_zoom") if scores_zoomable else None
+
+    tasks = [
+        figure_task(
+            "budget_scatter",
+            (scatter_view.key, scatter_zoom),
+            filtered.version,
+            lambda: build_budget_scatter(scatter_view.select(SCATTER_COLUMNS), scatter_zoom),
+            wait=wait,
+        ),
+        figure_task(
+            "score_evolution",
+            (scores_view.key, scores_zoom),
+            filtered.version,
+            score_evolution_builder(scores_view, scores_zoom),
+            wait=wait,
         ),
-        plot_bgcolor="#f5f5f5",
-        paper_bgcolor="#f5f5f5",
-        xaxis=dict(
-            tickfont=dict(color="#333333"),
-            title_font=dict(size=14, family="Arial Black", color="#333333"),
-            showgrid=True,
-            gridcolor="lightgrey",
+    ]
+    options = {
+        "budget_scatter": dict(
+            use_container_width=True,
+            **cross_filter_source(
+                "budget_scatter",
+                scatter_view,
+                "box" if large else ("box", "lasso"),
+                zoom=scatter_zoom,
+            ),
         ),
-        yaxis=dict(
-            tickfont=dict(color="#333333"),
-            title_font=dict(size=14, family="Arial Black", color="#333333"),
-            showgrid=True,
-            gridcolor="lightgrey",
+        "score_evolution": dict(
+            use_container_width=True,
+            **zoom_selection("score_evolution_zoom", scores_zoomable),
         ),
-    )
+    }
+    return tasks, options
+
 
-    fig_scores.update_xaxes(dtick=2, tickangle=45)
+@profiled
+def render_additional_charts(filtered, selections=None, scheduled=None):
+    # `scheduled`: tareas lanzadas al principio del rerun; sin ellas (prerender,
+    # benchmarks) se lanzan aquí y se esperan sin plazo
+    tasks, options = scheduled or schedule_additional_charts(filtered, selections, wait=True)
+
+    st.markdown(
+        """<h2 style='text-align: left; color: #333333;'>Additional Insights</h2>""",
+        unsafe_allow_html=True,
+    )
 
     # -------------- MOSTRAR EN DOS COLUMNAS -----------------
     col1, col2 = st.columns(2)
     with col1:
-        st.plotly_chart(fig_scatter, use_container_width=True)
+        scatter_slot = st.empty()
         st.markdown(
             "<p style='color: #333333; font-size: 16px; text-align: center;'>Higher budgets often correlate with higher worldwide box office revenue, but outliers suggest budget alone doesn't guarantee success.</p>",
             unsafe_allow_html=True,
         )
     with col2:
-        st.plotly_chart(fig_scores, use_container_width=True)
+        scores_slot = st.empty()
         st.markdown(
             "<p style='color: #333333; font-size: 16px; text-align: center;'>Critics' ratings fluctuate over the years, with some years showing a clear divergence between Rotten Tomatoes and Metacritic scores.</p>",
             unsafe_allow_html=True,
         )
 
+    # La que termine antes se pinta antes
+    slots = {"budget_scatter": scatter_slot, "score_evolution": scores_slot}
+    return render_figure_tasks(slots, tasks, options)
+
 
 # -----------------------------------------------------------------------------------
-# ---- GRÁFICOS ADICIONALES EN EXPANDER ----
-def render_extra_critics_charts(df):
-    st.markdown(
-        """<hr style="border: none; height: 2px; background-color: #999999; margin: 30px 0;">""",
-        unsafe_allow_html=True,
+# ---- FIGURAS DE CRÍTICOS ----
+def add_ols_trendline(fig, df, x, y, x_label, y_label, line_color, fit=None):
+    # Recta OLS en forma cerrada (NumPy): mismos valores que trendline="ols" sin statsmodels.
+    # `fit`: ajuste ya calculado (estadísticos suficientes por año); si no, sobre df
+    if fit is None:
+        fit = fit_ols(df[x], df[y])
+    if fit is None:
+        return fig
+    xs, ys = trendline_points(df[x], df[y], fit)
+    fig.add_trace(
+        go.Scatter(
+            x=xs,
+            y=ys,
+            mode="lines",
+            name="",
+            showlegend=False,
+            line=dict(dash="dot", color=line_color),
+            hovertemplate=(
+                f"<b>OLS trendline</b><br>{y} = {fit['slope']:g} * {x} + {fit['intercept']:g}"
+                f"<br>R<sup>2</sup>={fit['r2']:f}<br><br>{x_label}=%{{x}}"
+                f"<br>{y_label}=%{{y}} <b>(trend)</b><extra></extra>"
+            ),
+        )
+    )
+    return fig
+
+
+def build_box_vs_rt(df, fit=None):
+    # --- Box Office vs Rotten Tomatoes ---
+    fig_box_vs_rt = px.scatter(
+        df,
+        x="rotten_tomatoes",
+        y="box_office_worldwide",
+        hover_data={"film": True, "year": True},
+        labels={
+            "rotten_tomatoes": "Rotten Tomatoes Score",
+            "box_office_worldwide": "Worldwide Box Office (M USD)",
+        },
+        title="Worldwide Box Office vs Rotten Tomatoes Score",
+    )
+
+    fig_box_vs_rt.update_traces(
+        marker=dict(color="tomato", size=10, line=dict(width=1, color="#333333"))
+    )
+    add_ols_trendline(
+        fig_box_vs_rt,
+        df,
+        "rotten_tomatoes",
+        "box_office_worldwide",
+        "Rotten Tomatoes Score",
+        "Worldwide Box Office (M USD)",
+        line_color="darkred",
+        fit=fit,
+    )
+    fig_box_vs_rt.update_layout(width=700, height=600)
+
+    return fig_box_vs_rt
+
+
+def build_box_vs_meta(df, fit=None):
+    # --- Box Office vs Metacritic ---
+    fig_box_vs_meta = px.scatter(
+        df,
+        x="metacritic",
+        y="box_office_worldwide",
+        hover_data={"film": True, "year": True},
+        labels={
+            "metacritic": "Metacritic Score",
+            "box_office_worldwide": "Worldwide Box Office (M USD)",
+        },
+        title="Worldwide Box Office vs Metacritic Score",
     )
 
-    # ---- Personalizar estilo del expander ----
+    fig_box_vs_meta.update_traces(
+        marker=dict(color="dimgrey", size=10, line=dict(width=1, color="#333333"))
+    )
+    add_ols_trendline(
+        fig_box_vs_meta,
+        df,
+        "metacritic",
+        "box_office_worldwide",
+        "Metacritic Score",
+        "Worldwide Box Office (M USD)",
+        line_color="black",
+        fit=fit,
+    )
+    fig_box_vs_meta.update_layout(width=700, height=600)
+
+    return fig_box_vs_meta
+
+
+CRITICS_COLUMNS = ["film", "year", "rotten_tomatoes", "metacritic", "box_office_worldwide"]
+
+
+def trendline_fit(filtered, x):
+    # Rango de años + ratings: la recta sale de los estadísticos suficientes por año
+    # (regression.py), en O(años) y sin tocar las filas. Con selecciones de otros
+    # gráficos (filas sueltas) se ajusta sobre las filas de la figura (None)
+    if filtered.selections:
+        return None
+    store = get_regression_store(filtered.index.df, filtered.version)
+    return store.fit(x, filtered.selected_year, filtered.selected_ratings)
+
+
+def critics_tasks(filtered, wait=False):
+    # Siguen los filtros de la barra lateral y las selecciones de los gráficos; las
+    # rectas OLS se ajustan sobre esas mismas filas. Las dos figuras, a la vez
+    rt_fit = trendline_fit(filtered, "rotten_tomatoes")
+    meta_fit = trendline_fit(filtered, "metacritic")
+    return [
+        figure_task(
+            "box_vs_rt",
+            filtered.key,
+            filtered.version,
+            lambda: build_box_vs_rt(filtered.select(CRITICS_COLUMNS), rt_fit),
+            wait=wait,
+        ),
+        figure_task(
+            "box_vs_meta",
+            filtered.key,
+            filtered.version,
+            lambda: build_box_vs_meta(filtered.select(CRITICS_COLUMNS), meta_fit),
+            wait=wait,
+        ),
+    ]
+
+
+def critics_figures(filtered):
+    return tuple(task.result() for task in critics_tasks(filtered, wait=True))
+
+
+# -----------------------------------------------------------------------------------
+# ---- GRÁFICOS ADICIONALES EN EXPANDER ----
+@st.fragment
+@fragment_run
+@profiled
+def render_extra_critics_charts(filtered):
     st.markdown(
-        """
-        <style>
-        /* Apunta directamente al resumen (header) del expander */
-        div[data-testid="stExpander"] > details > summary {
-            font-family: 'Source Sans Pro', sans-serif;
-            font-size: 20px;
-            color: #f5f5f5;
-            background-color: #262730;
-            padding: 10px;
-            border-radius: 10px;
-        }
-        div[data-testid="stExpander"] > details > summary:hover {
-            background-color: #999999;
-            color: #f5f5f5;
-        }
-        </style>
-        """,
+        """<hr style="border: none; height: 2px; background-color: #999999; margin: 30px 0;">""",
         unsafe_allow_html=True,
     )
 
-    # Expander con estilo
-    with st.expander(
+    # Expander con estilo (assets/dashboard.css). on_change="rerun" permite saber si
+    # está abierto: mientras esté cerrado no se construye ninguna figura ni se ajusta
+    # ninguna recta
+    critics_expander = st.expander(
         "🔍 SEE ADDITIONAL CRITICS INSIGHTS  -   👉🏻  Click here if you'd like to explore how critics' scores influence box office performance.",
         expanded=False,
-    ):
-        # --- Primer gráfico: Box Office vs Rotten Tomatoes ---
-        fig_box_vs_rt = px.scatter(
-            df,
-            x="rotten_tomatoes",
-            y="box_office_worldwide",
-            hover_data={"film": True, "year": True},
-            labels={
-                "rotten_tomatoes": "Rotten Tomatoes Score",
-                "box_office_worldwide": "Worldwide Box Office (M USD)",
-            },
-            trendline="ols",
-            title="Worldwide Box Office vs Rotten Tomatoes Score",
-        )
-
-        fig_box_vs_rt.update_traces(
-            marker=dict(color="tomato", size=10, line=dict(width=1, color="#333333"))
-        )
-        fig_box_vs_rt.update_traces(
-            selector=dict(mode="lines"), line=dict(dash="dot", color="darkred")
-        )
-        fig_box_vs_rt.update_layout(
-            width=700,
-            height=600,
-            title_font=dict(size=18, family="Arial Black", color="#333333"),
-            xaxis_title_font=dict(size=14, family="Arial Black", color="#333333"),
-            yaxis_title_font=dict(size=14, family="Arial Black", color="#333333"),
-            plot_bgcolor="#f5f5f5",
-            paper_bgcolor="#f5f5f5",
-            xaxis=dict(tickfont=dict(color="#333333")),
-            yaxis=dict(tickfont=dict(color="#333333")),
-        )
-
-        # --- Segundo gráfico: Box Office vs Metacritic ---
-        fig_box_vs_meta = px.scatter(
-            df,
-            x="metacritic",
-            y="box_office_worldwide",
-            hover_data={"film": True, "year": True},
-            labels={
-                "metacritic": "Metacritic Score",
-                "box_office_worldwide": "Worldwide Box Office (M USD)",
-            },
-            trendline="ols",
-            title="Worldwide Box Office vs Metacritic Score",
-        )
+        key=widget_key("critics_expander", "render_extra_critics_charts"),
+        on_change="rerun",
+    )
+    if not critics_expander.open:
+        return
 
-        fig_box_vs_meta.update_traces(
-            marker=dict(color="dimgrey", size=10, line=dict(width=1, color="#333333"))
-        )
-        fig_box_vs_meta.update_traces(
-            selector=dict(mode="lines"), line=dict(dash="dot", color="black")
-        )
-        fig_box_vs_meta.update_layout(
-            width=700,
-            height=600,
-            title_font=dict(size=18, family="Arial Black", color="#333333"),
-            xaxis_title_font=dict(size=14, family="Arial Black", color="#333333"),
-            yaxis_title_font=dict(size=14, family="Arial Black", color="#333333"),
-            plot_bgcolor="#f5f5f5",
-            paper_bgcolor="#f5f5f5",
-            xaxis=dict(tickfont=dict(color="#333333")),
-            yaxis=dict(tickfont=dict(color="#333333")),
-        )
+    with critics_expander:
+        tasks = critics_tasks(filtered)
 
-        # ---- Mostrar en 2 columnas ----
+        # ---- Mostrar en 2 columnas, cada figura según termina ----
         col1, col2 = st.columns(2)
-        with col1:
-            st.plotly_chart(fig_box_vs_rt)
-        with col2:
-            st.plotly_chart(fig_box_vs_meta)
+        slots = {"box_vs_rt": col1.empty(), "box_vs_meta": col2.empty()}
+        render_figure_tasks(slots, tasks, {"box_vs_rt": {}, "box_vs_meta": {}})
         # ---- TEXTO EXPLICATIVO ----
         st.markdown(
             """
@@ -527,30 +964,14 @@ def render_extra_critics_charts(df):
 
 # -----------------------------------------------------------------------------------
 # ---- SELECTOR DE PELÍCULAS ----
-def render_film_selector(df):
-    from streamlit.components.v1 import html
+FILM_SELECT_LIMIT = int(os.environ.get("PIXAR_FILM_SELECT_LIMIT", "1000"))
 
-    # Solo estilizamos el selectbox
-    st.markdown(
-        """
-        <style>
-        /* Fondo y borde para el selectbox */
-        div[data-baseweb="select"] {
-            background-color: lightgrey;
-            border: 1px solid tomato;
-            border-radius: 8px;
-            padding: 5px;
-        }
-        /* Cambiar fondo del valor seleccionado */
-        div[data-baseweb="select"] div[role="button"] {
-            background-color: #bcbcbc;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
 
-    # Título
+@st.fragment
+@fragment_run
+@profiled
+def render_film_selector(film_index):
+    # Título (el estilo del selectbox está en assets/dashboard.css)
     st.markdown(
         """
         <div style="text-align: right; padding-right: 10px;">
@@ -560,63 +981,154 @@ def render_film_selector(df):
         unsafe_allow_html=True,
     )
 
-    # Selectbox
-    selected_film = st.selectbox("", df["film"].unique())
+    # `film_index`: película -> fila y tarjetas HTML cacheadas (una vez por versión del
+    # dataset)
+    # Streamlit guarda las opciones del selectbox en el estado de cada sesión: con un
+    # catálogo grande se busca por título y solo se ofrecen las primeras coincidencias
+    films = film_index.films
+    if len(films) > FILM_SELECT_LIMIT:
+        query = st.text_input(
+            "Search film",
+            key=widget_key("film_query", "render_film_selector"),
+            placeholder=f"🔎 Search {len(films):,} films",
+            label_visibility="collapsed",
+        )
+        films = film_index.search(query.strip(), FILM_SELECT_LIMIT)
 
-    film_data = df[df["film"] == selected_film].iloc[0]
+    # Selectbox
+    selected_film = st.selectbox(
+        "Select Film",
+        films,
+        key=widget_key("selected_film", "render_film_selector"),
+        label_visibility="collapsed",
+    )
+    if selected_film is None:
+        st.caption("No films match the search.")
+        return
 
     # Tarjeta de datos SIN borde, solo con fondo gris claro
-    html(
-        f"""
-        <div style="background-color: lightgrey; padding: 15px; border-radius: 12px; color: #333333; text-align: center; font-family: 'Source Sans Pro', sans-serif;">
-
-            <h3 style="color: #1f77b4; margin-bottom: 10px;">{film_data['film'].upper()} ({int(film_data['year'])})</h3>
-
-            <hr style="border: none; height: 1px; background-color: tomato; margin: 10px 0;">
+    components.html(film_index.card_html(selected_film), height=760)
 
-            <h4>📊 CRITICS</h4>
-            <p><strong>🍅 Rotten Tomatoes:</strong> {film_data['rotten_tomatoes']}</p>
-            <p><strong>🎯 Metacritic:</strong> {film_data['metacritic']}</p>
 
-            <hr style="border: none; height: 1px; background-color: #999; margin: 10px 0;">
-
-            <h4>🎬 AGE RATING</h4>
-            <p><strong>{film_data['film_rating']}</strong></p>
+# -----------------------------------------------------------------------------------
+# ---- MODO STREAMING: AVISO A LAS SESIONES ABIERTAS ----
+# Cada STREAM_INTERVAL segundos el fragmento mira si hay filas nuevas (solo un stat del
+# fichero); si la versión cambió, relanza la app entera con el nuevo snapshot.
+@st.fragment(run_every=STREAM_INTERVAL if STREAM_ENABLED else None)
+@fragment_run
+def watch_live_data(rendered_version):
+    if not STREAM_ENABLED or PARTITIONED:
+        return
+    live = live_dataset()
+    live.poll()
+    if live.version != rendered_version:
+        st.rerun(scope="app")
+    st.caption(f"🔴 Live · {len(live.frame):,} films · checking every {STREAM_INTERVAL:g}s")
 
-            <hr style="border: none; height: 1px; background-color: #999; margin: 10px 0;">
 
-            <h4>⏱️ RUN TIME</h4>
-            <p><strong>{film_data['run_time']} mins</strong></p>
+# -----------------------------------------------------------------------------------
+# ---- BACKEND PARTICIONADO: LECTURA SEGÚN LOS FILTROS ----
+CROSS_FILTER_VERSION = "cross_filter_version"
+
+
+@profiled
+def load_partitions(selected_year, selected_ratings):
+    # Solo las particiones y columnas del filtro. Si no caben en PIXAR_PARTITION_MAX_ROWS,
+    # los años más recientes que caben
+    fitted = catalog.fit_years(selected_year, selected_ratings)
+    if tuple(fitted) != tuple(selected_year):
+        st.sidebar.warning(
+            f"Showing {fitted[0]}–{fitted[1]}: the selected range holds "
+            f"{catalog.rows_for(selected_year, selected_ratings):,} films (limit {PARTITION_MAX_ROWS:,}). "
+            "Narrow the year range to see earlier years."
+        )
+    partition_df = get_partitioned_data(catalog, fitted, selected_ratings)
 
-            <hr style="border: none; height: 1px; background-color: #999; margin: 10px 0;">
+    # Las selecciones de los gráficos son posiciones en el frame leído: con otro filtro
+    # (otro frame) ya no valen
+    version = dataset_version(partition_df)
+    if st.session_state.get(CROSS_FILTER_VERSION) != version:
+        if cross_filter_selections():
+            clear_selections()
+        st.session_state[CROSS_FILTER_VERSION] = version
+    return fitted, partition_df
 
-            <h4>💵 ECONOMICS</h4>
-            <p><strong>💰 Budget:</strong> $ {film_data['budget']:.1f} M.</p>
-            <p><strong>🌎 Box Office:</strong> $ {film_data['box_office_worldwide']:.1f} M.</p>
-            <p><strong>📈 Profit Margin:</strong> $ {film_data['profit_margin']:.1f} M.</p>
 
-        </div>
-        """,
-        height=720,
-    )
+# -----------------------------------------------------------------------------------
+# ---- PANEL DE DEPURACIÓN (PIXAR_DEBUG_PANEL=1 o ?debug=1) ----
+def render_debug_panel():
+    with st.sidebar.expander("🛠️ Debug: section metrics"):
+        if not metrics.METRICS_ENABLED:
+            st.caption("Start the app with PIXAR_METRICS=1 to collect section metrics.")
+            return
+
+        def kb(value):
+            return None if value is None else round(value / 1024, 1)
+
+        this_run = [
+            {
+                "section": sample.section,
+                "wall (ms)": round(sample.wall_s * 1000, 1),
+                "cpu (ms)": round(sample.cpu_s * 1000, 1),
+                "alloc (KB)": kb(sample.alloc_bytes),
+                "payload (KB)": kb(sample.payload_bytes),
+            }
+            for sample in metrics.run_samples()
+        ]
+        st.markdown("**This run**")
+        st.dataframe(this_run, hide_index=True)
+
+        # Todas las sesiones del proceso (colector compartido)
+        st.markdown("**All sessions**")
+        st.dataframe(
+            [
+                {"section": name, **{k: round(v, 1) for k, v in row.items()}}
+                for name, row in metrics.collector.snapshot().items()
+            ],
+            hide_index=True,
+        )
+        st.caption(f"Figure cache: {get_figure_cache().stats()}")
+        st.caption(f"Figure pool: {get_figure_scheduler().stats()}")
 
 
 # -----------------------------------------------------------------------------------
 # -----------------------------------------------------------------------------------
 # ---- MAIN ----
 render_title()
+watch_live_data(catalog.version if PARTITIONED else dataset_version(df))
 
 selected_year, selected_ratings = render_sidebar_filters()
+if PARTITIONED:
+    selected_year, df = load_partitions(selected_year, selected_ratings)
+
+# Un único filtro compilado por rerun, compartido por todos los gráficos; cada gráfico
+# lo cruza con las selecciones de los demás (cross-filter)
+filtered = get_filter_index(df, dataset_version(df)).compile(
+    selected_year, selected_ratings
+)
+selections = cross_filter_selections()
+graph_view = filtered.cross_filtered(selections, exclude="filtered_graph")
+
+# Las figuras no dependen unas de otras: se lanzan todas ya al pool (figure_scheduler.py)
+# y se construyen mientras se pintan KPIs y selector; cada una se pinta al terminar
+graph_task = filtered_graph_task(graph_view)
+additional_charts = schedule_additional_charts(filtered, selections)
 
 col_left, col_right = st.columns([4, 1])
 
-with col_left:
-    render_kpis()
-    st.plotly_chart(
-        render_filtered_graph(selected_year, selected_ratings, df),
-        use_container_width=True,
+# Primero la columna derecha: la tarjeta no espera al gráfico filtrado
+# El selector y los percentiles son de todo el catálogo, no del filtro de la barra
+# lateral: en modo particionado salen de la tabla por película (partitioned.py)
+with col_right:
+    render_film_selector(
+        get_catalog_film_index(catalog) if PARTITIONED else get_film_index(df, dataset_version(df))
     )
 
+with col_left:
+    render_kpis(selected_year, selected_ratings, df)
+    render_cross_filter_status(selections)
+    render_filtered_graph(graph_view, graph_task)
+
     # 🚀 Línea divisoria aquí
     st.markdown(
         """
@@ -625,11 +1137,20 @@ with col_left:
         unsafe_allow_html=True,
     )
 
-with col_right:
-    render_film_selector(df)
-
 # Aquí, fuera de las columnas, para que use el ancho completo:
-render_additional_charts(df, selected_year)
+render_additional_charts(filtered, selections, additional_charts)
+
+
+render_extra_critics_charts(filtered.cross_filtered(selections))
+
 
+# ---- MÉTRICAS POR SECCIÓN (PIXAR_METRICS=1) ----
+metrics.end_run()
+if metrics.DEBUG_PANEL_ENABLED or st.query_params.get("debug") == "1":
+    render_debug_panel()
 
-render_extra_critics_charts(df)
+# ---- PERFILADO DE ARRANQUE (PIXAR_PROFILE=1) ----
+profile_report = profiling.report()
+if profile_report:
+    with st.sidebar.expander("⏱️ Startup profile"):
+        st.code(profile_report)
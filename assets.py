@@ -0,0 +1,164 @@
+import argparse
+import hashlib
+import os
+import re
+import sys
+import urllib.request
+from pathlib import Path
+
+import streamlit as st
+
+# -----------------------------------------------------------------------------------
+# ---- ASSETS ESTÁTICOS LOCALES ----
+# La fuente del título y el logo se sirven desde static/assets/ (Streamlit con
+# server.enableStaticServing, ver .streamlit/config.toml), sin pedir nada a terceros al
+# cargar la página. Versionados en el repo:
+#   title-700.woff2   STIX General Bold (licencia STIX, redistribuible), ASCII imprimible
+#   pixar-logo.svg    la palabra PIXAR en contornos (DejaVu Sans Bold), sin fuente
+# `python assets.py --fetch` los sustituye por Cinzel (Google Fonts) y el logo PNG de
+# Wikimedia, y se versionan igual.
+# PIXAR_REMOTE_ASSETS=1   pide fuente y logo a Google Fonts / Wikimedia (opt-in)
+# Todos los <style> de la app están en assets/dashboard.css: se minifica en una única
+# hoja static/assets/dashboard.<hash>.min.css. El nombre cambia con el contenido, así
+# que un proxy puede cachear app/static/assets/ para siempre (README).
+ROOT = Path(__file__).resolve().parent
+SOURCE_CSS = ROOT / "assets" / "dashboard.css"
+ASSETS_DIR = ROOT / "static" / "assets"
+ASSETS_URL = "app/static/assets"  # relativa: respeta server.baseUrlPath
+REMOTE_ASSETS = os.environ.get("PIXAR_REMOTE_ASSETS", "0") == "1"
+
+FONT_FILE = "title-700.woff2"
+FONT_FAMILY = "Dashboard Title"
+# El primero que exista: el PNG descargado con --fetch o el SVG versionado
+LOGO_FILES = ("pixar-logo.png", "pixar-logo.svg")
+FONT_CSS_URL = "https://fonts.googleapis.com/css2?family=Cinzel:wght@700&display=swap"
+LOGO_URL = (
+    "https://upload.wikimedia.org/wikipedia/commons/thumb/4/40/"
+    "Pixar_logo.svg/320px-Pixar_logo.svg.png"
+)
+# Google Fonts solo devuelve woff2 a navegadores que lo anuncian
+FETCH_USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120 Safari/537.36"
+
+
+def fingerprint(data):
+    return hashlib.sha1(data).hexdigest()[:10]
+
+
+def asset_url(name):
+    # ?v=<hash>: el navegador puede cachearlo y se invalida si el fichero cambia
+    path = ASSETS_DIR / name
+    if not path.exists():
+        return None
+    return f"{ASSETS_URL}/{name}?v={fingerprint(path.read_bytes())}"
+
+
+# -----------------------------------------------------------------------------------
+# ---- HOJA DE ESTILOS ÚNICA ----
+def minify_css(text):
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.DOTALL)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{}:;,>])\s*", r"\1", text)
+    return text.replace(";}", "}").strip()
+
+
+def font_css(inline=False):
+    # @font-face de la fuente local. En la hoja servida desde static/assets la URL es
+    # relativa a la hoja; en línea, a la página. Con PIXAR_REMOTE_ASSETS, la hoja de
+    # Google Fonts (@import debe ir antes que el resto)
+    if REMOTE_ASSETS:
+        return f"@import url('{FONT_CSS_URL}');\n"
+    url = asset_url(FONT_FILE)
+    if url is None:
+        return ""
+    if not inline:
+        url = url.rsplit("/", 1)[1]
+    return (
+        f"@font-face {{ font-family: '{FONT_FAMILY}'; font-style: normal; font-weight: 700;"
+        f" font-display: swap; src: url('{url}') format('woff2'); }}\n"
+    )
+
+
+def build_stylesheet():
+    css = minify_css(font_css() + SOURCE_CSS.read_text())
+
+    name = f"dashboard.{fingerprint(css.encode())}.min.css"
+    path = ASSETS_DIR / name
+    if not path.exists():
+        ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(css)
+        tmp_path.replace(path)
+        for old in ASSETS_DIR.glob("dashboard.*.min.css"):
+            if old != path:
+                old.unlink(missing_ok=True)
+    return name, css
+
+
+@st.cache_resource(show_spinner=False)
+def get_stylesheet():
+    # Un <link> de ~100 bytes en cada rerun en lugar de todos los <style>; la hoja la
+    # descarga el navegador una vez. Sin static serving (o sin permiso de escritura)
+    # se inyecta la hoja minificada en línea.
+    static = st.get_option("server.enableStaticServing")
+    try:
+        name, _ = build_stylesheet()
+    except OSError:
+        name = None
+    if name is None or not static:
+        # Sin static serving la fuente local no se puede servir: la del sistema
+        fonts = font_css(inline=True) if static or REMOTE_ASSETS else ""
+        return f"<style>{minify_css(fonts + SOURCE_CSS.read_text())}</style>"
+    return f'<link rel="stylesheet" href="{ASSETS_URL}/{name}">'
+
+
+@st.cache_resource(show_spinner=False)
+def get_logo_html():
+    if REMOTE_ASSETS:
+        url = LOGO_URL
+    elif st.get_option("server.enableStaticServing"):
+        url = next(filter(None, map(asset_url, LOGO_FILES)), None)
+    else:
+        url = None
+    if url is None:
+        return "<h1 class='custom-title'>PIXAR</h1>"
+    return f"<img src='{url}' width='300' alt='Pixar'>"
+
+
+# -----------------------------------------------------------------------------------
+# ---- DESCARGA (UNA VEZ, CON RED) ----
+def download(url):
+    request = urllib.request.Request(url, headers={"User-Agent": FETCH_USER_AGENT})
+    with urllib.request.urlopen(request, timeout=30) as response:
+        return response.read()
+
+
+def fetch_assets():
+    ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+    font_css = download(FONT_CSS_URL).decode()
+    match = re.search(r"url\((https://[^)]+\.woff2)\)", font_css)
+    if match is None:
+        raise RuntimeError("No woff2 URL in the Google Fonts stylesheet")
+    (ASSETS_DIR / FONT_FILE).write_bytes(download(match.group(1)))
+    (ASSETS_DIR / LOGO_FILES[0]).write_bytes(download(LOGO_URL))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle the dashboard's static assets.")
+    parser.add_argument(
+        "--fetch",
+        action="store_true",
+        help="replace the bundled font and logo with Cinzel and the Pixar logo PNG",
+    )
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_assets()
+    name, css = build_stylesheet()
+    for path in sorted(ASSETS_DIR.iterdir()):
+        print(f"{path.stat().st_size:>9,}  {path.relative_to(ROOT)}")
+    print(f"stylesheet: {ASSETS_URL}/{name} ({len(css):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
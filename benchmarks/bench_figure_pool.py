@@ -0,0 +1,90 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ["PIXAR_SNAPSHOTS"] = "0"
+
+import data_loader  # noqa: E402
+from benchmarks.synthetic import make_dataset  # noqa: E402
+from figure_cache import get_figure_cache  # noqa: E402
+from figure_scheduler import FigureScheduler  # noqa: E402
+from filters import FilterIndex  # noqa: E402
+
+# Importar app.py en "bare mode" ejecuta el script una vez con los datos reales
+logging.disable(logging.WARNING)
+import app  # noqa: E402
+
+# -----------------------------------------------------------------------------------
+# Las cinco figuras de un rerun con la caché vacía: en serie (como antes) y lanzadas a
+# la vez a un pool de N hilos. Con el pool, el total debería acercarse a la figura más
+# lenta en la medida en que haya núcleos libres (Plotly construye en Python puro: el
+# GIL limita lo que se gana con hilos).
+#
+#   python benchmarks/bench_figure_pool.py --rows 10000 --workers 1 2 4
+
+
+def jobs(filtered):
+    return {
+        "filtered_graph": lambda: app.compact_figure(app.build_filtered_figure(filtered)),
+        "budget_scatter": lambda: app.compact_figure(
+            app.build_budget_scatter(filtered.select(app.SCATTER_COLUMNS))
+        ),
+        "score_evolution": lambda: app.compact_figure(app.score_evolution_builder(filtered)()),
+        "box_vs_rt": lambda: app.compact_figure(
+            app.build_box_vs_rt(filtered.select(app.CRITICS_COLUMNS))
+        ),
+        "box_vs_meta": lambda: app.compact_figure(
+            app.build_box_vs_meta(filtered.select(app.CRITICS_COLUMNS))
+        ),
+    }
+
+
+def run(scheduler, chart_jobs):
+    start = time.perf_counter()
+    tasks = [scheduler.submit(chart_id, job, wait=True) for chart_id, job in chart_jobs.items()]
+    for task in scheduler.completed(tasks):
+        task.result()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs pooled figure builds per rerun.")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = data_loader.apply_schema(make_dataset(args.rows))
+    df.attrs["version"] = f"synthetic-{args.rows}"
+    index = FilterIndex(df)
+    filtered = index.compile((int(df["year"].min()), int(df["year"].max())), index.ratings)
+    chart_jobs = jobs(filtered)
+    get_figure_cache().clear()
+
+    # Cada figura por separado: la más lenta es el mínimo alcanzable con el pool
+    single = {}
+    for chart_id, job in chart_jobs.items():
+        job()
+        start = time.perf_counter()
+        job()
+        single[chart_id] = time.perf_counter() - start
+    print(f"{args.rows:,} rows · {os.cpu_count()} CPUs")
+    for chart_id, seconds in single.items():
+        print(f"  {chart_id:<18}{seconds * 1000:9.1f} ms")
+    print(f"  {'sum':<18}{sum(single.values()) * 1000:9.1f} ms")
+    print(f"  {'slowest':<18}{max(single.values()) * 1000:9.1f} ms\n")
+
+    for workers in args.workers:
+        scheduler = FigureScheduler(workers=workers)
+        best = min(run(scheduler, chart_jobs) for _ in range(args.repeat))
+        mode = "serial" if scheduler.serial else f"{workers} threads"
+        print(f"{mode:<20}{best * 1000:9.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
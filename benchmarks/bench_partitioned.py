@@ -0,0 +1,83 @@
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import data_loader  # noqa: E402
+import partitioned  # noqa: E402
+from benchmarks.synthetic import make_dataset  # noqa: E402
+from filters import FilterIndex  # noqa: E402
+
+# -----------------------------------------------------------------------------------
+# Lo que cuesta tener las filas de un filtro en memoria: cargar el catálogo entero
+# (caché Feather, como ahora) y filtrar, frente a leer del Parquet particionado solo
+# las particiones y columnas del filtro (PIXAR_STORAGE=partitioned).
+#
+#   python benchmarks/bench_partitioned.py --rows 1000000
+
+
+def frame_mb(df):
+    return df.memory_usage(deep=True).sum() / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full load vs partition pushdown per filter.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=partitioned.PARTITION_CHUNK)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        partitioned.PARTITION_DIR = Path(tmp) / "partitioned"
+        csv_path = Path(tmp) / f"synthetic_{args.rows}.csv"
+        df = data_loader.apply_schema(make_dataset(args.rows))
+        df.to_csv(csv_path, index=False)
+        first, last = int(df["year"].min()), int(df["year"].max())
+        ratings = sorted(df["film_rating"].dropna().unique())
+        del df
+
+        start = time.perf_counter()
+        catalog = partitioned.PartitionedCatalog(
+            partitioned.write_partitioned(csv_path, args.chunk_rows)
+        )
+        print(
+            f"{args.rows:,} rows · {len(catalog.counts)} partitions · "
+            f"written in {time.perf_counter() - start:.1f}s\n"
+        )
+
+        mid = (first + last) // 2
+        filters = {
+            "all years, all ratings": ((first, last), ratings),
+            "last 10 years, all ratings": ((last - 9, last), ratings),
+            "10 years, 1 rating": ((mid, mid + 9), ratings[:1]),
+            "1 year, 1 rating": ((mid, mid), ratings[:1]),
+        }
+
+        data_loader.load_dataset(csv_path)  # crea la caché Feather
+        print(f"{'filter':<28}{'full (ms)':>11}{'pushdown (ms)':>15}{'rows':>12}{'MB full':>10}{'MB read':>10}")
+        for name, (years, selected) in filters.items():
+            start = time.perf_counter()
+            full = data_loader.load_dataset(csv_path)
+            rows = FilterIndex(full).compile(years, selected).rows
+            full_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            subset = catalog.read(years, selected)
+            pushdown_s = time.perf_counter() - start
+            assert len(subset) == len(rows), (name, len(subset), len(rows))
+            print(
+                f"{name:<28}{full_s * 1000:11.1f}{pushdown_s * 1000:15.1f}{len(subset):12,}"
+                f"{frame_mb(full):10.1f}{frame_mb(subset):10.1f}"
+            )
+
+        for path in data_loader.CACHE_DIR.glob(f"{csv_path.stem}.*"):
+            path.unlink()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
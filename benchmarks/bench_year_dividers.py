@@ -0,0 +1,101 @@
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import plotly.graph_objects as go
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+from benchmarks.synthetic import make_dataset  # noqa: E402
+from filters import FilterIndex  # noqa: E402
+
+# Importar app.py en "bare mode" ejecuta el script una vez con los datos reales
+import app  # noqa: E402
+
+
+# -----------------------------------------------------------------------------------
+# ---- VERSIÓN ANTERIOR (UN add_vline / add_annotation POR AÑO) ----
+def legacy_year_dividers(filtered_sorted):
+    fig = go.Figure()
+    for year in filtered_sorted["year"].unique():
+        year_idx = filtered_sorted[filtered_sorted["year"] == year].index[0]
+        fig.add_vline(
+            x=year_idx,
+            line_width=1.5,
+            line_dash="dot",
+            line_color="darkgray",
+            opacity=0.6,
+        )
+        fig.add_annotation(
+            x=year_idx,
+            y=filtered_sorted[["budget", "profit_margin"]].max().max() + 50,
+            text=str(int(year)),
+            showarrow=False,
+            font=dict(color="darkgray", size=14, family="Arial"),
+            textangle=-90,
+            xanchor="center",
+            yanchor="bottom",
+            xshift=-8,
+            yshift=-20,
+        )
+    return fig
+
+
+def batched_year_dividers(filtered_sorted):
+    fig = go.Figure()
+    year_lines, year_labels = app.build_year_dividers(filtered_sorted)
+    fig.update_layout(shapes=year_lines, annotations=year_labels)
+    return fig
+
+
+def best_of(func, *args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+# -----------------------------------------------------------------------------------
+# ---- MAIN ----
+def main():
+    parser = argparse.ArgumentParser(description="Year-divider scaling benchmark.")
+    parser.add_argument("--years", type=int, nargs="+", default=[10, 30, 100])
+    parser.add_argument("--films", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--skip-legacy-above",
+        type=int,
+        default=100,
+        help="skip the legacy loop above this many years (it grows quadratically)",
+    )
+    args = parser.parse_args()
+
+    print(f"{'years':>6} {'films':>8} {'legacy (s)':>12} {'batched (s)':>12} "
+          f"{'speed-up':>9} {'render (s)':>11}")
+    for n_years in args.years:
+        for n_films in args.films:
+            df = make_dataset(n_films, n_years=n_years)
+            filtered = FilterIndex(df).compile(
+                (df["year"].min(), df["year"].max()), df["film_rating"].unique()
+            )
+            filtered_sorted = filtered.frame
+
+            batched = best_of(batched_year_dividers, filtered_sorted, repeat=args.repeat)
+            render = best_of(app.build_filtered_figure, filtered, repeat=args.repeat)
+            if n_years <= args.skip_legacy_above:
+                legacy = best_of(legacy_year_dividers, filtered_sorted, repeat=args.repeat)
+                legacy_txt, ratio_txt = f"{legacy:12.4f}", f"{legacy / batched:8.1f}x"
+            else:
+                legacy_txt, ratio_txt = f"{'skipped':>12}", f"{'-':>9}"
+
+            print(f"{n_years:>6} {n_films:>8} {legacy_txt} {batched:12.4f} "
+                  f"{ratio_txt} {render:11.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import websockets  # noqa: E402
+from streamlit.proto.BackMsg_pb2 import BackMsg  # noqa: E402
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg  # noqa: E402
+from streamlit.proto.WidgetStates_pb2 import WidgetState  # noqa: E402
+
+import data_loader  # noqa: E402
+from benchmarks.rss_sessions import mb, memory_status  # noqa: E402
+from benchmarks.synthetic import make_dataset  # noqa: E402
+
+# -----------------------------------------------------------------------------------
+# Prueba de carga de extremo a extremo: arranca `streamlit run app.py` en local y abre
+# N sesiones que hablan el mismo protocolo que el navegador (BackMsg / ForwardMsg en
+# protobuf por /_stcore/stream). Cada sesión repite un guion de interacciones reales
+# (slider de años, ratings, película, expander de críticas) y se mide el tiempo desde
+# que se envía el rerun hasta el script_finished del servidor. Todo en una máquina y
+# sin red: el servidor escucha en localhost.
+#
+#   python benchmarks/load_test.py --rows 100000 --sessions 1 10 25 --actions 20
+
+STREAM_PATH = "/_stcore/stream"
+HEALTH_PATH = "/_stcore/health"
+WIDGET_ID = re.compile(r"^\$\$ID-[0-9a-f]+-(?P<key>.+)$")
+
+# Acciones del guion y su peso (las más frecuentes en una sesión real primero)
+ACTIONS = {
+    "year_slider": 4,
+    "toggle_rating": 2,
+    "select_film": 3,
+    "critics_expander": 1,
+}
+
+
+# -----------------------------------------------------------------------------------
+# ---- SERVIDOR ----
+def start_server(port, env, log_path):
+    # stderr a un fichero: una tubería que nadie lee se llena con los avisos de cada
+    # rerun y acaba bloqueando al servidor (latencia falsa)
+    command = [
+        sys.executable,
+        "-m",
+        "streamlit",
+        "run",
+        str(ROOT / "app.py"),
+        "--server.port",
+        str(port),
+        "--server.address",
+        "127.0.0.1",
+        "--server.headless",
+        "true",
+        "--server.fileWatcherType",
+        "none",
+        "--browser.gatherUsageStats",
+        "false",
+    ]
+    with open(log_path, "wb") as log:
+        return subprocess.Popen(
+            command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=log
+        )
+
+
+def server_log(log_path, limit=4000):
+    text = Path(log_path).read_text(errors="replace")
+    return text[-limit:]
+
+
+def wait_until_healthy(server, port, timeout, log_path):
+    deadline = time.monotonic() + timeout
+    url = f"http://127.0.0.1:{port}{HEALTH_PATH}"
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited early:\n{server_log(log_path)}")
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server not healthy after {timeout:.0f}s:\n{server_log(log_path)}")
+
+
+# -----------------------------------------------------------------------------------
+# ---- SESIÓN SIMULADA ----
+class Session:
+    # Lo mismo que hace el frontend: guarda el estado de cada widget (por id) y lo
+    # reenvía entero en cada rerun; los widgets de un fragmento reejecutan solo ese
+    # fragmento
+    def __init__(self, url, rng):
+        self.url = url
+        self.rng = rng
+        self.ws = None
+        self.widgets = {}  # key -> (id, proto del elemento, fragment_id)
+        self.states = {}  # id -> WidgetState
+        self.bytes_received = 0
+        self.errors = []
+
+    async def connect(self):
+        self.ws = await websockets.connect(
+            self.url, subprotocols=["streamlit"], max_size=None, ping_interval=None
+        )
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def _track(self, msg):
+        delta = msg.delta
+        kind = delta.WhichOneof("type")
+        if kind == "new_element":
+            element_type = delta.new_element.WhichOneof("type")
+            if element_type == "exception":
+                self.errors.append(delta.new_element.exception.message)
+                return
+            element = getattr(delta.new_element, element_type)
+        elif kind == "add_block" and delta.add_block.WhichOneof("type") == "expandable":
+            element = delta.add_block.expandable
+        else:
+            return
+        match = WIDGET_ID.match(getattr(element, "id", "") or "")
+        if match:
+            self.widgets[match["key"]] = (element.id, element, delta.fragment_id)
+
+    async def rerun(self, fragment_id=""):
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.query_string = ""
+        client_state.page_script_hash = ""
+        client_state.fragment_id = fragment_id
+        client_state.widget_states.widgets.extend(self.states.values())
+
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        sent = self.bytes_received
+        while True:
+            raw = await self.ws.recv()
+            self.bytes_received += len(raw)
+            forward = ForwardMsg.FromString(raw)
+            kind = forward.WhichOneof("type")
+            if kind == "delta":
+                self._track(forward)
+            elif kind == "script_finished":
+                break
+        return time.perf_counter() - start, self.bytes_received - sent
+
+    # ---- Cambios de widget (mismo formato que serializa cada widget) ----
+    def _set(self, key, field, value):
+        widget_id, _, fragment_id = self.widgets[key]
+        state = self.states.setdefault(widget_id, WidgetState(id=widget_id))
+        if field in ("double_array_value", "string_array_value"):
+            getattr(state, field).data[:] = value
+        else:
+            setattr(state, field, value)
+        return fragment_id
+
+    def year_slider(self):
+        slider = self.widgets["selected_year"][1]
+        low = self.rng.randint(int(slider.min), int(slider.max))
+        high = self.rng.randint(low, int(slider.max))
+        return self._set("selected_year", "double_array_value", [low, high])
+
+    def toggle_rating(self):
+        multiselect = self.widgets["selected_ratings"][1]
+        widget_id = multiselect.id
+        options = list(multiselect.options)
+        if widget_id in self.states:
+            current = list(self.states[widget_id].string_array_value.data)
+        else:
+            current = [options[i] for i in multiselect.default]
+        rating = self.rng.choice(options)
+        # Nunca se deja vacío: con cero ratings no hay nada que pintar
+        if rating in current and len(current) > 1:
+            current.remove(rating)
+        elif rating not in current:
+            current.append(rating)
+        return self._set("selected_ratings", "string_array_value", current)
+
+    def select_film(self):
+        selectbox = self.widgets["selected_film"][1]
+        return self._set("selected_film", "string_value", self.rng.choice(selectbox.options))
+
+    def critics_expander(self):
+        expander = self.widgets["critics_expander"][1]
+        state = self.states.get(expander.id)
+        is_open = state.bool_value if state is not None else expander.expanded
+        return self._set("critics_expander", "bool_value", not is_open)
+
+
+async def run_session(url, n_actions, think, seed, results):
+    rng = random.Random(seed)
+    session = Session(url, rng)
+    await session.connect()
+    try:
+        seconds, n_bytes = await session.rerun()
+        results.append(("initial", seconds, n_bytes))
+        actions, weights = zip(*ACTIONS.items())
+        for _ in range(n_actions):
+            if think:
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+            action = rng.choices(actions, weights)[0]
+            fragment_id = getattr(session, action)()
+            seconds, n_bytes = await session.rerun(fragment_id)
+            results.append((action, seconds, n_bytes))
+    finally:
+        await session.close()
+    return session.errors
+
+
+async def sample_rss(pid, samples, interval=0.25):
+    while True:
+        try:
+            samples.append(memory_status(pid)["rss"])
+        except OSError:
+            return
+        await asyncio.sleep(interval)
+
+
+async def run_load(url, pid, n_sessions, n_actions, think, seed):
+    results = []
+    rss = []
+    sampler = asyncio.create_task(sample_rss(pid, rss))
+    start = time.perf_counter()
+    errors = await asyncio.gather(
+        *(
+            run_session(url, n_actions, think, seed * 1000 + i, results)
+            for i in range(n_sessions)
+        ),
+        return_exceptions=True,
+    )
+    wall = time.perf_counter() - start
+    sampler.cancel()
+    failures = [e for e in errors if isinstance(e, BaseException)]
+    script_errors = [msg for e in errors if isinstance(e, list) for msg in e]
+    return results, wall, rss, failures, script_errors
+
+
+# -----------------------------------------------------------------------------------
+# ---- INFORME ----
+def percentiles(seconds):
+    if not seconds:
+        return {"p50": None, "p95": None, "p99": None}
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99])
+    return {"p50": p50, "p95": p95, "p99": p99}
+
+
+def summarize(n_sessions, results, wall, rss, failures, script_errors):
+    reruns = [r for r in results if r[0] != "initial"]
+    by_action = {}
+    for action, seconds, n_bytes in results:
+        by_action.setdefault(action, []).append((seconds, n_bytes))
+    return {
+        "sessions": n_sessions,
+        "reruns": len(reruns),
+        "wall_s": wall,
+        "throughput_rps": len(reruns) / wall if wall else 0.0,
+        **percentiles([seconds for _, seconds, _ in reruns]),
+        "bytes_sent": sum(n_bytes for _, _, n_bytes in results),
+        "rss_peak": max(rss, default=0),
+        "rss_end": rss[-1] if rss else 0,
+        "failures": [repr(e) for e in failures],
+        "script_errors": script_errors,
+        "actions": {
+            action: {
+                "count": len(rows),
+                **percentiles([seconds for seconds, _ in rows]),
+                "bytes_mean": sum(n_bytes for _, n_bytes in rows) / len(rows),
+            }
+            for action, rows in by_action.items()
+        },
+    }
+
+
+def ms(seconds):
+    return f"{seconds * 1000:9.1f}" if seconds is not None else f"{'-':>9}"
+
+
+def print_summary(row, rss_idle):
+    print(
+        f"\n{row['sessions']} sessions · {row['reruns']} reruns in {row['wall_s']:.1f}s "
+        f"· {row['throughput_rps']:.1f} reruns/s"
+    )
+    print(f"  {'rerun latency (ms)':<22}p50{ms(row['p50'])}  p95{ms(row['p95'])}  p99{ms(row['p99'])}")
+    print(
+        f"  {'server RSS (MB)':<22}idle {mb(rss_idle):.1f} · peak {mb(row['rss_peak']):.1f} "
+        f"· end {mb(row['rss_end']):.1f}"
+    )
+    print(f"  {'bytes sent (KB)':<22}{row['bytes_sent'] / 1024:.1f} total")
+    print(f"  {'action':<22}{'count':>6}{'p50':>10}{'p95':>10}{'p99':>10}{'KB/rerun':>10}")
+    for action, stats in row["actions"].items():
+        print(
+            f"  {action:<22}{stats['count']:>6}{ms(stats['p50'])} {ms(stats['p95'])} "
+            f"{ms(stats['p99'])} {stats['bytes_mean'] / 1024:9.1f}"
+        )
+    for failure in row["failures"]:
+        print(f"  FAILED SESSION: {failure}")
+    for message in sorted(set(row["script_errors"])):
+        print(f"  SCRIPT ERROR: {message}")
+
+
+# -----------------------------------------------------------------------------------
+# ---- MAIN ----
+def main():
+    parser = argparse.ArgumentParser(
+        description="Websocket load test: N simulated browser sessions against app.py."
+    )
+    parser.add_argument("--rows", type=int, default=10_000, help="synthetic rows (0: real dataset)")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--actions", type=int, default=20, help="interactions per session")
+    parser.add_argument("--think", type=float, default=0.5, help="mean seconds between actions")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        "PIXAR_SNAPSHOTS": os.environ.get("PIXAR_SNAPSHOTS", "0"),
+        "PYTHONUNBUFFERED": "1",
+    }
+    url = f"ws://127.0.0.1:{args.port}{STREAM_PATH}"
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = None
+        if args.rows:
+            csv_path = Path(tmp) / f"synthetic_{args.rows}.csv"
+            data_loader.apply_schema(make_dataset(args.rows)).to_csv(csv_path, index=False)
+            env["PIXAR_DATA_CSV"] = str(csv_path)
+
+        log_path = Path(tmp) / "server.log"
+        server = start_server(args.port, env, log_path)
+        try:
+            wait_until_healthy(server, args.port, args.startup_timeout, log_path)
+            # Calentamiento: una sesión carga el dataset y llena las cachés compartidas
+            asyncio.run(run_load(url, server.pid, 1, len(ACTIONS), 0, args.seed))
+            rss_idle = memory_status(server.pid)["rss"]
+            print(f"server pid {server.pid} · {os.cpu_count()} CPUs · idle RSS {mb(rss_idle):.1f} MB")
+
+            for n_sessions in args.sessions:
+                row = summarize(
+                    n_sessions,
+                    *asyncio.run(
+                        run_load(url, server.pid, n_sessions, args.actions, args.think, args.seed)
+                    ),
+                )
+                row["rss_idle"] = rss_idle
+                print_summary(row, rss_idle)
+                if row["failures"] or row["script_errors"]:
+                    print(f"  server log (tail):\n{server_log(log_path)}")
+                rows.append(row)
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+            if csv_path is not None:
+                for path in data_loader.CACHE_DIR.glob(f"{csv_path.stem}.*"):
+                    path.unlink()
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2))
+    return 1 if any(row["failures"] or row["script_errors"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.synthetic import make_dataset  # noqa: E402
+from data_loader import SCHEMA, SOURCE_CSV, apply_schema  # noqa: E402
+
+# -----------------------------------------------------------------------------------
+# Memoria por columna y tiempo de isin / groupby con tres disposiciones del mismo CSV:
+#   object    texto como objetos Python (lo que daba read_csv en pandas < 3)
+#   default   read_csv actual (texto en Arrow, int64 / float64)
+#   compact   esquema de data_loader.SCHEMA (categorías, int16, float32)
+#
+#   python benchmarks/memory_report.py                 # dataset real
+#   python benchmarks/memory_report.py --rows 1000000  # sintético
+
+
+def layouts(csv_path):
+    default = pd.read_csv(csv_path)
+    text_cols = [c for c in default.columns if default[c].dtype.kind not in "biuf"]
+    return {
+        "object": pd.read_csv(csv_path, dtype={c: object for c in text_cols}),
+        "default": default,
+        "compact": apply_schema(default),
+    }
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def operations(df):
+    # Las mismas operaciones que hacen los filtros y los KPIs de la app
+    ratings = ["G", "PG"]
+    return {
+        "isin(film_rating)": lambda: df["film_rating"].isin(ratings),
+        "year range mask": lambda: df["year"].between(2000, 2010),
+        "groupby(year).sum": lambda: df.groupby("year", observed=True)[
+            "box_office_worldwide"
+        ].sum(),
+        "groupby(film_rating).max": lambda: df.groupby("film_rating", observed=True)[
+            "profit_margin"
+        ].max(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory report: default vs compact dtypes.")
+    parser.add_argument("--rows", type=int, help="synthetic dataset size (default: real CSV)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.rows:
+            csv_path = Path(tmp) / f"synthetic_{args.rows}.csv"
+            make_dataset(args.rows).to_csv(csv_path, index=False)
+        else:
+            csv_path = SOURCE_CSV
+        frames = layouts(csv_path)
+
+    names = list(frames)
+    print(f"{len(frames['default']):,} rows\n")
+    print(f"{'column':<24}" + "".join(f"{n + ' (KB)':>16}" for n in names) + "   compact dtype")
+    usage = {name: df.memory_usage(deep=True, index=False) for name, df in frames.items()}
+    for col in frames["default"].columns:
+        cells = "".join(f"{usage[n][col] / 1024:16.1f}" for n in names)
+        print(f"{col:<24}{cells}   {SCHEMA.get(col, frames['compact'][col].dtype)}")
+    totals = {n: usage[n].sum() for n in names}
+    print(f"{'TOTAL':<24}" + "".join(f"{totals[n] / 1024:16.1f}" for n in names))
+    for n in ("object", "default"):
+        print(f"compact / {n}: {totals['compact'] / totals[n]:.2f}x")
+
+    header = f"operation (ms, best of {args.repeat})"
+    print(f"\n{header:<30}" + "".join(f"{n:>12}" for n in names))
+    ops = {name: operations(df) for name, df in frames.items()}
+    for op in ops["default"]:
+        cells = "".join(f"{best_of(ops[n][op], args.repeat) * 1000:12.2f}" for n in names)
+        print(f"{op:<30}{cells}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import argparse
+import zlib
+import logging
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ["PIXAR_SNAPSHOTS"] = "0"
+
+import plotly.io as pio  # noqa: E402
+
+import data_loader  # noqa: E402
+from benchmarks.synthetic import make_dataset  # noqa: E402
+from filters import get_filter_index  # noqa: E402
+from payload import compact_figure  # noqa: E402
+
+# Importar app.py en "bare mode" ejecuta el script una vez con los datos reales
+logging.disable(logging.WARNING)
+import app  # noqa: E402
+
+# -----------------------------------------------------------------------------------
+# Bytes por gráfico del spec que manda st.plotly_chart, sin compactar (template por
+# defecto, float64 / object tal cual) y compactado por payload.py:
+#   raw / compact / spec      el spec sin comprimir y lo que lo reduce payload.py
+#   raw wire / wire / wire x  los dos specs tras la compresión permessage-deflate del
+#                             websocket (server.enableWebsocketCompression en
+#                             .streamlit/config.toml; ventana de 2^12 bytes, como la
+#                             negocia el servidor) y lo que reduce payload.py con ella
+#   total                     raw sin comprimir -> wire: compactado + compresión. Sin
+#                             la compresión activada, lo que llega es `compact`
+#
+#   python benchmarks/payload_report.py                # dataset real
+#   python benchmarks/payload_report.py --rows 10000   # sintético
+
+
+def builders(df):
+    version = data_loader.dataset_version(df)
+    selected_year = (int(df["year"].min()), int(df["year"].max()))
+    ratings = list(df["film_rating"].dropna().unique())
+    filtered = get_filter_index(df, version).compile(selected_year, ratings)
+    return {
+        "filtered_graph": lambda: app.build_filtered_figure(filtered),
+        "budget_scatter": lambda: app.build_budget_scatter(
+            filtered.select(app.SCATTER_COLUMNS)
+        ),
+        "score_evolution": app.score_evolution_builder(filtered),
+        "box_vs_rt": lambda: app.build_box_vs_rt(filtered.select(app.CRITICS_COLUMNS)),
+        "box_vs_meta": lambda: app.build_box_vs_meta(filtered.select(app.CRITICS_COLUMNS)),
+    }
+
+
+WINDOW_BITS = 12
+
+
+def deflate_bytes(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -WINDOW_BITS)
+    return len(compressor.compress(data) + compressor.flush())
+
+
+def spec_bytes(fig):
+    spec = pio.to_json(fig, validate=False).encode()
+    return len(spec), deflate_bytes(spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plotly payload per chart: raw vs compact.")
+    parser.add_argument("--rows", type=int, help="synthetic dataset size (default: real CSV)")
+    args = parser.parse_args()
+
+    df = data_loader.apply_schema(make_dataset(args.rows)) if args.rows else app.df
+    if args.rows:
+        df.attrs["version"] = f"synthetic-{args.rows}"
+
+    print(f"{len(df):,} rows\n")
+    print(
+        f"{'chart':<18}{'raw (KB)':>10}{'compact (KB)':>14}{'spec':>7}"
+        f"{'raw wire (KB)':>15}{'wire (KB)':>11}{'wire':>7}{'total':>8}"
+    )
+    totals = [0, 0, 0, 0]
+    for chart_id, build in builders(df).items():
+        raw, raw_wire = spec_bytes(build())
+        compact, wire = spec_bytes(compact_figure(build()))
+        for i, value in enumerate((raw, compact, raw_wire, wire)):
+            totals[i] += value
+        print_row(chart_id, raw, compact, raw_wire, wire)
+    print_row("TOTAL", *totals)
+    return 0
+
+
+def print_row(name, raw, compact, raw_wire, wire):
+    print(
+        f"{name:<18}{raw / 1024:10.1f}{compact / 1024:14.1f}{raw / compact:6.1f}x"
+        f"{raw_wire / 1024:15.1f}{wire / 1024:11.1f}{raw_wire / wire:6.1f}x{raw / wire:7.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import argparse
+import gc
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import data_loader  # noqa: E402
+from benchmarks.synthetic import make_dataset  # noqa: E402
+
+# -----------------------------------------------------------------------------------
+# Comprueba que la memoria residente no crece con el número de sesiones:
+#   1) N sesiones de AppTest en un mismo proceso (comparten el frame de cache_resource)
+#   2) P procesos worker leyendo el mismo fichero Arrow con mmap (comparten page cache)
+# Sale con código 1 si el crecimiento por sesión supera --max-mb-per-session.
+#
+#   python benchmarks/rss_sessions.py --rows 1000000 --sessions 1 10 25 50 --workers 4
+
+
+# -----------------------------------------------------------------------------------
+# ---- MEMORIA DEL PROCESO (/proc, Linux) ----
+def memory_status(pid="self"):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def mb(value):
+    return value / 2**20
+
+
+# -----------------------------------------------------------------------------------
+# ---- 1) SESIONES EN UN PROCESO ----
+FILTER_VARIANTS = 5
+
+
+def run_session(csv_path, variant, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=timeout)
+    at.run()
+    # Cada sesión mueve el slider a uno de FILTER_VARIANTS rangos: filtros distintos,
+    # mismas cachés compartidas
+    slider = at.sidebar.slider(key="selected_year")
+    low, high = slider.value
+    slider.set_value((low, low + (high - low) * (variant + 1) // FILTER_VARIANTS)).run()
+    if at.exception:
+        raise RuntimeError(f"AppTest raised: {at.exception}")
+    # El servidor solo conserva el estado de la sesión; los mensajes ya enviados al
+    # navegador (que AppTest guarda en su árbol de elementos) no cuentan
+    return at.session_state
+
+
+def run_sessions(csv_path, session_counts, timeout):
+    os.environ["PIXAR_DATA_CSV"] = str(csv_path)
+    sessions = []
+    rows = []
+    try:
+        # Calentamiento: una sesión por variante de filtro llena las cachés compartidas
+        for variant in range(FILTER_VARIANTS):
+            run_session(csv_path, variant, timeout)
+        for target in session_counts:
+            while len(sessions) < target:
+                sessions.append(run_session(csv_path, len(sessions) % FILTER_VARIANTS, timeout))
+            gc.collect()
+            rows.append((target, memory_status()))
+            print(f"{target:>9} sessions   rss {mb(rows[-1][1]['rss']):9.1f} MB")
+    finally:
+        os.environ.pop("PIXAR_DATA_CSV", None)
+    return rows
+
+
+# -----------------------------------------------------------------------------------
+# ---- 2) PROCESOS WORKER SOBRE EL MISMO FICHERO ----
+def _worker(csv_path, ready, done):
+    df = data_loader.load_dataset(csv_path)
+    # Tocar todas las columnas numéricas: fuerza a cargar las páginas del mmap
+    for col in df.columns:
+        if df[col].dtype.kind in "biuf":
+            df[col].to_numpy().sum()
+    ready.put(os.getpid())
+    done.wait()
+
+
+def run_workers(csv_path, n_workers):
+    ctx = multiprocessing.get_context("spawn")
+    ready, done = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=_worker, args=(csv_path, ready, done)) for _ in range(n_workers)]
+    for proc in procs:
+        proc.start()
+    pids = [ready.get(timeout=600) for _ in procs]
+    stats = [memory_status(pid) for pid in pids]
+    done.set()
+    for proc in procs:
+        proc.join()
+    return stats
+
+
+# -----------------------------------------------------------------------------------
+# ---- MAIN ----
+def main():
+    parser = argparse.ArgumentParser(description="RSS vs. number of dashboard sessions.")
+    parser.add_argument("--rows", type=int, default=10**5)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 25])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument(
+        "--max-mb-per-session",
+        type=float,
+        default=2.0,
+        help="allowed RSS growth per extra session",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / f"rss_{args.rows}.csv"
+        make_dataset(args.rows).to_csv(csv_path, index=False)
+        data_loader.load_dataset(csv_path)  # crea la caché Arrow una sola vez
+        cache_path = data_loader.CACHE_DIR / f"{csv_path.stem}.feather"
+        print(f"dataset: {args.rows:,} rows, arrow file {mb(cache_path.stat().st_size):.1f} MB\n")
+
+        try:
+            # Primero los workers: AppTest sustituye __main__ y spawn ya no encontraría _worker
+            for i, stats in enumerate(run_workers(csv_path, args.workers)):
+                print(
+                    f"worker {i}: rss {mb(stats['rss']):7.1f} MB"
+                    f"   shared {mb(stats['shared']):7.1f} MB"
+                    f"   private {mb(stats['private']):7.1f} MB"
+                    f"   pss {mb(stats['pss']):7.1f} MB"
+                )
+            print()
+            rows = run_sessions(csv_path, sorted(args.sessions), args.timeout)
+        finally:
+            for path in data_loader.CACHE_DIR.glob(f"{csv_path.stem}.*"):
+                path.unlink()
+
+    (first_n, first), (last_n, last) = rows[0], rows[-1]
+    if last_n == first_n:
+        return 0
+    per_session = mb(last["rss"] - first["rss"]) / (last_n - first_n)
+    print(f"\nRSS growth per extra session: {per_session:.2f} MB")
+    if per_session > args.max_mb_per_session:
+        print(f"FAIL: more than {args.max_mb_per_session} MB per session")
+        return 1
+    print("OK: resident memory stays flat as sessions grow")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+# Fuera de `streamlit run` cada st.* avisa de que no hay ScriptRunContext (también al
+# importar app); streamlit reconfigura el nivel de sus loggers al importarse, así que
+# se desactivan los avisos globalmente
+logging.disable(logging.WARNING)
+
+import numpy as np  # noqa: E402
+
+import data_loader  # noqa: E402
+import metrics  # noqa: E402
+from benchmarks.synthetic import make_dataset  # noqa: E402
+from figure_cache import get_figure_cache  # noqa: E402
+from film_cards import get_film_index  # noqa: E402
+from filters import Selection, get_filter_index  # noqa: E402
+from aggregates import get_kpi_store  # noqa: E402
+from pyramid import get_time_pyramid  # noqa: E402
+from regression import get_regression_store  # noqa: E402
+
+# Importar app.py en "bare mode" ejecuta el script una vez con los datos reales;
+# después se llaman sus render_* directamente con los datasets sintéticos
+import app  # noqa: E402
+
+# -----------------------------------------------------------------------------------
+# ---- CONFIGURACIÓN ----
+# baselines.json llega hasta 10**6: con 10**7 filas el primer load_dataset (CSV de
+# ~1 GB + frame + feather) pasa de 6 GB de RAM y la máquina de referencia lo mata por
+# OOM. Se puede lanzar a mano (--sizes 10000000) en una máquina con más memoria
+ALL_SIZES = [10**2, 10**4, 10**6, 10**7]
+DEFAULT_SIZES = [10**2, 10**4]
+# AppTest (script completo, un solo run) y los casos cold (cachés vacías, gc, page
+# cache) varían bastante entre ejecuciones: se comparan con un margen más ancho
+NOISY_MARKERS = ("/apptest[", "/cold")
+BASELINES_PATH = Path(__file__).resolve().parent / "baselines.json"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+# -----------------------------------------------------------------------------------
+# ---- MEDICIÓN ----
+def reset_caches():
+    get_kpi_store.clear()
+    get_time_pyramid.clear()
+    get_regression_store.clear()
+    get_filter_index.clear()
+    get_film_index.clear()
+    get_figure_cache().clear()
+
+
+def measure(func, repeat, cold):
+    # Tiempo (mejor de N) y pico de memoria (pasada aparte: tracemalloc ralentiza).
+    # En warm se calienta antes con una llamada sin medir: no depende del caso anterior
+    timings = []
+    result = None if cold else func()
+    for _ in range(repeat):
+        if cold:
+            reset_caches()
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+
+    if cold:
+        reset_caches()
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, result
+
+
+def without_plotly_chart(func):
+    # En bare mode st.plotly_chart serializa el spec entero en cada llamada: se cambia
+    # por un no-op para medir el render_* y no la serialización
+    def wrapper():
+        with mock.patch.object(app.st, "plotly_chart", lambda *args, **kwargs: None):
+            return func()
+
+    return wrapper
+
+
+def figure_bytes(*figures):
+    # Lo mismo que serializa st.plotly_chart
+    return sum(metrics.plotly_payload_bytes(fig) for fig in figures)
+
+
+# -----------------------------------------------------------------------------------
+# ---- CASOS ----
+def direct_cases(df, csv_path):
+    selected_year = (int(df["year"].min()), int(df["year"].max()))
+    selected_ratings = list(df["film_rating"].dropna().unique())
+    version = data_loader.dataset_version(df)
+
+    def compile_filter():
+        return get_filter_index(df, version).compile(selected_year, selected_ratings)
+
+    def filtered():
+        return compile_filter()
+
+    # Selecciones de ejemplo: un clic cada 3 barras y un rectángulo con ~5% del scatter
+    rng = np.random.default_rng(0)
+    selections = {
+        "filtered_graph": Selection("filtered_graph", np.arange(0, len(df), 3)),
+        "budget_scatter": Selection(
+            "budget_scatter", rng.choice(len(df), max(1, len(df) // 20), replace=False)
+        ),
+    }
+
+    def cross_filter():
+        return len(filtered().cross_filtered(selections))
+
+    def load_cold():
+        for path in data_loader.CACHE_DIR.glob(f"{csv_path.stem}.*"):
+            path.unlink()
+        return data_loader.load_dataset(csv_path)
+
+    def additional_payload():
+        view = filtered()
+        return figure_bytes(
+            app.compact_figure(app.build_budget_scatter(view.frame)),
+            app.compact_figure(app.score_evolution_builder(view)()),
+        )
+
+    def film_card_payload():
+        index = get_film_index(df, version)
+        return len(index.card_html(index.films[0]))
+
+    # (nombre, función, payload)
+    return [
+        ("load_dataset", load_cold, None),
+        ("load_dataset[feather]", lambda: data_loader.load_dataset(csv_path), None),
+        ("filter_compile", compile_filter, None),
+        ("cross_filter", cross_filter, None),
+        ("render_kpis", lambda: app.render_kpis(selected_year, selected_ratings, df), None),
+        (
+            "render_filtered_graph",
+            without_plotly_chart(lambda: app.render_filtered_graph(filtered())),
+            lambda fig: figure_bytes(fig),
+        ),
+        (
+            # Solo el trabajo de la figura (caché + construcción + compactado), como
+            # lo ejecuta el pool
+            "render_filtered_graph[figure]",
+            lambda: app.filtered_graph_task(filtered(), wait=True).result(),
+            lambda fig: figure_bytes(fig),
+        ),
+        (
+            "render_additional_charts",
+            lambda: app.render_additional_charts(filtered()),
+            lambda _: additional_payload(),
+        ),
+        (
+            "render_extra_critics_charts[opened]",
+            lambda: app.critics_figures(filtered()),
+            lambda figures: figure_bytes(*figures),
+        ),
+        (
+            # Fuera de un ScriptRunContext, @st.fragment no ejecuta nada: llamamos a la
+            # función envuelta
+            "render_film_selector",
+            lambda: app.render_film_selector.__wrapped__(get_film_index(df, version)),
+            lambda _: film_card_payload(),
+        ),
+    ]
+
+
+def apptest_case(csv_path, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["PIXAR_DATA_CSV"] = str(csv_path)
+    try:
+        at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=timeout)
+        reset_caches()
+        start = time.perf_counter()
+        at.run()
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        at.run()
+        warm = time.perf_counter() - start
+
+        slider = at.sidebar.slider(key="selected_year")
+        low, high = slider.value
+        start = time.perf_counter()
+        slider.set_value((low, low + (high - low) // 2)).run()
+        slider_rerun = time.perf_counter() - start
+
+        films = at.selectbox(key="selected_film")
+        start = time.perf_counter()
+        films.set_value(films.options[-1]).run()
+        film_rerun = time.perf_counter() - start
+
+        if at.exception:
+            raise RuntimeError(f"AppTest raised: {at.exception}")
+        return {
+            "apptest[cold run]": cold,
+            "apptest[warm run]": warm,
+            "apptest[year slider]": slider_rerun,
+            "apptest[film selector]": film_rerun,
+        }
+    finally:
+        os.environ.pop("PIXAR_DATA_CSV", None)
+
+
+# -----------------------------------------------------------------------------------
+# ---- BASELINES ----
+def compare(results, baselines, tolerance, slack, noisy_tolerance, noisy_slack):
+    regressions = []
+    for key, row in results.items():
+        base = baselines.get(key)
+        if base is None:
+            continue
+        if any(marker in key for marker in NOISY_MARKERS):
+            limit = base["wall_s"] * noisy_tolerance + noisy_slack
+        else:
+            limit = base["wall_s"] * tolerance + slack
+        if row["wall_s"] > limit:
+            regressions.append((key, base["wall_s"], row["wall_s"]))
+    return regressions
+
+
+def print_row(key, row, baseline):
+    base = f"{baseline['wall_s'] * 1000:10.1f}" if baseline else f"{'-':>10}"
+    peak = f"{row['peak_bytes'] / 2**20:9.1f}" if row.get("peak_bytes") is not None else f"{'-':>9}"
+    payload = f"{row['payload_bytes'] / 1024:11.1f}" if row.get("payload_bytes") is not None else f"{'-':>11}"
+    print(f"{key:<58} {row['wall_s'] * 1000:10.1f} {base} {peak} {payload}")
+
+
+# -----------------------------------------------------------------------------------
+# ---- MAIN ----
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark suite for app.py.")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help=f"synthetic dataset sizes (full run: {' '.join(map(str, ALL_SIZES))})",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--apptest-max-rows",
+        type=int,
+        default=10**6,
+        help="run the AppTest scenario only up to this dataset size",
+    )
+    parser.add_argument("--apptest-timeout", type=float, default=600)
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown factor")
+    parser.add_argument("--slack-ms", type=float, default=10, help="absolute slack per case")
+    parser.add_argument(
+        "--noisy-tolerance",
+        type=float,
+        default=2.5,
+        help="allowed slowdown factor for AppTest and cold cases",
+    )
+    parser.add_argument(
+        "--noisy-slack-ms",
+        type=float,
+        default=50,
+        help="absolute slack for AppTest and cold cases",
+    )
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    baselines = json.loads(BASELINES_PATH.read_text()) if BASELINES_PATH.exists() else {}
+    results = {}
+
+    print(f"{'case':<58} {'wall (ms)':>10} {'base (ms)':>10} {'peak (MB)':>9} {'payload (KB)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in args.sizes:
+            # Mismo esquema compacto que aplica data_loader al cargar
+            df = data_loader.apply_schema(make_dataset(n_rows))
+            csv_path = Path(tmp) / f"synthetic_{n_rows}.csv"
+            df.to_csv(csv_path, index=False)
+            df.attrs["version"] = f"synthetic-{n_rows}"
+
+            for name, func, payload_fn in direct_cases(df, csv_path):
+                for mode in ("cold", "warm"):
+                    if name.startswith("load_dataset") and mode == "warm":
+                        continue
+                    wall, peak, result = measure(func, args.repeat, cold=mode == "cold")
+                    key = f"{n_rows}/{name}/{mode}"
+                    results[key] = {
+                        "wall_s": wall,
+                        "peak_bytes": peak,
+                        "payload_bytes": payload_fn(result) if payload_fn else None,
+                    }
+                    print_row(key, results[key], baselines.get(key))
+
+            if n_rows <= args.apptest_max_rows:
+                for name, wall in apptest_case(csv_path, args.apptest_timeout).items():
+                    key = f"{n_rows}/{name}"
+                    results[key] = {"wall_s": wall, "peak_bytes": None, "payload_bytes": None}
+                    print_row(key, results[key], baselines.get(key))
+
+            for path in data_loader.CACHE_DIR.glob(f"{csv_path.stem}.*"):
+                path.unlink()
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    (RESULTS_DIR / "latest.json").write_text(json.dumps(results, indent=2))
+
+    if args.update_baselines:
+        baselines.update(results)
+        BASELINES_PATH.write_text(json.dumps(baselines, indent=2, sort_keys=True))
+        print(f"\nBaselines updated: {BASELINES_PATH}")
+        return 0
+
+    regressions = compare(
+        results,
+        baselines,
+        args.tolerance,
+        args.slack_ms / 1000,
+        args.noisy_tolerance,
+        args.noisy_slack_ms / 1000,
+    )
+    if regressions:
+        print("\nREGRESSIONS:")
+        for key, base, now in regressions:
+            print(f"  {key}: {base * 1000:.1f} ms -> {now * 1000:.1f} ms")
+        return 1
+    print("\nNo regressions against baselines.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
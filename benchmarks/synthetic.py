@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------------
+# ---- DATASET SINTÉTICO CON EL ESQUEMA DE pixar_clean_streamlit.csv ----
+RATINGS = np.array(["G", "PG", "PG-13"], dtype=object)
+CINEMA_SCORES = np.array(["A+", "A", "A-", "B+", "B"], dtype=object)
+
+
+def make_dataset(n_rows, n_years=None, first_year=1995, seed=0):
+    rng = np.random.default_rng(seed)
+    n_years = n_years or min(max(n_rows // 2, 1), 100)
+
+    years = first_year + rng.integers(0, n_years, n_rows)
+    day_of_year = rng.integers(0, 365, n_rows)
+    release_date = pd.to_datetime(years.astype(str), format="%Y") + pd.to_timedelta(
+        day_of_year, unit="D"
+    )
+
+    budget = np.round(rng.uniform(20, 250, n_rows), 1)
+    box_office_us_canada = np.round(budget * rng.lognormal(0.3, 0.6, n_rows), 1)
+    box_office_other = np.round(budget * rng.lognormal(0.6, 0.6, n_rows), 1)
+    box_office_worldwide = box_office_us_canada + box_office_other
+
+    rotten_tomatoes = np.clip(np.round(rng.normal(88, 12, n_rows)), 0, 100)
+    metacritic = np.clip(np.round(rotten_tomatoes - rng.normal(10, 8, n_rows)), 0, 100)
+
+    return pd.DataFrame(
+        {
+            "number": np.arange(1, n_rows + 1),
+            "film": [f"Film {i:08d}" for i in range(1, n_rows + 1)],
+            "release_date": release_date.strftime("%Y-%m-%d"),
+            "run_time": np.round(rng.normal(100, 10, n_rows)),
+            "film_rating": RATINGS[rng.integers(0, len(RATINGS), n_rows)],
+            "rotten_tomatoes": rotten_tomatoes,
+            "metacritic": metacritic,
+            "cinema_score": CINEMA_SCORES[rng.integers(0, len(CINEMA_SCORES), n_rows)],
+            "critics_choice": np.clip(np.round(rng.normal(85, 10, n_rows)), 0, 100),
+            "budget": budget,
+            "box_office_us_canada": box_office_us_canada,
+            "box_office_other": box_office_other,
+            "box_office_worldwide": box_office_worldwide,
+            "year": years,
+            "profit_margin": box_office_worldwide - budget,
+        }
+    )
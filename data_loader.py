@@ -0,0 +1,239 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import streamlit as st
+
+# -----------------------------------------------------------------------------------
+# ---- RUTAS ----
+DATA_DIR = Path(__file__).resolve().parent / "Data"
+SOURCE_CSV = DATA_DIR / "pixar_clean_streamlit.csv"
+CACHE_DIR = DATA_DIR / ".cache"
+
+# Formato del fichero de caché; si cambia, las cachés antiguas se regeneran.
+# 2: Arrow IPC (Feather v2) sin comprimir, legible con mmap sin copiar
+# 3: + esquema compacto (SCHEMA)
+CACHE_FORMAT = 3
+
+
+# -----------------------------------------------------------------------------------
+# ---- ESQUEMA COMPACTO ----
+# Ratings como categorías (códigos int8 + pocas etiquetas), año en int16 y dinero y
+# puntuaciones en float32 (datos con 1 decimal: float32 los guarda de sobra).
+# `film` no entra: los títulos son únicos, así que una categoría solo añadiría códigos;
+# el str de pandas (Arrow) ya guarda todos los títulos en un único buffer.
+SCHEMA = {
+    "number": "int32",
+    "run_time": "float32",
+    "film_rating": "category",
+    "rotten_tomatoes": "float32",
+    "metacritic": "float32",
+    "cinema_score": "category",
+    "critics_choice": "float32",
+    "budget": "float32",
+    "box_office_us_canada": "float32",
+    "box_office_other": "float32",
+    "box_office_worldwide": "float32",
+    "year": "int16",
+    "profit_margin": "float32",
+}
+
+
+def apply_schema(df):
+    return df.astype({col: dtype for col, dtype in SCHEMA.items() if col in df.columns})
+
+
+# -----------------------------------------------------------------------------------
+# ---- FIRMA DEL FICHERO FUENTE ----
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(source):
+    source = Path(source)
+    return (
+        CACHE_DIR / f"{source.stem}.feather",
+        CACHE_DIR / f"{source.stem}.meta.json",
+    )
+
+
+def _read_meta(meta_path):
+    try:
+        return json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+# -----------------------------------------------------------------------------------
+# ---- FICHERO ARROW COMPARTIDO (MMAP, SOLO LECTURA) ----
+# Sin compresión y con los NaN de las columnas numéricas como valores (sin máscara de
+# nulos): al leerlo con mmap, pandas usa directamente las páginas del fichero. Todas las
+# sesiones y todos los procesos (workers) comparten así la misma copia en page cache.
+def write_arrow(df, path):
+    arrays = [
+        pa.array(df[col].to_numpy(), from_pandas=False)
+        if df[col].dtype.kind in "biuf"
+        else pa.array(df[col], from_pandas=True)
+        for col in df.columns
+    ]
+    table = pa.Table.from_arrays(arrays, names=list(df.columns))
+    with pa.OSFile(str(path), "wb") as sink:
+        with ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def read_arrow(path):
+    # Columnas numéricas: arrays NumPy de solo lectura sobre el mmap (cero copias);
+    # texto: StringDtype respaldado por los buffers Arrow del mismo mmap
+    table = ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+# -----------------------------------------------------------------------------------
+# ---- CACHÉ COLUMNAR (FEATHER / ARROW) ----
+def build_columnar_cache(source=SOURCE_CSV):
+    source = Path(source)
+    cache_path, meta_path = _cache_paths(source)
+
+    # Tamaño, contenido y hash de los mismos bytes: lo que se añada al CSV mientras se
+    # lee queda fuera (el modo streaming lo lee desde `size`). Una última línea sin \n
+    # es una escritura a medias: también se deja para después
+    with open(source, "rb") as fh:
+        stat = os.fstat(fh.fileno())
+        data = fh.read(stat.st_size)
+    data = data[: data.rfind(b"\n") + 1]
+    df = apply_schema(pd.read_csv(io.BytesIO(data)))
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Escritura atómica: nunca dejamos un feather a medias visible para otra sesión.
+    # Un proceso que ya tenga mapeado el fichero anterior sigue leyendo su inodo.
+    tmp_path = cache_path.with_suffix(f".feather.{os.getpid()}.tmp")
+    write_arrow(df, tmp_path)
+    tmp_path.replace(cache_path)
+
+    meta = {
+        "source": source.name,
+        "format": CACHE_FORMAT,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+    }
+    meta_path.write_text(json.dumps(meta, indent=2))
+    return df, meta
+
+
+def load_dataset(source=SOURCE_CSV):
+    source = Path(source)
+    cache_path, meta_path = _cache_paths(source)
+    stat = source.stat()
+    meta = _read_meta(meta_path)
+
+    if meta is not None and meta.get("format") != CACHE_FORMAT:
+        meta = None  # caché de una versión anterior (p. ej. feather comprimido)
+
+    if meta is not None and cache_path.exists():
+        # 1) mtime y tamaño iguales -> caché válida sin leer el CSV
+        if meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+            df = read_arrow(cache_path)
+            df.attrs.update(version=meta["sha256"][:16], source_size=meta["size"])
+            return df
+
+        # 2) mtime cambió (checkout, copia...) pero el contenido es el mismo
+        sha256 = file_hash(source)
+        if meta["sha256"] == sha256:
+            meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            meta_path.write_text(json.dumps(meta, indent=2))
+            df = read_arrow(cache_path)
+            df.attrs.update(version=sha256[:16], source_size=meta["size"])
+            return df
+
+    df, meta = build_columnar_cache(source)
+    # Se vuelve a leer el fichero con mmap: el frame del CSV se libera
+    df = read_arrow(cache_path)
+    # source_size: bytes del CSV que ya están en df (el modo streaming sigue desde ahí)
+    df.attrs.update(version=meta["sha256"][:16], source_size=meta["size"])
+    return df
+
+
+# -----------------------------------------------------------------------------------
+# ---- CACHÉ COMPARTIDA ENTRE SESIONES ----
+# La clave incluye mtime y tamaño: si el CSV cambia, se crea una entrada nueva.
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_shared(source, mtime_ns, size):
+    return load_dataset(source)
+
+
+def get_data(source=None):
+    # PIXAR_DATA_CSV permite apuntar el dashboard a otro CSV (p. ej. benchmarks)
+    source = source or os.environ.get("PIXAR_DATA_CSV") or SOURCE_CSV
+    stat = Path(source).stat()
+    return _load_shared(str(source), stat.st_mtime_ns, stat.st_size)
+
+
+def dataset_version(df):
+    return df.attrs.get("version", "unversioned")
+
+
+# -----------------------------------------------------------------------------------
+# ---- LINAJE DE VERSIONES (MODO STREAMING) ----
+# Un snapshot en streaming es su versión anterior + filas añadidas al final.
+# attrs["lineage"] guarda [(versión, nº de filas), ...] de los snapshots anteriores,
+# del más reciente al más antiguo: los índices derivados se amplían desde el último
+# que tengan construido en vez de recalcularse sobre todo el histórico.
+LINEAGE_DEPTH = 8
+
+
+def dataset_lineage(df):
+    return [tuple(entry) for entry in df.attrs.get("lineage", ())]
+
+
+def extend_lineage(df, parent):
+    df.attrs["lineage"] = [
+        (dataset_version(parent), len(parent)),
+        *dataset_lineage(parent),
+    ][:LINEAGE_DEPTH]
+    return df
+
+
+def is_subset(df):
+    # Subconjunto leído del backend particionado: no es un snapshot del dataset ni
+    # ancestro de ningún otro frame
+    return bool(df.attrs.get("subset", False))
+
+
+class RecentVersions:
+    # Últimos objetos derivados (índices, agregados) por versión del dataset
+    def __init__(self, keep=LINEAGE_DEPTH):
+        self.keep = keep
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, df, version, item):
+        # Los subconjuntos no se guardan: ningún frame se amplía desde ellos
+        if is_subset(df):
+            return
+        with self._lock:
+            self._items[version] = item
+            self._items.move_to_end(version)
+            while len(self._items) > self.keep:
+                self._items.popitem(last=False)
+
+    def closest_ancestor(self, df):
+        # (objeto, nº de filas que ya cubre) del ancestro más reciente disponible
+        with self._lock:
+            for version, n_rows in dataset_lineage(df):
+                item = self._items.get(version)
+                if item is not None:
+                    return item, n_rows
+        return None, 0
@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# -----------------------------------------------------------------------------------
+# ---- UMBRALES DEL MODO "DATOS GRANDES" ----
+# Por encima de WEBGL_THRESHOLD puntos se dibuja con WebGL (Scattergl);
+# por encima de DOWNSAMPLE_THRESHOLD el scatter se reduce en el servidor a celdas de
+# densidad.
+WEBGL_THRESHOLD = int(os.environ.get("PIXAR_WEBGL_THRESHOLD", "1000"))
+DOWNSAMPLE_THRESHOLD = int(os.environ.get("PIXAR_DOWNSAMPLE_THRESHOLD", "20000"))
+DENSITY_BINS = int(os.environ.get("PIXAR_DENSITY_BINS", "150"))
+
+
+def use_webgl(n_points):
+    return n_points > WEBGL_THRESHOLD
+
+
+def needs_downsampling(n_points):
+    return n_points > DOWNSAMPLE_THRESHOLD
+
+
+# -----------------------------------------------------------------------------------
+# ---- BINNING DE DENSIDAD (SCATTER 2D) ----
+# Agrupa los puntos en una rejilla bins x bins y devuelve un punto por celda ocupada:
+# centroide, número de películas y media de `value` (para mantener el color por año).
+def density_bins(x, y, value, bins=DENSITY_BINS):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    value = np.asarray(value, dtype=float)
+    valid = ~(np.isnan(x) | np.isnan(y) | np.isnan(value))
+    x, y, value = x[valid], y[valid], value[valid]
+    if len(x) == 0:
+        return pd.DataFrame(columns=["x", "y", "value", "count"])
+
+    def cell(v):
+        lo, hi = v.min(), v.max()
+        span = hi - lo or 1.0
+        return np.clip(((v - lo) / span * bins).astype(np.int64), 0, bins - 1)
+
+    flat = cell(x) * bins + cell(y)
+    occupied, inverse, counts = np.unique(flat, return_inverse=True, return_counts=True)
+    return pd.DataFrame(
+        {
+            "x": np.bincount(inverse, weights=x) / counts,
+            "y": np.bincount(inverse, weights=y) / counts,
+            "value": np.bincount(inverse, weights=value) / counts,
+            "count": counts,
+        }
+    )
+
+
+def marker_sizes(counts, min_size=6, max_size=22):
+    # Tamaño logarítmico según el número de películas de la celda
+    scaled = np.log1p(np.asarray(counts, dtype=float))
+    top = scaled.max() if len(scaled) else 0
+    if top == 0:
+        return np.full(len(scaled), min_size, dtype=float)
+    return min_size + (max_size - min_size) * scaled / top
@@ -0,0 +1,214 @@
+import argparse
+import hashlib
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATA_DIR, SOURCE_CSV, build_columnar_cache
+
+# -----------------------------------------------------------------------------------
+# ---- ENTRADAS / SALIDAS ----
+FILMS_CSV = DATA_DIR / "pixar_films.csv"
+RESPONSE_CSV = DATA_DIR / "public_response.csv"
+BOX_OFFICE_CSV = DATA_DIR / "box_office.csv"
+FIXES_CSV = DATA_DIR / "manual_fixes.csv"
+
+BUILD_DIR = DATA_DIR / ".build"
+PARTITIONS_DIR = BUILD_DIR / "partitions"
+MANIFEST_PATH = BUILD_DIR / "manifest.json"
+
+# Snapshots de prerender.py: si existen, se rehacen tras cada build
+ROOT = Path(__file__).resolve().parent
+PRERENDER_CURRENT = ROOT / "static" / "prerender" / "current.json"
+
+# Subir este número obliga a reconstruir todas las particiones (cambió la lógica)
+ETL_VERSION = 1
+
+OUTPUT_COLUMNS = [
+    "number",
+    "film",
+    "release_date",
+    "run_time",
+    "film_rating",
+    "rotten_tomatoes",
+    "metacritic",
+    "cinema_score",
+    "critics_choice",
+    "budget",
+    "box_office_us_canada",
+    "box_office_other",
+    "box_office_worldwide",
+    "year",
+    "profit_margin",
+]
+
+
+# -----------------------------------------------------------------------------------
+# ---- LECTURA DE FUENTES ----
+def read_sources():
+    films = pd.read_csv(FILMS_CSV)
+    response = pd.read_csv(RESPONSE_CSV)
+    box_office = pd.read_csv(BOX_OFFICE_CSV)
+    fixes = pd.read_csv(FIXES_CSV) if FIXES_CSV.exists() else None
+    return films, response, box_office, fixes
+
+
+def apply_film_fixes(films, fixes):
+    # Correcciones manuales de las columnas propias de pixar_films.csv (p. ej. títulos vacíos)
+    if fixes is None:
+        return films
+    cols = [c for c in fixes.columns if c in films.columns and c != "number"]
+    films = films.set_index("number")
+    films.update(fixes.set_index("number")[cols])
+    return films.reset_index()
+
+
+# -----------------------------------------------------------------------------------
+# ---- PARTICIONES POR AÑO ----
+def assign_partitions(films, response, box_office, fixes):
+    film_year = pd.to_datetime(films["release_date"]).dt.year
+    by_number = pd.Series(film_year.to_numpy(), index=films["number"])
+    by_film = pd.Series(film_year.to_numpy(), index=films["film"])
+    by_film = by_film[by_film.index.notna() & ~by_film.index.duplicated()]
+
+    parts = {
+        "films": film_year,
+        "response": response["film"].map(by_film),
+        "box_office": box_office["film"].map(by_film),
+    }
+    if fixes is not None:
+        parts["fixes"] = fixes["number"].map(by_number)
+    return parts
+
+
+def partition_digests(inputs, parts):
+    # Hash vectorizado por fila y después un digest por partición y por entrada
+    digests = {}
+    for name, frame in inputs.items():
+        if frame is None:
+            continue
+        row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+        groups = pd.Series(np.arange(len(frame))).groupby(parts[name].to_numpy()).indices
+        for year, positions in groups.items():
+            digest = digests.setdefault(int(year), hashlib.sha256(str(ETL_VERSION).encode()))
+            digest.update(name.encode())
+            digest.update(row_hashes[positions].tobytes())
+    return {year: digest.hexdigest() for year, digest in digests.items()}
+
+
+# -----------------------------------------------------------------------------------
+# ---- TRANSFORMACIÓN (JOIN + DERIVADAS) ----
+def transform(films, response, box_office, fixes):
+    merged = films.merge(response, on="film", how="left").merge(
+        box_office, on="film", how="left"
+    )
+
+    if fixes is not None:
+        cols = [c for c in fixes.columns if c in merged.columns and c != "number"]
+        merged = merged.set_index("number")
+        merged.update(fixes.set_index("number")[cols])
+        merged = merged.reset_index()
+
+    merged["year"] = pd.to_datetime(merged["release_date"]).dt.year
+    merged["profit_margin"] = merged["box_office_worldwide"] - merged["budget"]
+    return merged[OUTPUT_COLUMNS]
+
+
+def _partition_path(year):
+    return PARTITIONS_DIR / f"year={year}.feather"
+
+
+def _read_manifest():
+    try:
+        return json.loads(MANIFEST_PATH.read_text())
+    except (OSError, ValueError):
+        return {"partitions": {}}
+
+
+# -----------------------------------------------------------------------------------
+# ---- BUILD INCREMENTAL ----
+def build(force=False, output=SOURCE_CSV, verbose=True):
+    films, response, box_office, fixes = read_sources()
+    films = apply_film_fixes(films, fixes)
+
+    inputs = {"films": films, "response": response, "box_office": box_office, "fixes": fixes}
+    parts = assign_partitions(films, response, box_office, fixes)
+    digests = partition_digests(inputs, parts)
+
+    manifest = _read_manifest()
+    previous = {} if force else manifest.get("partitions", {})
+
+    changed = sorted(
+        year
+        for year, digest in digests.items()
+        if previous.get(str(year)) != digest or not _partition_path(year).exists()
+    )
+    removed = sorted(int(y) for y in previous if int(y) not in digests)
+
+    PARTITIONS_DIR.mkdir(parents=True, exist_ok=True)
+    if changed:
+        selected = set(changed)
+        subset = {
+            name: frame[parts[name].isin(selected).to_numpy()]
+            for name, frame in inputs.items()
+            if frame is not None
+        }
+        rebuilt = transform(
+            subset["films"], subset["response"], subset["box_office"], subset.get("fixes")
+        )
+        for year, partition in rebuilt.groupby("year"):
+            partition.reset_index(drop=True).to_feather(_partition_path(int(year)))
+
+    for year in removed:
+        _partition_path(year).unlink(missing_ok=True)
+
+    # Ensamblado final a partir de todas las particiones (las intactas se leen en binario)
+    result = pd.concat(
+        [pd.read_feather(_partition_path(year)) for year in sorted(digests)],
+        ignore_index=True,
+    )
+    result = result.sort_values("film", kind="stable").reset_index(drop=True)
+
+    tmp_output = Path(output).with_suffix(".csv.tmp")
+    result.to_csv(tmp_output, index=False)
+    tmp_output.replace(output)
+    # Deja lista la caché Feather que lee el dashboard
+    build_columnar_cache(output)
+
+    manifest = {
+        "etl_version": ETL_VERSION,
+        "partitions": {str(year): digest for year, digest in sorted(digests.items())},
+    }
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2))
+
+    if verbose:
+        print(
+            f"{len(digests)} partitions | rebuilt: {changed or 'none'} | "
+            f"removed: {removed or 'none'} | rows: {len(result)} -> {output}"
+        )
+    return result
+
+
+def clean():
+    shutil.rmtree(BUILD_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build Data/pixar_clean_streamlit.csv from the raw Pixar datasets."
+    )
+    parser.add_argument("--force", action="store_true", help="rebuild every partition")
+    parser.add_argument("--clean", action="store_true", help="remove build artifacts first")
+    args = parser.parse_args()
+
+    if args.clean:
+        clean()
+    build(force=args.force)
+    if PRERENDER_CURRENT.exists():
+        # En otro proceso: prerender.py importa la app (Streamlit, Plotly)
+        subprocess.run([sys.executable, str(ROOT / "prerender.py")], check=False)
@@ -0,0 +1,93 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+# -----------------------------------------------------------------------------------
+# ---- CONFIGURACIÓN ----
+FIGURE_CACHE_SIZE = int(os.environ.get("PIXAR_FIGURE_CACHE_SIZE", "64"))
+# Segundos de vida de cada figura; 0 = sin caducidad (la versión del dataset ya invalida)
+FIGURE_CACHE_TTL = float(os.environ.get("PIXAR_FIGURE_CACHE_TTL", "0"))
+
+
+# -----------------------------------------------------------------------------------
+# ---- CACHÉ LRU DE FIGURAS ----
+# Clave: (id del gráfico, tupla de filtros normalizada, versión del dataset).
+# Las figuras cacheadas se comparten entre sesiones: no se deben modificar tras crearlas.
+class FigureCache:
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE, ttl=FIGURE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, created):
+        return self.ttl is not None and time.monotonic() - created > self.ttl
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._expired(entry[1]):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, figure):
+        with self._lock:
+            self._entries[key] = (figure, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_build(self, chart_id, filter_key, version, builder):
+        key = (chart_id, filter_key, version)
+        figure = self.get(key)
+        if figure is None:
+            # Construimos fuera del lock: dos sesiones pueden construir la misma
+            # figura a la vez, pero ninguna bloquea a las demás
+            figure = builder()
+            self.put(key, figure)
+        return figure
+
+    def entries(self):
+        # [(clave, figura)] de las figuras vigentes (las vuelca prerender.py)
+        with self._lock:
+            return [
+                (key, entry[0])
+                for key, entry in self._entries.items()
+                if not self._expired(entry[1])
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+# -----------------------------------------------------------------------------------
+# ---- INSTANCIA COMPARTIDA ENTRE SESIONES ----
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    return FigureCache()
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import streamlit as st
+
+# -----------------------------------------------------------------------------------
+# ---- CONFIGURACIÓN ----
+# Hilos del pool de figuras (compartido por todas las sesiones). 0 o 1 = modo serie:
+# cada figura se construye en el hilo del script cuando se pinta, como antes.
+# Por defecto en serie: la ganancia del pool (Plotly en Python puro, con el GIL) aún no
+# se ha medido en una máquina con varios núcleos. Activarlo con PIXAR_FIGURE_WORKERS=N
+# tras medir con benchmarks/bench_figure_pool.py
+FIGURE_WORKERS = int(os.environ.get("PIXAR_FIGURE_WORKERS", "1"))
+# Segundos que el script espera a cada figura; 0 = sin límite
+FIGURE_TIMEOUT = float(os.environ.get("PIXAR_FIGURE_TIMEOUT", "20"))
+
+
+class FigureTimeout(Exception):
+    pass
+
+
+# -----------------------------------------------------------------------------------
+# ---- TAREAS ----
+# Las figuras de un rerun no dependen unas de otras: se lanzan todas al principio y el
+# script las pinta en su hueco de st.columns según terminan. Los trabajos no llaman a
+# st.*: las cachés (figuras, snapshots) se resuelven antes en el hilo del script.
+# Hilos y no procesos: la caché de figuras y el frame (mmap) se comparten sin copiar,
+# y una figura de Plotly que vuelve de otro proceso se valida entera al deserializarla.
+class FigureTask:
+    def __init__(self, scheduler, chart_id, job, timeout):
+        self.scheduler = scheduler
+        self.chart_id = chart_id
+        self.job = job
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.future = None
+        self._done = False
+        self._value = None
+
+    def remaining(self):
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def _run_serial(self):
+        if not self._done:
+            self._value = self.job()
+            self._done = True
+        return self._value
+
+    def result(self):
+        if self.future is None:
+            return self._run_serial()
+        try:
+            return self.future.result(timeout=self.remaining())
+        except FutureTimeout:
+            # Aún en cola (pool ocupado por otras sesiones): se construye aquí. Si ya
+            # se está construyendo, se deja terminar: entra en la caché de figuras y
+            # el siguiente rerun la encuentra
+            if self.future.cancel():
+                self.scheduler._count("serial_fallbacks")
+                return self._run_serial()
+            self.scheduler._count("timeouts")
+            raise FigureTimeout(self.chart_id) from None
+
+
+class FigureScheduler:
+    def __init__(self, workers=FIGURE_WORKERS, timeout=FIGURE_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout or None
+        self._executor = (
+            ThreadPoolExecutor(workers, thread_name_prefix="pixar-figures")
+            if workers > 1
+            else None
+        )
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "serial": 0, "serial_fallbacks": 0, "timeouts": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    @property
+    def serial(self):
+        return self._executor is None
+
+    def submit(self, chart_id, job, wait=False):
+        # wait=True: sin plazo, se espera lo que haga falta (prerender, benchmarks)
+        task = FigureTask(self, chart_id, job, None if wait else self.timeout)
+        if self._executor is None:
+            self._count("serial")
+            return task
+        try:
+            task.future = self._executor.submit(job)
+        except RuntimeError:
+            # Pool cerrado (apagado del servidor): modo serie
+            self._count("serial")
+            return task
+        self._count("submitted")
+        return task
+
+    def completed(self, tasks):
+        # Las tareas según terminan (en serie, en el orden dado). Al agotarse el plazo
+        # se devuelven las que falten: su result() decide (serie o FigureTimeout)
+        pending = {task.future: task for task in tasks if task.future is not None}
+        for task in tasks:
+            if task.future is None:
+                yield task
+        deadlines = [task.remaining() for task in pending.values()]
+        timeout = None if None in deadlines or not deadlines else max(deadlines)
+        try:
+            for future in as_completed(pending, timeout=timeout):
+                yield pending.pop(future)
+        except FutureTimeout:
+            yield from list(pending.values())
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "timeout": self.timeout, **self._counters}
+
+
+# -----------------------------------------------------------------------------------
+# ---- INSTANCIA COMPARTIDA ENTRE SESIONES ----
+@st.cache_resource(show_spinner=False)
+def get_figure_scheduler():
+    return FigureScheduler()
@@ -0,0 +1,183 @@
+import functools
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import RecentVersions
+
+# -----------------------------------------------------------------------------------
+# ---- ÍNDICE DE PELÍCULAS + TARJETAS PRE-RENDERIZADAS ----
+CARD_CACHE_SIZE = 4096
+SEARCH_CACHE_SIZE = 256
+
+# Columnas con percentil en la tarjeta (más alto = mejor)
+RANKED_COLUMNS = [
+    "budget",
+    "box_office_worldwide",
+    "profit_margin",
+    "rotten_tomatoes",
+    "metacritic",
+]
+# Columnas de la tarjeta (backend particionado: lo que se lee de la fila de una película)
+CARD_COLUMNS = ["film", "year", "film_rating", "run_time", *RANKED_COLUMNS]
+
+
+def percentile_ranks(sorted_values, values):
+    # Percentil (0-100) de cada valor dentro de sorted_values: búsqueda binaria, igual
+    # que rank(pct=True, method="max"). -1 = sin valor
+    ranks = np.full(len(values), -1, dtype=np.int16)
+    valid = ~np.isnan(values)
+    if len(sorted_values):
+        rank = np.searchsorted(sorted_values, values[valid], side="right")
+        ranks[valid] = np.round(rank / len(sorted_values) * 100)
+    return ranks
+
+
+class FilmIndex:
+    def __init__(self, df):
+        films = df["film"].to_numpy(dtype=object)
+        codes, uniques = pd.factorize(films)
+        # Misma fila que df[df["film"] == film].iloc[0]: la primera aparición
+        valid = codes >= 0
+        _, first_idx = np.unique(codes[valid], return_index=True)
+        first_rows = np.flatnonzero(valid)[first_idx]
+
+        self.films = uniques
+        self.position = {film: i for i, film in enumerate(uniques)}
+        self.film_rows = first_rows
+        self.df = df
+
+        # Valores ordenados de cada columna del catálogo: el percentil de un valor es
+        # una búsqueda binaria (= rank(pct=True, method="max")) y admite altas en streaming
+        self.sorted_values = {
+            col: np.sort(df[col].dropna().to_numpy(dtype=float)) for col in RANKED_COLUMNS
+        }
+        self._rank_films()
+
+        self._init_caches()
+
+    def _rank_films(self):
+        # Percentil de cada película (por posición en self.films), una vez por índice:
+        # la consulta es un acceso al array. -1 = sin valor
+        self.ranks = {
+            col: percentile_ranks(
+                self.sorted_values[col], self.df[col].to_numpy(dtype=float)[self.film_rows]
+            )
+            for col in RANKED_COLUMNS
+        }
+
+    def _init_caches(self):
+        self.card_html = functools.lru_cache(maxsize=CARD_CACHE_SIZE)(self._render_card)
+        self.search = functools.lru_cache(maxsize=SEARCH_CACHE_SIZE)(self._search)
+
+    def extended(self, df, n_old):
+        # Índice para df = catálogo anterior (n_old filas) + filas añadidas al final
+        rows = df.iloc[n_old:]
+        index = FilmIndex.__new__(FilmIndex)
+        index.df = df
+        index.position = dict(self.position)
+        new_films, new_rows = [], []
+        for position, film in enumerate(rows["film"].to_numpy(dtype=object), start=n_old):
+            if not pd.isna(film) and film not in index.position:
+                index.position[film] = len(self.films) + len(new_films)
+                new_films.append(film)
+                new_rows.append(position)
+        index.films = np.concatenate([self.films, np.array(new_films, dtype=object)])
+        index.film_rows = np.concatenate([self.film_rows, np.array(new_rows, dtype=np.int64)])
+        index.sorted_values = {
+            col: np.sort(
+                np.concatenate(
+                    [self.sorted_values[col], rows[col].dropna().to_numpy(dtype=float)]
+                ),
+                kind="stable",  # timsort: casi lineal sobre dos tramos ya ordenados
+            )
+            for col in RANKED_COLUMNS
+        }
+        # Las filas nuevas mueven el percentil de todo el catálogo
+        index._rank_films()
+        index._init_caches()
+        return index
+
+    def lineage_entry(self):
+        # Lo que usa extended(), sin el frame ni las cachés (que apuntan al índice)
+        entry = FilmIndex.__new__(FilmIndex)
+        entry.films = self.films
+        entry.position = self.position
+        entry.film_rows = self.film_rows
+        entry.sorted_values = self.sorted_values
+        entry.df = None
+        return entry
+
+    def _search(self, query, limit):
+        # Títulos que contienen `query` (sin distinguir mayúsculas), como mucho `limit`
+        films = pd.Series(self.films, dtype=object)
+        if query:
+            films = films[films.str.contains(query, case=False, regex=False, na=False)]
+        return tuple(films.iloc[:limit])
+
+    def row(self, film):
+        return self.df.iloc[self.film_rows[self.position[film]]]
+
+    def percentile(self, film, col):
+        rank = self.ranks[col][self.position[film]]
+        return None if rank < 0 else int(rank)
+
+    def _render_card(self, film):
+        film_data = self.row(film)
+
+        def pct(col):
+            value = self.percentile(film, col)
+            if value is None:
+                return ""
+            return f" <span style='color: #666666; font-size: 13px;'>· P{value}</span>"
+
+        return f"""
+        <div style="background-color: lightgrey; padding: 15px; border-radius: 12px; color: #333333; text-align: center; font-family: 'Source Sans Pro', sans-serif;">
+
+            <h3 style="color: #1f77b4; margin-bottom: 10px;">{film_data['film'].upper()} ({int(film_data['year'])})</h3>
+
+            <hr style="border: none; height: 1px; background-color: tomato; margin: 10px 0;">
+
+            <h4>📊 CRITICS</h4>
+            <p><strong>🍅 Rotten Tomatoes:</strong> {film_data['rotten_tomatoes']}{pct('rotten_tomatoes')}</p>
+            <p><strong>🎯 Metacritic:</strong> {film_data['metacritic']}{pct('metacritic')}</p>
+
+            <hr style="border: none; height: 1px; background-color: #999; margin: 10px 0;">
+
+            <h4>🎬 AGE RATING</h4>
+            <p><strong>{film_data['film_rating']}</strong></p>
+
+            <hr style="border: none; height: 1px; background-color: #999; margin: 10px 0;">
+
+            <h4>⏱️ RUN TIME</h4>
+            <p><strong>{film_data['run_time']} mins</strong></p>
+
+            <hr style="border: none; height: 1px; background-color: #999; margin: 10px 0;">
+
+            <h4>💵 ECONOMICS</h4>
+            <p><strong>💰 Budget:</strong> $ {film_data['budget']:.1f} M.{pct('budget')}</p>
+            <p><strong>🌎 Box Office:</strong> $ {film_data['box_office_worldwide']:.1f} M.{pct('box_office_worldwide')}</p>
+            <p><strong>📈 Profit Margin:</strong> $ {film_data['profit_margin']:.1f} M.{pct('profit_margin')}</p>
+
+            <p style="color: #666666; font-size: 12px; margin-top: 12px;">P = percentile within the catalog</p>
+
+        </div>
+        """
+
+
+# -----------------------------------------------------------------------------------
+# ---- UN ÍNDICE POR VERSIÓN DEL DATASET ----
+# Cada entrada es O(filas): basta con la versión anterior para ampliar la siguiente
+_recent_indexes = RecentVersions(keep=2)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_film_index(_df, version):
+    base, n_rows = _recent_indexes.closest_ancestor(_df)
+    if base is not None:
+        index = base.extended(_df, n_rows)
+    else:
+        index = FilmIndex(_df)
+    _recent_indexes.put(_df, version, index.lineage_entry())
+    return index
@@ -0,0 +1,226 @@
+import functools
+import hashlib
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_loader import RecentVersions, dataset_version
+
+# -----------------------------------------------------------------------------------
+# ---- ÍNDICE DE FILTROS (AÑO + RATING) ----
+# El índice no copia el dataset: guarda `order`, las filas ordenadas por año (argsort
+# estable), y los años en ese orden. El rango de años es una búsqueda binaria y un slice
+# de `order`; cada rating guarda sus posiciones (dentro de `order`) ordenadas, así que el
+# filtro por rating solo toca las k filas del rango. Un filtro es siempre un array de
+# índices sobre el frame compartido (mmap); las filas solo se copian al construir una
+# figura, y solo las columnas que esa figura usa.
+# Las selecciones en los gráficos (cross-filter) también son arrays de filas: se cruzan
+# con las posiciones del filtro, nunca se vuelve a filtrar un DataFrame.
+
+
+class Selection:
+    # Filas del dataset seleccionadas en un gráfico (ids únicos y ordenados). La clave
+    # es un hash de las filas: entra en la clave de caché de las figuras que restringe
+    def __init__(self, chart_id, rows):
+        self.chart_id = chart_id
+        self.rows = np.unique(np.asarray(rows, dtype=np.int64))
+        self.key = (chart_id, hashlib.sha1(self.rows.tobytes()).hexdigest()[:12])
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class FilterResult:
+    def __init__(
+        self, index, selected_year, selected_ratings, lo, hi, positions, selections=()
+    ):
+        self.index = index
+        self.selected_year = tuple(int(y) for y in selected_year)
+        self.selected_ratings = tuple(sorted(selected_ratings))
+        self.lo = lo
+        self.hi = hi
+        # None -> todas las filas del rango de años cumplen el filtro de rating
+        self.positions = positions
+        # Claves de las selecciones aplicadas (restrict); () -> solo la barra lateral
+        self.selections = selections
+
+    @property
+    def version(self):
+        return self.index.version
+
+    @property
+    def key(self):
+        return (self.selected_year, self.selected_ratings, *self.selections)
+
+    @property
+    def year_rows(self):
+        # Filas del dataset en el rango de años, ordenadas por año (vista de `order`)
+        return self.index.order[self.lo : self.hi]
+
+    @property
+    def rows(self):
+        # Rango de años + ratings, ordenadas por año
+        if self.positions is None:
+            return self.year_rows
+        return self.index.order[self.positions]
+
+    def select(self, columns=None, by_rating=True):
+        df = self.index.df if columns is None else self.index.df[list(columns)]
+        rows = self.rows if by_rating else self.year_rows
+        return df.take(rows).reset_index(drop=True)
+
+    @property
+    def year_frame(self):
+        return self.select(by_rating=False)
+
+    @property
+    def frame(self):
+        return self.select()
+
+    def restrict(self, selection):
+        # Filas seleccionadas -> máscara sobre las posiciones de `order` (rank) y cruce
+        # con las del filtro, sin ordenar: el resultado sigue ordenado por año
+        rows = selection.rows[selection.rows < len(self.index.order)]
+        selected = np.zeros(len(self.index.order), dtype=bool)
+        selected[self.index.rank[rows]] = True
+        if self.positions is None:
+            positions = self.lo + np.flatnonzero(selected[self.lo : self.hi])
+        else:
+            positions = self.positions[selected[self.positions]]
+        return FilterResult(
+            self.index,
+            self.selected_year,
+            self.selected_ratings,
+            self.lo,
+            self.hi,
+            positions,
+            self.selections + (selection.key,),
+        )
+
+    def cross_filtered(self, selections, exclude=None):
+        # Todas las selecciones salvo la del propio gráfico (`exclude`): un gráfico no
+        # se filtra por su selección, así se puede ampliar o cambiar
+        result = self
+        for chart_id in sorted(selections):
+            if chart_id != exclude:
+                result = result.restrict(selections[chart_id])
+        return result
+
+    def __len__(self):
+        return self.hi - self.lo if self.positions is None else len(self.positions)
+
+
+class FilterIndex:
+    def __init__(self, df):
+        self.version = dataset_version(df)
+        self.df = df
+        years = df["year"].to_numpy()
+        self.order = np.argsort(years, kind="stable")
+        self.years = years[self.order]
+
+        codes, uniques = pd.factorize(df["film_rating"])
+        codes = codes[self.order]
+        self.ratings = list(uniques)
+        self.rating_positions = {
+            rating: np.flatnonzero(codes == code) for code, rating in enumerate(uniques)
+        }
+        # Filas sin rating: nunca pasan el isin() de la barra lateral
+        self.has_missing = bool((codes == -1).any())
+
+    @functools.cached_property
+    def rank(self):
+        # Posición de cada fila del dataset dentro de `order` (permutación inversa)
+        rank = np.empty(len(self.order), dtype=np.int64)
+        rank[self.order] = np.arange(len(self.order))
+        return rank
+
+    def extended(self, df, n_old, version):
+        # Índice para df = dataset anterior (n_old filas) + filas añadidas al final.
+        # Cada fila nueva se inserta tras las de su mismo año (igual que el argsort estable)
+        new = df.iloc[n_old:]
+        new_years = new["year"].to_numpy()
+        new_order = np.argsort(new_years, kind="stable")
+        n_new = len(new_order)
+
+        inserts = np.searchsorted(self.years, new_years[new_order], side="right")
+        new_pos = inserts + np.arange(n_new)
+        is_new = np.zeros(n_old + n_new, dtype=bool)
+        is_new[new_pos] = True
+        old_pos = np.flatnonzero(~is_new)
+
+        index = FilterIndex.__new__(FilterIndex)
+        index.version = version
+        index.df = df
+        index.order = np.empty(n_old + n_new, dtype=np.int64)
+        index.order[old_pos] = self.order
+        index.order[new_pos] = n_old + new_order
+        index.years = np.empty(n_old + n_new, dtype=self.years.dtype)
+        index.years[old_pos] = self.years
+        index.years[new_pos] = new_years[new_order]
+
+        codes, uniques = pd.factorize(new["film_rating"])
+        codes = codes[new_order]
+        new_codes = {rating: code for code, rating in enumerate(uniques)}
+        index.ratings = self.ratings + [r for r in new_codes if r not in self.ratings]
+        index.rating_positions = {}
+        for rating in index.ratings:
+            old = self.rating_positions.get(rating, np.empty(0, dtype=np.int64))
+            chunks = [old_pos[old]]
+            if rating in new_codes:
+                chunks.append(new_pos[codes == new_codes[rating]])
+            index.rating_positions[rating] = np.sort(np.concatenate(chunks))
+        index.has_missing = self.has_missing or bool((codes == -1).any())
+        return index
+
+    def lineage_entry(self):
+        # Lo que usa extended(), sin el frame: RecentVersions no retiene catálogos enteros
+        entry = FilterIndex.__new__(FilterIndex)
+        entry.__dict__.update(self.__dict__)
+        entry.__dict__.pop("rank", None)
+        entry.df = None
+        return entry
+
+    def year_bounds(self, selected_year):
+        lo = int(np.searchsorted(self.years, selected_year[0], side="left"))
+        hi = int(np.searchsorted(self.years, selected_year[1], side="right"))
+        return lo, max(lo, hi)
+
+    def compile(self, selected_year, selected_ratings):
+        lo, hi = self.year_bounds(selected_year)
+        selected = [r for r in self.ratings if r in set(selected_ratings)]
+
+        if len(selected) == len(self.ratings) and not self.has_missing:
+            return FilterResult(self, selected_year, selected_ratings, lo, hi, None)
+
+        # Por cada rating, su tramo dentro del rango [lo, hi) y unión de tramos ordenada
+        chunks = []
+        for rating in selected:
+            positions = self.rating_positions[rating]
+            a = np.searchsorted(positions, lo, side="left")
+            b = np.searchsorted(positions, hi, side="left")
+            chunks.append(positions[a:b])
+
+        if chunks:
+            positions = np.sort(np.concatenate(chunks), kind="stable")
+        else:
+            positions = np.empty(0, dtype=np.int64)
+        return FilterResult(self, selected_year, selected_ratings, lo, hi, positions)
+
+
+# -----------------------------------------------------------------------------------
+# ---- UN ÍNDICE POR VERSIÓN DEL DATASET ----
+# Cada entrada es O(filas): basta con la versión anterior para ampliar la siguiente
+_recent_indexes = RecentVersions(keep=2)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_filter_index(_df, version):
+    # En streaming se amplía el índice de la versión anterior con las filas nuevas
+    base, n_rows = _recent_indexes.closest_ancestor(_df)
+    if base is not None:
+        index = base.extended(_df, n_rows, version)
+    else:
+        index = FilterIndex(_df)
+    _recent_indexes.put(_df, version, index.lineage_entry())
+    return index
@@ -0,0 +1,320 @@
+import collections
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+
+# Solo librería estándar (se importa desde profiling.py, antes que el resto)
+
+# -----------------------------------------------------------------------------------
+# ---- CONFIGURACIÓN (todo opt-in por variables de entorno) ----
+# PIXAR_METRICS=1              mide cada render_* y la carga de datos
+# PIXAR_METRICS_TRACEMALLOC=1  además bytes asignados (tracemalloc ralentiza ~2x)
+# PIXAR_METRICS_PROM=ruta      fichero de texto Prometheus (textfile collector)
+# PIXAR_METRICS_JSONL=ruta     log JSONL rotativo con cada muestra
+# PIXAR_DEBUG_PANEL=1          panel de depuración en la sidebar (también con ?debug=1)
+def _flag(name):
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
+
+
+METRICS_ENABLED = _flag("PIXAR_METRICS")
+TRACEMALLOC_ENABLED = METRICS_ENABLED and _flag("PIXAR_METRICS_TRACEMALLOC")
+DEBUG_PANEL_ENABLED = _flag("PIXAR_DEBUG_PANEL")
+PROM_PATH = os.environ.get("PIXAR_METRICS_PROM")
+JSONL_PATH = os.environ.get("PIXAR_METRICS_JSONL")
+JSONL_MAX_BYTES = int(os.environ.get("PIXAR_METRICS_JSONL_MAX_BYTES", str(10 * 2**20)))
+JSONL_BACKUPS = int(os.environ.get("PIXAR_METRICS_JSONL_BACKUPS", "5"))
+EXPORT_INTERVAL = float(os.environ.get("PIXAR_METRICS_EXPORT_INTERVAL", "10"))
+
+PENDING_MAX = 100_000  # muestras sin agregar; si nadie drena, se descartan las viejas
+RESERVOIR_SIZE = 512  # últimas muestras por sección para p50 / p95
+WALL_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger("pixar.metrics")
+
+if TRACEMALLOC_ENABLED:
+    import tracemalloc
+
+    tracemalloc.start()
+
+
+# -----------------------------------------------------------------------------------
+# ---- MUESTRAS ----
+Sample = collections.namedtuple(
+    "Sample", "timestamp run_id section wall_s cpu_s alloc_bytes payload_bytes"
+)
+
+# Camino caliente sin locks: cada sesión solo hace deque.append (atómico en CPython).
+# El agregado lo hace quien lee o exporta, vaciando la cola con popleft.
+_pending = collections.deque(maxlen=PENDING_MAX)
+
+# Muestras del run en curso de cada hilo (cada sesión ejecuta el script en su hilo)
+_local = threading.local()
+
+
+def _run_samples():
+    if not hasattr(_local, "samples"):
+        _local.samples = []
+        _local.run_id = None
+    return _local
+
+
+def start_run(run_id):
+    state = _run_samples()
+    state.samples = []
+    state.run_id = run_id
+
+
+def run_samples():
+    return list(_run_samples().samples)
+
+
+def record(section, wall_s, cpu_s, alloc_bytes=None, payload_bytes=None):
+    state = _run_samples()
+    sample = Sample(
+        time.time(), state.run_id, section, wall_s, cpu_s, alloc_bytes, payload_bytes
+    )
+    state.samples.append(sample)
+    _pending.append(sample)
+
+
+# -----------------------------------------------------------------------------------
+# ---- MEDICIÓN DE UNA SECCIÓN ----
+class Timer:
+    __slots__ = ("section", "wall0", "cpu0", "mem0")
+
+    def __init__(self, section):
+        self.section = section
+
+    def __enter__(self):
+        self.mem0 = tracemalloc.get_traced_memory()[0] if TRACEMALLOC_ENABLED else None
+        self.cpu0 = time.thread_time()
+        self.wall0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall0
+        cpu = time.thread_time() - self.cpu0
+        # tracemalloc es global al proceso: con sesiones concurrentes es aproximado
+        alloc = (
+            max(tracemalloc.get_traced_memory()[0] - self.mem0, 0)
+            if TRACEMALLOC_ENABLED
+            else None
+        )
+        record(self.section, wall, cpu, alloc_bytes=alloc)
+        return False
+
+
+# Tamaño del spec que st.plotly_chart manda al navegador. Las figuras salen de la caché
+# de figuras, así que se serializa una vez por objeto figura.
+_payload_sizes = {}  # id(figura) -> (weakref, bytes); las Figure no son hashables
+
+
+def plotly_payload_bytes(fig):
+    entry = _payload_sizes.get(id(fig))
+    if entry is not None and entry[0]() is fig:
+        return entry[1]
+    import plotly.io
+
+    size = len(plotly.io.to_json(fig, validate=False))
+    key = id(fig)
+    try:
+        ref = weakref.ref(fig, lambda _, key=key: _payload_sizes.pop(key, None))
+    except TypeError:  # p. ej. un dict: no admite weakref
+        return size
+    _payload_sizes[key] = (ref, size)
+    return size
+
+
+def record_payload(chart_id, fig):
+    # Una "sección" <gráfico>:payload por gráfico (filtered_graph, budget_scatter...)
+    if METRICS_ENABLED:
+        record(f"{chart_id}:payload", 0.0, 0.0, payload_bytes=plotly_payload_bytes(fig))
+
+
+# -----------------------------------------------------------------------------------
+# ---- AGREGADO COMPARTIDO ----
+class SectionStats:
+    __slots__ = (
+        "calls", "wall", "cpu", "alloc", "payload", "max_wall", "buckets", "recent"
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.alloc = 0
+        self.payload = 0
+        self.max_wall = 0.0
+        self.buckets = [0] * len(WALL_BUCKETS)
+        self.recent = collections.deque(maxlen=RESERVOIR_SIZE)
+
+    def add(self, sample):
+        self.calls += 1
+        self.wall += sample.wall_s
+        self.cpu += sample.cpu_s
+        self.alloc += sample.alloc_bytes or 0
+        self.payload += sample.payload_bytes or 0
+        self.max_wall = max(self.max_wall, sample.wall_s)
+        for i, bound in enumerate(WALL_BUCKETS):
+            if sample.wall_s <= bound:
+                self.buckets[i] += 1
+        self.recent.append(sample.wall_s)
+
+    def copy(self):
+        other = SectionStats()
+        for name in self.__slots__:
+            setattr(other, name, getattr(self, name))
+        other.buckets = list(self.buckets)
+        other.recent = collections.deque(self.recent, maxlen=RESERVOIR_SIZE)
+        return other
+
+    def quantile(self, q):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class Collector:
+    def __init__(self):
+        self.sections = {}
+        # Solo lo usan los lectores/exportadores, nunca el camino de render
+        self._drain_lock = threading.Lock()
+        self._last_export = 0.0
+        self._jsonl = None
+
+    def drain(self, block=False):
+        # Si otro hilo ya está agregando, no esperamos: sus datos saldrán en su vuelta
+        if not self._drain_lock.acquire(blocking=block):
+            return False
+        try:
+            drained = []
+            while True:
+                try:
+                    drained.append(_pending.popleft())
+                except IndexError:
+                    break
+            for sample in drained:
+                stats = self.sections.get(sample.section)
+                if stats is None:
+                    stats = self.sections[sample.section] = SectionStats()
+                stats.add(sample)
+            try:
+                if drained and JSONL_PATH:
+                    self._write_jsonl(drained)
+                now = time.monotonic()
+                if PROM_PATH and now - self._last_export >= EXPORT_INTERVAL:
+                    self._last_export = now
+                    self._write_prometheus()
+            except OSError:
+                # Un disco lleno o una ruta mala no deben tumbar el dashboard
+                logger.exception("Could not export dashboard metrics")
+            return True
+        finally:
+            self._drain_lock.release()
+
+    def snapshot(self):
+        self.drain(block=True)
+        # Copia bajo el candado: drain() de otra sesión puede estar cambiando las
+        # secciones; los percentiles se calculan sobre la copia, ya sin candado
+        with self._drain_lock:
+            sections = {name: stats.copy() for name, stats in self.sections.items()}
+        return {
+            name: {
+                "calls": s.calls,
+                "mean_ms": s.wall / s.calls * 1000,
+                "p50_ms": s.quantile(0.5) * 1000,
+                "p95_ms": s.quantile(0.95) * 1000,
+                "max_ms": s.max_wall * 1000,
+                "cpu_ms": s.cpu / s.calls * 1000,
+                "alloc_kb": s.alloc / s.calls / 1024,
+                "payload_kb": s.payload / s.calls / 1024,
+            }
+            for name, s in sorted(sections.items())
+        }
+
+    # ---- EXPORTADORES ----
+    def _write_jsonl(self, samples):
+        if self._jsonl is None:
+            Path(JSONL_PATH).parent.mkdir(parents=True, exist_ok=True)
+            self._jsonl = logging.handlers.RotatingFileHandler(
+                JSONL_PATH, maxBytes=JSONL_MAX_BYTES, backupCount=JSONL_BACKUPS
+            )
+            self._jsonl.setFormatter(logging.Formatter("%(message)s"))
+        for sample in samples:
+            record = logging.makeLogRecord({"msg": json.dumps(sample._asdict())})
+            self._jsonl.emit(record)
+
+    def _write_prometheus(self):
+        path = Path(PROM_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_text(self.prometheus_text())
+        tmp_path.replace(path)  # atómico: el scraper nunca lee un fichero a medias
+
+    def prometheus_text(self):
+        timed = sorted(
+            (name, s) for name, s in self.sections.items() if not name.endswith(":payload")
+        )
+        payloads = sorted(
+            (name.rsplit(":", 1)[0], s)
+            for name, s in self.sections.items()
+            if name.endswith(":payload")
+        )
+
+        lines = [
+            "# HELP pixar_section_seconds Wall time per dashboard section.",
+            "# TYPE pixar_section_seconds histogram",
+        ]
+        for name, s in timed:
+            label = f'section="{name}"'
+            for bound, count in zip(WALL_BUCKETS, s.buckets):
+                lines.append(f'pixar_section_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'pixar_section_seconds_bucket{{{label},le="+Inf"}} {s.calls}')
+            lines.append(f"pixar_section_seconds_sum{{{label}}} {s.wall:.6f}")
+            lines.append(f"pixar_section_seconds_count{{{label}}} {s.calls}")
+
+        def counter(metric, help_text, rows, label="section"):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f'{metric}{{{label}="{name}"}} {value}' for name, value in rows)
+
+        counter(
+            "pixar_section_cpu_seconds_total",
+            "Thread CPU time per dashboard section.",
+            [(name, f"{s.cpu:.6f}") for name, s in timed],
+        )
+        if TRACEMALLOC_ENABLED:
+            counter(
+                "pixar_section_alloc_bytes_total",
+                "Bytes allocated per dashboard section (tracemalloc).",
+                [(name, s.alloc) for name, s in timed],
+            )
+        counter(
+            "pixar_chart_payload_bytes_total",
+            "Plotly spec bytes sent to browsers.",
+            [(name, s.payload) for name, s in payloads],
+            label="chart",
+        )
+        counter(
+            "pixar_chart_payloads_total",
+            "Plotly charts sent to browsers.",
+            [(name, s.calls) for name, s in payloads],
+            label="chart",
+        )
+        return "\n".join(lines) + "\n"
+
+
+# Un único colector por proceso, compartido por todas las sesiones
+collector = Collector()
+
+
+def end_run():
+    # Al final de cada run: agrega lo pendiente y exporta (sin bloquear si otro lo hace)
+    if METRICS_ENABLED:
+        collector.drain()
@@ -0,0 +1,366 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import streamlit as st
+
+from data_loader import CACHE_DIR, SOURCE_CSV, apply_schema, file_hash
+from film_cards import CARD_COLUMNS, RANKED_COLUMNS, FilmIndex, percentile_ranks
+
+# -----------------------------------------------------------------------------------
+# ---- CONFIGURACIÓN ----
+# PIXAR_STORAGE=partitioned    en vez de cargar el CSV entero, lee de un Parquet
+#                              particionado por año y rating solo lo que pide el filtro
+# PIXAR_PARTITION_DIR=ruta     carpeta del dataset particionado
+# PIXAR_PARTITION_CHUNK=N      filas del CSV por bloque al escribirlo (memoria acotada)
+# PIXAR_PARTITION_MAX_ROWS=N   filas como mucho por filtro; con más, se acorta el rango
+#                              de años por el principio
+# PIXAR_PARTITION_CACHE=N      filtros (subconjuntos leídos) que se guardan en memoria
+PARTITIONED = os.environ.get("PIXAR_STORAGE", "").lower() == "partitioned"
+PARTITION_DIR = Path(os.environ.get("PIXAR_PARTITION_DIR", CACHE_DIR / "partitioned"))
+PARTITION_CHUNK = int(os.environ.get("PIXAR_PARTITION_CHUNK", "1000000"))
+PARTITION_MAX_ROWS = int(os.environ.get("PIXAR_PARTITION_MAX_ROWS", "5000000"))
+PARTITION_CACHE = int(os.environ.get("PIXAR_PARTITION_CACHE", "4"))
+
+# Subir este número obliga a reescribir los datasets particionados
+# 2: + ROW_COLUMN
+# 3: + FILMS_NAME
+PARTITION_FORMAT = 3
+KEEP_VERSIONS = 2
+# "_": pyarrow.dataset ignora los ficheros que empiezan por "_" o "."
+MANIFEST_NAME = "_manifest.json"
+# Una fila por película (título, partición y percentiles): selector y tarjetas
+FILMS_NAME = "_films.parquet"
+
+PARTITION_SCHEMA = pa.schema([("year", pa.int16()), ("film_rating", pa.string())])
+# Fila de cada película en el CSV: entre títulos repetidos, la tarjeta es la primera
+ROW_COLUMN = "source_row"
+# Columnas que lee el dashboard (gráficos, KPIs, tarjetas); el resto no se lee
+DASHBOARD_COLUMNS = [
+    "film",
+    "release_date",
+    "run_time",
+    "film_rating",
+    "rotten_tomatoes",
+    "metacritic",
+    "budget",
+    "box_office_worldwide",
+    "year",
+    "profit_margin",
+]
+
+
+def _current_path(source):
+    return PARTITION_DIR / Path(source).stem / "current.json"
+
+
+def _read_json(path):
+    try:
+        return json.loads(Path(path).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+# -----------------------------------------------------------------------------------
+# ---- ESCRITURA POR BLOQUES ----
+# El CSV se lee en bloques de PARTITION_CHUNK filas: cada bloque añade un fichero a
+# cada partición year=AAAA/film_rating=X que toca. Nunca está el catálogo entero en
+# memoria. Cada fichero Parquet guarda mín/máx por columna y row group.
+# Aparte, FILMS_NAME: la primera fila de cada título (como FilmIndex) con su partición y
+# sus percentiles en el catálogo; de las columnas con percentil solo se guardan los
+# valores mientras se escribe.
+def write_partitioned(source=SOURCE_CSV, chunk_rows=PARTITION_CHUNK, sha256=None, verbose=False):
+    source = Path(source)
+    stat = source.stat()
+    sha256 = sha256 or file_hash(source)
+    version = sha256[:16]
+    base = PARTITION_DIR / source.stem
+    tmp_dir = base / f".{version}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    start = time.perf_counter()
+    schema = None
+    counts = {}
+    ratings = []
+    n_rows = 0
+    film_chunks = []
+    ranked_values = {col: [] for col in RANKED_COLUMNS}
+    for i, chunk in enumerate(pd.read_csv(source, chunksize=chunk_rows)):
+        chunk = apply_schema(chunk)
+        chunk["film_rating"] = chunk["film_rating"].astype(object)
+        chunk[ROW_COLUMN] = np.arange(n_rows, n_rows + len(chunk), dtype=np.int64)
+        n_rows += len(chunk)
+        film_chunks.append(
+            chunk.loc[chunk["film"].notna(), ["film", "year", "film_rating", *RANKED_COLUMNS]]
+            .drop_duplicates("film")
+        )
+        for col in RANKED_COLUMNS:
+            ranked_values[col].append(chunk[col].dropna().to_numpy(dtype=float))
+        for (year, rating), rows in chunk.groupby(
+            ["year", "film_rating"], dropna=False, observed=True
+        ).size().items():
+            rating = None if pd.isna(rating) else str(rating)
+            counts[(int(year), rating)] = counts.get((int(year), rating), 0) + int(rows)
+            if rating is not None and rating not in ratings:
+                ratings.append(rating)
+
+        # Mismo esquema en todos los bloques (un bloque con una columna vacía no
+        # cambia el tipo)
+        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+        if schema is None:
+            schema = table.schema.set(
+                table.schema.get_field_index("film_rating"), pa.field("film_rating", pa.string())
+            )
+            table = table.cast(schema)
+        ds.write_dataset(
+            table,
+            tmp_dir,
+            format="parquet",
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+            basename_template=f"part-{i:05d}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    films = _write_films(tmp_dir / FILMS_NAME, film_chunks, ranked_values)
+
+    manifest = {
+        "format": PARTITION_FORMAT,
+        "version": version,
+        "source": source.name,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256,
+        "rows": sum(counts.values()),
+        "films": films,
+        "ratings": ratings,
+        "partitions": [
+            [year, rating, rows]
+            for (year, rating), rows in sorted(counts.items(), key=lambda kv: (kv[0][0], kv[0][1] or ""))
+        ],
+    }
+    (tmp_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+
+    # Publicación atómica, como los snapshots: carpeta completa -> current.json -> las
+    # versiones viejas se borran (la anterior se conserva: puede haber lecturas)
+    final_dir = base / version
+    shutil.rmtree(final_dir, ignore_errors=True)
+    tmp_dir.replace(final_dir)
+    _write_current(source, manifest)
+    _prune(base, keep=version)
+
+    if verbose:
+        print(
+            f"{source.name} -> {final_dir}: {manifest['rows']:,} rows | "
+            f"{len(counts)} partitions | {time.perf_counter() - start:.1f}s"
+        )
+    return final_dir
+
+
+def _write_films(path, film_chunks, ranked_values):
+    films = pd.concat(film_chunks, ignore_index=True).drop_duplicates("film")
+    table = {
+        "film": films["film"].astype(str).to_numpy(dtype=object),
+        "year": films["year"].to_numpy(),
+        "film_rating": films["film_rating"].to_numpy(dtype=object),
+    }
+    for col in RANKED_COLUMNS:
+        table[f"pct_{col}"] = percentile_ranks(
+            np.sort(np.concatenate(ranked_values[col])), films[col].to_numpy(dtype=float)
+        )
+    pd.DataFrame(table).to_parquet(path, index=False)
+    return len(films)
+
+
+def _write_current(source, manifest):
+    current = _current_path(source)
+    tmp_current = current.with_suffix(f".tmp-{os.getpid()}")
+    tmp_current.write_text(
+        json.dumps({key: manifest[key] for key in ("version", "format", "mtime_ns", "size", "sha256")})
+    )
+    tmp_current.replace(current)
+
+
+def _prune(base, keep):
+    versions = sorted(
+        (p for p in base.iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    for old in [p for p in versions if p.name != keep][KEEP_VERSIONS - 1 :]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def ensure_partitioned(source=SOURCE_CSV):
+    # Misma validación que la caché Feather (data_loader.load_dataset): mtime y tamaño,
+    # y si cambiaron, el hash del contenido. Solo se reescribe si el CSV cambió
+    source = Path(source)
+    stat = source.stat()
+    current = _read_json(_current_path(source))
+    if current is not None and current.get("format") == PARTITION_FORMAT:
+        path = PARTITION_DIR / source.stem / current["version"]
+        if (path / MANIFEST_NAME).exists():
+            if current["mtime_ns"] == stat.st_mtime_ns and current["size"] == stat.st_size:
+                return path
+            sha256 = file_hash(source)
+            if current["sha256"] == sha256:
+                current.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                _write_current(source, current)
+                return path
+            return write_partitioned(source, sha256=sha256)
+    return write_partitioned(source)
+
+
+# -----------------------------------------------------------------------------------
+# ---- LECTURA CON PREDICADOS ----
+# El manifiesto da años, ratings y filas por partición sin abrir ningún Parquet; el
+# filtro de la barra lateral se traduce a una expresión de pyarrow.dataset: las
+# particiones que no cumplen ni se abren y solo se leen DASHBOARD_COLUMNS.
+class PartitionedCatalog:
+    def __init__(self, path):
+        self.path = Path(path)
+        manifest = json.loads((self.path / MANIFEST_NAME).read_text())
+        self.version = manifest["version"]
+        self.n_rows = manifest["rows"]
+        self.ratings = manifest["ratings"]
+        self.counts = {(year, rating): rows for year, rating, rows in manifest["partitions"]}
+        self.years = sorted({year for year, _ in self.counts})
+        self.dataset = ds.dataset(
+            self.path,
+            format="parquet",
+            partitioning=ds.partitioning(PARTITION_SCHEMA, flavor="hive"),
+        )
+
+    def rows_for(self, selected_year, selected_ratings=None):
+        lo, hi = selected_year
+        return sum(
+            rows
+            for (year, rating), rows in self.counts.items()
+            if lo <= year <= hi and (selected_ratings is None or rating in selected_ratings)
+        )
+
+    def fit_years(self, selected_year, selected_ratings=None, max_rows=PARTITION_MAX_ROWS):
+        # Rango más largo que termina en el último año elegido y cabe en max_rows (como
+        # mínimo, ese año)
+        lo, hi = selected_year
+        years = [y for y in self.years if lo <= y <= hi]
+        while len(years) > 1 and self.rows_for((years[0], hi), selected_ratings) > max_rows:
+            years.pop(0)
+        return (years[0], hi) if years else (lo, hi)
+
+    def read(self, selected_year, selected_ratings=None, columns=DASHBOARD_COLUMNS):
+        lo, hi = selected_year
+        key = repr((int(lo), int(hi), None if selected_ratings is None else sorted(selected_ratings)))
+        if selected_ratings is not None and not len(selected_ratings):
+            # Ningún rating: ninguna fila cumple, no se abre ninguna partición
+            table = self.dataset.schema.empty_table().select(list(columns))
+        else:
+            expression = (ds.field("year") >= lo) & (ds.field("year") <= hi)
+            if selected_ratings is not None:
+                expression &= ds.field("film_rating").isin(list(selected_ratings))
+            table = self.dataset.to_table(columns=list(columns), filter=expression)
+        df = apply_schema(table.to_pandas())
+        df.attrs["version"] = f"{self.version}-{hashlib.sha1(key.encode()).hexdigest()[:8]}"
+        # Ningún otro frame se amplía desde este: fuera de RecentVersions
+        df.attrs["subset"] = True
+        return df
+
+    def read_film(self, film, year, rating):
+        # Fila de la tarjeta: solo la partición de la película y CARD_COLUMNS
+        expression = (ds.field("film") == film) & _equals("year", year) & _equals("film_rating", rating)
+        table = self.dataset.to_table(columns=[*CARD_COLUMNS, ROW_COLUMN], filter=expression)
+        table = table.take(pc.sort_indices(table[ROW_COLUMN])[:1]).drop_columns(ROW_COLUMN)
+        return apply_schema(table.to_pandas()).iloc[0]
+
+
+def _equals(name, value):
+    return ds.field(name).is_null() if pd.isna(value) else ds.field(name) == value
+
+
+# -----------------------------------------------------------------------------------
+# ---- ÍNDICE DE PELÍCULAS DESDE FILMS_NAME ----
+# El selector y los percentiles no dependen del filtro: salen de la tabla por película
+# (título, partición y percentiles precalculados), no del catálogo. La fila de una
+# tarjeta se lee al pintarla (read_film) y queda en la caché de tarjetas de FilmIndex.
+class CatalogFilmIndex(FilmIndex):
+    def __init__(self, catalog):
+        films = pd.read_parquet(catalog.path / FILMS_NAME)
+        self.catalog = catalog
+        self.films = films["film"].to_numpy(dtype=object)
+        self.position = {film: i for i, film in enumerate(self.films)}
+        self.years = films["year"].to_numpy()
+        self.film_ratings = films["film_rating"].to_numpy(dtype=object)
+        self.ranks = {col: films[f"pct_{col}"].to_numpy() for col in RANKED_COLUMNS}
+        self._init_caches()
+
+    def row(self, film):
+        i = self.position[film]
+        return self.catalog.read_film(film, self.years[i], self.film_ratings[i])
+
+
+# -----------------------------------------------------------------------------------
+# ---- CACHÉS COMPARTIDAS ENTRE SESIONES ----
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_catalog(source, mtime_ns, size):
+    return PartitionedCatalog(ensure_partitioned(source))
+
+
+def get_catalog(source=None):
+    # Igual que get_data: PIXAR_DATA_CSV y nueva entrada si el CSV cambia
+    source = source or os.environ.get("PIXAR_DATA_CSV") or SOURCE_CSV
+    stat = Path(source).stat()
+    return _load_catalog(str(source), stat.st_mtime_ns, stat.st_size)
+
+
+@st.cache_resource(max_entries=PARTITION_CACHE, show_spinner=False)
+def _load_subset(_catalog, version, selected_year, selected_ratings):
+    return _catalog.read(selected_year, selected_ratings)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_film_index(_catalog, version):
+    return CatalogFilmIndex(_catalog)
+
+
+def get_catalog_film_index(catalog):
+    return _load_film_index(catalog, catalog.version)
+
+
+def get_partitioned_data(catalog, selected_year, selected_ratings):
+    # Sin ratings elegidos, un frame vacío con el esquema del dashboard (como el filtro
+    # vacío con el CSV en memoria)
+    ratings = tuple(sorted(selected_ratings))
+    return _load_subset(catalog, catalog.version, tuple(selected_year), ratings)
+
+
+# -----------------------------------------------------------------------------------
+# ---- MAIN ----
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write the dataset as Parquet partitioned by year and film rating."
+    )
+    parser.add_argument("--source", help="dataset CSV (default: PIXAR_DATA_CSV or the clean CSV)")
+    parser.add_argument("--chunk-rows", type=int, default=PARTITION_CHUNK)
+    parser.add_argument("--force", action="store_true", help="rewrite even if up to date")
+    args = parser.parse_args()
+
+    source = Path(args.source or os.environ.get("PIXAR_DATA_CSV") or SOURCE_CSV)
+    if args.force:
+        write_partitioned(source, args.chunk_rows, verbose=True)
+    else:
+        print(ensure_partitioned(source))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import functools
+import re
+
+import numpy as np
+
+# -----------------------------------------------------------------------------------
+# ---- PAYLOAD DE LAS FIGURAS ----
+# st.plotly_chart manda el spec completo por el websocket en cada rerun. Para que pese
+# menos:
+#   - un único template "pixar" (ligero) con fuentes, colores, ejes y leyenda, en lugar
+#     del template por defecto y de los mismos dicts repetidos en cada builder
+#   - arrays numéricos como typed arrays base64 del tipo más pequeño que los representa
+#     (u1 para puntuaciones, i2 para años, f4 para medias y ajustes); los importes, con
+#     un decimal, van como decimales JSON: con la compresión del websocket
+#     (.streamlit/config.toml) ocupan ~40% menos que un f4 en base64, que no comprime
+#   - sin los campos de hover que nadie usa (columnas de customdata no referenciadas,
+#     valores por defecto que añade plotly.express)
+#   - las categorías de un eje (títulos de película) viajan una vez: las demás trazas
+#     del eje con las mismas categorías usan sus posiciones (x0/dx, sin array)
+# Las figuras se compactan una vez al construirlas, antes de entrar en la caché.
+# Sin comprimir, el spec compacto ocupa 1.4-2.4x menos que el de plotly.express; lo que
+# llega al navegador, ~5x menos, pero solo con la compresión permessage-deflate del
+# websocket (server.enableWebsocketCompression en .streamlit/config.toml). Ver
+# benchmarks/payload_report.py
+TEMPLATE = "pixar"
+
+TEXT = "#333333"
+BACKGROUND = "#f5f5f5"
+
+INT_TYPES = (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32)
+# Decimales de los datos (importes en millones, con un decimal)
+DECIMALS = 1
+ARRAY_ATTRIBUTES = ("x", "y", "customdata", "marker.size", "marker.color")
+# Valores por defecto que plotly.express escribe explícitamente en cada traza
+PX_DEFAULTS = {"legendgroup": "", "orientation": "v", "xaxis": "x", "yaxis": "y"}
+CUSTOMDATA_REF = re.compile(r"%\{customdata\[(\d+)\]([^}]*)\}")
+NUMERIC_START = re.compile(r"\s*[-+.\d]")
+
+
+@functools.cache
+def register_template():
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    # Ticks, leyenda y barra de color heredan layout.font (color y tamaño 12)
+    axis = dict(title=dict(font=dict(size=14, family="Arial Black")), gridcolor="lightgrey")
+    pio.templates[TEMPLATE] = go.layout.Template(
+        layout=dict(
+            font=dict(family="Source Sans Pro, sans-serif", color=TEXT),
+            title=dict(font=dict(size=18, family="Arial Black"), x=0.0, xanchor="left"),
+            paper_bgcolor=BACKGROUND,
+            plot_bgcolor=BACKGROUND,
+            xaxis=axis,
+            yaxis=axis,
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=1.1,
+                xanchor="right",
+                x=1,
+                bgcolor="lightgray",
+                bordercolor="lightgray",
+            ),
+            # Separadores de año del gráfico filtrado: cada línea / etiqueta solo lleva
+            # su posición y su texto
+            shapedefaults=dict(
+                type="line",
+                xref="x",
+                yref="y domain",
+                y0=0,
+                y1=1,
+                line=dict(width=1.5, dash="dot", color="darkgray"),
+                opacity=0.6,
+            ),
+            annotationdefaults=dict(
+                showarrow=False,
+                font=dict(color="darkgray", size=14, family="Arial"),
+                textangle=-90,
+                xanchor="center",
+                yanchor="bottom",
+                xshift=-8,
+                yshift=-20,
+            ),
+        )
+    )
+    return TEMPLATE
+
+
+def template_for(fig):
+    # Plotly incrusta el template entero en cada figura: solo viajan las partes que
+    # esta figura usa
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    layout = pio.templates[register_template()].layout.to_plotly_json()
+    if not fig.layout.shapes:
+        layout.pop("shapedefaults", None)
+    if not fig.layout.annotations:
+        layout.pop("annotationdefaults", None)
+    if all(trace.showlegend is False for trace in fig.data):
+        layout.pop("legend", None)
+    return go.layout.Template(layout=layout)
+
+
+# -----------------------------------------------------------------------------------
+# ---- ARRAYS NUMÉRICOS ----
+def compact_array(values):
+    # Tipo más pequeño que conserva los valores: enteros exactos -> u1/i1/.../i4,
+    # DECIMALS decimales -> decimales JSON (array de objetos, NaN -> None -> null), el
+    # resto -> float32 (~7 cifras)
+    if values is None or isinstance(values, (str, dict)):
+        return values
+    arr = np.asarray(values)
+    if arr.dtype.kind not in "iuf" or arr.ndim not in (1, 2) or arr.size == 0:
+        return values
+    if arr.dtype.kind == "f":
+        finite = np.isfinite(arr)
+        if not finite.all() or not np.array_equal(arr, np.round(arr)):
+            rounded = np.round(arr.astype(float), DECIMALS)
+            # Tolerancia de float32: 150.6 llega como 150.60000610351562
+            if np.allclose(arr[finite], rounded[finite], rtol=1e-6, atol=0):
+                # Sin .tolist(): plotly valida una lista elemento a elemento
+                return np.where(finite, rounded, None)
+            return arr.astype(np.float32)
+    low, high = arr.min(), arr.max()
+    for dtype in INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return arr.astype(dtype)
+    return arr.astype(np.float32)
+
+
+def _owner(trace, path):
+    *parents, name = path.split(".")
+    for parent in parents:
+        trace = getattr(trace, parent)
+    return trace, name
+
+
+# -----------------------------------------------------------------------------------
+# ---- HOVER ----
+def _compact_hover(trace):
+    template = getattr(trace, "hovertemplate", None)
+    if not template or "hoverinfo" not in trace:
+        return
+    # Con hovertemplate, hoverinfo y hovertext no se usan
+    trace.hoverinfo = None
+    trace.hovertext = None
+
+    customdata = trace.customdata
+    if customdata is None or isinstance(customdata, dict) or "%{customdata}" in template:
+        return
+    columns = np.asarray(customdata, dtype=object)
+    if columns.ndim == 1:
+        columns = columns[:, None]
+
+    # Solo las columnas que aparecen en el hovertemplate. Una de texto pasa a `text`
+    # (solo sirve al hover si el modo no pinta texto); el resto, numéricas, a un
+    # customdata tipado
+    text_free = trace.type in ("scatter", "scattergl") and "text" not in (trace.mode or "")
+    text_free = text_free and trace.text is None
+    kept = []
+    replacements = {}
+    for index in sorted({int(i) for i, _ in CUSTOMDATA_REF.findall(template)}):
+        column = columns[:, index]
+        if all(isinstance(value, str) for value in column):
+            if not text_free:
+                return
+            trace.text = column
+            text_free = False
+            replacements[index] = "text"
+            continue
+        try:
+            kept.append(column.astype(float))
+        except (TypeError, ValueError):
+            return
+        replacements[index] = len(kept) - 1
+
+    if len(kept) == 1:
+        refs = {i: "customdata" if r != "text" else r for i, r in replacements.items()}
+        trace.customdata = compact_array(kept[0])
+    else:
+        refs = {
+            i: r if r == "text" else f"customdata[{r}]" for i, r in replacements.items()
+        }
+        trace.customdata = compact_array(np.column_stack(kept)) if kept else None
+    trace.hovertemplate = CUSTOMDATA_REF.sub(
+        lambda m: f"%{{{refs[int(m.group(1))]}{m.group(2)}}}", template
+    )
+
+
+# -----------------------------------------------------------------------------------
+# ---- CATEGORÍAS COMPARTIDAS ----
+def _category_labels(x):
+    # Etiquetas únicas de texto, ni número ni fecha (plotly.js las escribe empezando
+    # por cifra o signo): el eje se tipa como categorías (axis autotype). En columnas
+    # de Arrow, sin recorrer las etiquetas en Python
+    import pandas as pd
+
+    if x is None or not len(x):
+        return None
+    labels = np.asarray(x, dtype=object)
+    if pd.api.types.infer_dtype(labels, skipna=False) != "string":
+        return None
+    if not pd.Index(labels).is_unique:
+        return None
+    if pd.Series(labels, dtype="string[pyarrow]").str.match(NUMERIC_START.pattern).any():
+        return None
+    return labels
+
+
+def _share_categories(fig):
+    # Sin `x`, plotly.js coloca el punto i en x0 + i·dx (por defecto 0, 1), que en un
+    # eje de categorías es la categoría i. Vale si la primera traza del eje define las
+    # categorías (etiquetas únicas, en orden) y las demás repiten exactamente ese array
+    owners = {}
+    for trace in fig.data:
+        axis = trace.xaxis or "x"
+        x = trace.x
+        if axis not in owners:
+            layout_axis = fig.layout["xaxis" + axis[1:]]
+            owners[axis] = None
+            if layout_axis.type in (None, "category") and layout_axis.categoryorder in (
+                None,
+                "trace",
+            ):
+                owners[axis] = _category_labels(x)
+            if owners[axis] is not None:
+                # Es el tipo que elegiría plotly.js; explícito, para que no dependa de
+                # qué traza mire al autodetectarlo
+                layout_axis.type = "category"
+            continue
+        shared = owners[axis] is not None and trace.x0 is None and trace.dx is None
+        if shared and x is not None and np.array_equal(np.asarray(x, dtype=object), owners[axis]):
+            trace.x = None
+
+
+# -----------------------------------------------------------------------------------
+# ---- FIGURA COMPLETA ----
+def compact_figure(fig):
+    # Se modifica en sitio (la figura aún no está en la caché compartida)
+    fig.layout.template = template_for(fig)
+    _share_categories(fig)
+    for trace in fig.data:
+        for key, default in PX_DEFAULTS.items():
+            if key in trace and trace[key] == default:
+                trace[key] = None
+        _compact_hover(trace)
+        for path in ARRAY_ATTRIBUTES:
+            try:
+                owner, name = _owner(trace, path)
+                value = owner[name]
+            except (AttributeError, KeyError, ValueError):
+                continue
+            compacted = compact_array(value)
+            if compacted is not value:
+                # Plotly ignora una asignación con los mismos valores (aunque cambie el
+                # dtype): se vacía antes
+                owner[name] = None
+                owner[name] = compacted
+    return fig
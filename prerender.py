@@ -0,0 +1,290 @@
+import argparse
+import gzip
+import html
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+# Los snapshots se construyen siempre con los builders, nunca leyendo los anteriores
+os.environ["PIXAR_SNAPSHOTS"] = "0"
+
+from assets import ASSETS_DIR  # noqa: E402
+from snapshots import (  # noqa: E402
+    CURRENT_PATH,
+    SNAPSHOT_DIR,
+    SNAPSHOT_FORMAT,
+    figure_key,
+    read_current,
+)
+
+# -----------------------------------------------------------------------------------
+# ---- ESTADOS A PRERENDERIZAR ----
+# Data/prerender_states.json: [{"name": ..., "years": [desde, hasta], "ratings": [...]}]
+# "years" y "ratings" son opcionales (rango completo / todos los ratings). El estado
+# por defecto de la app (todo seleccionado) se prerenderiza siempre.
+STATES_PATH = Path(__file__).resolve().parent / "Data" / "prerender_states.json"
+KEEP_VERSIONS = 2
+MAX_CARDS = 500
+
+
+def load_states(path=STATES_PATH, extra=()):
+    states = json.loads(Path(path).read_text()) if Path(path).exists() else []
+    for spec in extra:
+        # --state "2000-2009:G,PG"
+        years, _, ratings = spec.partition(":")
+        state = {"name": spec}
+        if years:
+            state["years"] = [int(y) for y in years.split("-")]
+        if ratings:
+            state["ratings"] = ratings.split(",")
+        states.append(state)
+    return states
+
+
+def resolve_states(states, df):
+    min_year, max_year = int(df["year"].min()), int(df["year"].max())
+    all_ratings = [str(r) for r in df["film_rating"].dropna().unique()]
+
+    resolved = {}
+    for state in [{"name": "default"}, *states]:
+        low, high = state.get("years", (min_year, max_year))
+        # Igual que el slider: el rango queda dentro de los años del dataset
+        years = (max(int(low), min_year), min(int(high), max_year))
+        ratings = tuple(sorted(r for r in state.get("ratings", all_ratings) if r in all_ratings))
+        if years[0] > years[1]:
+            continue
+        resolved.setdefault((years, ratings), state.get("name") or f"{years}{ratings}")
+    return [(name, years, ratings) for (years, ratings), name in resolved.items()]
+
+
+# -----------------------------------------------------------------------------------
+# ---- ESCRITURA ----
+def write_gzip(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0: mismo contenido -> mismos bytes (ETag estable en el servidor estático)
+    with open(path, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as fh:
+        fh.write(text.encode())
+
+
+def write_page(path, text):
+    # .html y .html.gz lado a lado: nginx (gzip_static) o Caddy (precompressed) sirven el .gz
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    write_gzip(path.with_name(path.name + ".gz"), text)
+
+
+def plotly_js():
+    # plotly.js local (el que trae el paquete de Python): las páginas no dependen de un CDN
+    from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+    name = f"plotly-{get_plotlyjs_version()}.min.js"
+    path = ASSETS_DIR / name
+    if not path.exists():
+        ASSETS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".tmp-{os.getpid()}")
+        tmp_path.write_text(get_plotlyjs())
+        tmp_path.replace(path)
+    return name
+
+
+def page(title, body, depth=1):
+    # depth: nivel de la página dentro de la versión (index.html: 1, states/ y cards/: 2)
+    script = "../" * (depth + 1) + f"assets/{plotly_js()}"
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<script src="{script}"></script>
+<style>body {{ background-color: #f5f5f5; color: #333333; font-family: 'Source Sans Pro', sans-serif; }}
+.kpi {{ display: inline-block; background-color: lightgray; border-radius: 10px; padding: 6px 12px; margin: 4px; }}</style>
+</head><body>
+<h1>{html.escape(title)}</h1>
+{body}
+</body></html>
+"""
+
+
+def state_page(name, years, ratings, kpis, figures):
+    import plotly.io
+
+    kpi_html = "".join(
+        f"<div class='kpi'><b>{html.escape(label)}</b><br>{html.escape(str(value))}</div>"
+        for label, value in (
+            ("💰 Total Worldwide Box Office", f"$ {kpis['total_box_office']:,.1f} M. (USD)"),
+            ("📅 Most Productive Year", kpis["most_productive_year"] or "—"),
+            ("🏆 Most Profitable Film", kpis["most_profitable_film"] or "—"),
+        )
+    )
+    charts = "".join(
+        plotly.io.to_html(fig, include_plotlyjs=False, full_html=False) for fig in figures
+    )
+    body = (
+        f"<p>Years {years[0]}–{years[1]} · Ratings {', '.join(ratings) or '—'}</p>"
+        f"{kpi_html}{charts}<p><a href='../index.html'>← All snapshots</a></p>"
+    )
+    return page(f"Pixar Films Dashboard · {name}", body, depth=2)
+
+
+# -----------------------------------------------------------------------------------
+# ---- PRERENDER ----
+def prerender(states, max_cards=MAX_CARDS, force=False, verbose=True):
+    # Importar app.py en "bare mode" ejecuta el script una vez; después se llaman sus
+    # render_* / builders para cada estado, igual que en una sesión
+    import app
+    from aggregates import get_kpi_store
+    from data_loader import dataset_version, get_data
+    from figure_cache import get_figure_cache
+    from film_cards import get_film_index
+    from filters import get_filter_index
+
+    df = get_data()
+    version = dataset_version(df)
+    current = read_current()
+    if not force and current and current.get("version") == version:
+        if verbose:
+            print(f"snapshots already up to date ({version})")
+        return False
+
+    start = time.perf_counter()
+    tmp_dir = SNAPSHOT_DIR / f".{version}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    figure_cache = get_figure_cache()
+    figure_cache.clear()
+
+    figures = {}
+    manifest_states = []
+    kpi_store = get_kpi_store(df, version)
+    filter_index = get_filter_index(df, version)
+    for i, (name, years, ratings) in enumerate(resolve_states(states, df)):
+        filtered = filter_index.compile(years, ratings)
+        app.render_filtered_graph(filtered)
+        app.render_additional_charts(filtered)
+        app.critics_figures(filtered)
+        state_figures = {}
+        for (chart_id, filter_key, _), fig in figure_cache.entries():
+            key = figure_key(chart_id, filter_key)
+            figures[key] = (chart_id, filter_key, fig)
+            if filter_key in (filtered.key, (filtered.key, None)):
+                state_figures[chart_id] = fig
+
+        page_name = f"states/{i}.html"
+        kpis = kpi_store.query(years, ratings)
+        order = (
+            "filtered_graph",
+            "budget_scatter",
+            "score_evolution",
+            "box_vs_rt",
+            "box_vs_meta",
+        )
+        write_page(
+            tmp_dir / page_name,
+            state_page(name, years, ratings, kpis, [state_figures[c] for c in order]),
+        )
+        manifest_states.append(
+            {"name": name, "years": list(years), "ratings": list(ratings), "page": page_name}
+        )
+
+    for key, (chart_id, filter_key, fig) in figures.items():
+        write_gzip(tmp_dir / "figures" / f"{key}.json.gz", fig.to_json())
+
+    # Tarjetas de las primeras películas del catálogo (las mismas que pinta el selector)
+    film_index = get_film_index(df, version)
+    cards = {}
+    for i, film in enumerate(film_index.films[:max_cards]):
+        cards[str(film)] = f"{i}.html"
+        write_page(tmp_dir / "cards" / f"{i}.html", page(str(film), film_index.card_html(film), depth=2))
+
+    links = "".join(
+        f"<li><a href='{s['page']}'>{html.escape(s['name'])}</a></li>" for s in manifest_states
+    )
+    cards_links = "".join(
+        f"<li><a href='cards/{name}'>{html.escape(film)}</a></li>" for film, name in cards.items()
+    )
+    write_page(
+        tmp_dir / "index.html",
+        page(
+            "Pixar Films Dashboard",
+            f"<h2>Filters</h2><ul>{links}</ul><h2>Films</h2><ul>{cards_links}</ul>",
+        ),
+    )
+
+    manifest = {
+        "version": version,
+        "created": time.time(),
+        "states": manifest_states,
+        "figures": [
+            {"key": key, "chart_id": chart_id, "filter_key": repr(filter_key)}
+            for key, (chart_id, filter_key, _) in figures.items()
+        ],
+        "cards": cards,
+    }
+    (tmp_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    # Publicación atómica: carpeta completa -> current.json -> limpieza de versiones viejas
+    final_dir = SNAPSHOT_DIR / version
+    shutil.rmtree(final_dir, ignore_errors=True)
+    tmp_dir.replace(final_dir)
+    tmp_current = CURRENT_PATH.with_suffix(f".tmp-{os.getpid()}")
+    tmp_current.write_text(
+        json.dumps(
+            {"version": version, "format": SNAPSHOT_FORMAT, "created": manifest["created"]}
+        )
+    )
+    tmp_current.replace(CURRENT_PATH)
+    prune(keep=version)
+
+    if verbose:
+        print(
+            f"{version}: {len(manifest_states)} states | {len(figures)} figures | "
+            f"{len(cards)} cards | {time.perf_counter() - start:.1f}s -> {final_dir}"
+        )
+    return True
+
+
+def prune(keep):
+    versions = sorted(
+        (p for p in SNAPSHOT_DIR.iterdir() if p.is_dir() and not p.name.startswith(".")),
+        key=lambda p: p.stat().st_mtime,
+        reverse=True,
+    )
+    # La versión anterior se conserva: sesiones abiertas pueden estar leyéndola
+    for old in [p for p in versions if p.name != keep][KEEP_VERSIONS - 1 :]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+# -----------------------------------------------------------------------------------
+# ---- MAIN ----
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prerender dashboard figures, KPIs and film cards to static/prerender/."
+    )
+    parser.add_argument("--source", help="dataset CSV (default: PIXAR_DATA_CSV or the clean CSV)")
+    parser.add_argument("--states", default=STATES_PATH, help="JSON file with filter states")
+    parser.add_argument(
+        "--state", action="append", default=[], help='extra state, e.g. "2000-2009:G,PG"'
+    )
+    parser.add_argument("--max-cards", type=int, default=MAX_CARDS)
+    parser.add_argument("--force", action="store_true", help="rebuild even if up to date")
+    parser.add_argument("--watch", action="store_true", help="rebuild when the dataset changes")
+    parser.add_argument("--interval", type=float, default=30, help="seconds between checks")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    # Sin los avisos de "bare mode" que Streamlit emite en cada llamada a st.*
+    logging.disable(logging.WARNING)
+    if args.source:
+        os.environ["PIXAR_DATA_CSV"] = str(Path(args.source).resolve())
+    states = load_states(args.states, args.state)
+
+    prerender(states, args.max_cards, force=args.force, verbose=not args.quiet)
+    while args.watch:
+        # get_data solo relee el CSV si cambió (mtime / tamaño); si no, no hace nada
+        time.sleep(args.interval)
+        prerender(states, args.max_cards, verbose=not args.quiet)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
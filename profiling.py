@@ -0,0 +1,194 @@
+import builtins
+import functools
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+import metrics
+
+# Solo librería estándar: este módulo se importa antes que todo lo demás en app.py
+
+# -----------------------------------------------------------------------------------
+# ---- MODO PERFILADO (PIXAR_PROFILE=1) ----
+PROFILE_ENABLED = os.environ.get("PIXAR_PROFILE", "").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger("pixar.profile")
+
+_PROCESS_T0 = time.perf_counter()
+_import_times = []  # (módulo, segundos incl. dependencias, profundidad, disparado por)
+_process_runs = [0]
+
+# Cada sesión de Streamlit ejecuta el script en su propio hilo
+_local = threading.local()
+
+
+def _run_state():
+    if not hasattr(_local, "sections"):
+        _local.sections = []  # (sección, inicio desde el arranque del script, duración)
+        _local.run_t0 = None
+        _local.run_number = 0
+        _local.current_section = "startup"
+    return _local
+
+
+# -----------------------------------------------------------------------------------
+# ---- TIEMPO DE IMPORTACIÓN POR MÓDULO ----
+_depth = [0]
+_original_import = builtins.__import__
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _depth[0] += 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _depth[0] -= 1
+        _import_times.append(
+            (name, time.perf_counter() - start, _depth[0], _run_state().current_section)
+        )
+
+
+def install_import_timer():
+    if PROFILE_ENABLED and builtins.__import__ is not _timed_import:
+        builtins.__import__ = _timed_import
+
+
+# -----------------------------------------------------------------------------------
+# ---- IMPORTS DIFERIDOS ----
+class LazyModule:
+    # Proxy que importa el módulo real en el primer acceso a un atributo
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+# -----------------------------------------------------------------------------------
+# ---- SECCIONES render_* ----
+def start_run():
+    state = _run_state()
+    _process_runs[0] += 1
+    state.run_t0 = time.perf_counter()
+    state.run_number = _process_runs[0]
+    state.sections = []
+    metrics.start_run(state.run_number)
+
+
+def _fragment_rerun():
+    # Run de solo fragmentos (widget de un @st.fragment o run_every): el script no pasa
+    # por start_run ni end_run
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return bool(ctx is not None and ctx.fragment_ids_this_run)
+
+
+def fragment_run(func):
+    # Entre @st.fragment y la función: un rerun del fragmento es un run propio, con su
+    # start_run / end_run como el script completo. Dentro de un run completo no hace nada
+    if not (PROFILE_ENABLED or metrics.METRICS_ENABLED):
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _fragment_rerun():
+            return func(*args, **kwargs)
+        start_run()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.end_run()
+
+    return wrapper
+
+
+def profiled(func):
+    # Con PIXAR_PROFILE el informe de arranque; con PIXAR_METRICS las métricas por sección
+    if not (PROFILE_ENABLED or metrics.METRICS_ENABLED):
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        state = _run_state()
+        previous = state.current_section
+        state.current_section = func.__name__
+        timer = metrics.Timer(func.__name__) if metrics.METRICS_ENABLED else None
+        if timer is not None:
+            timer.__enter__()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            end = time.perf_counter()
+            if timer is not None:
+                timer.__exit__(None, None, None)
+            state.current_section = previous
+            if PROFILE_ENABLED:
+                run_t0 = state.run_t0 or _PROCESS_T0
+                state.sections.append((func.__name__, start - run_t0, end - start))
+
+    return wrapper
+
+
+# -----------------------------------------------------------------------------------
+# ---- INFORME ----
+def format_report(top=25):
+    lines = []
+    if _import_times:
+        lines.append(f"{'import':<40} {'ms':>9}  triggered by")
+        for name, seconds, depth, section in sorted(
+            _import_times, key=lambda item: item[1], reverse=True
+        )[:top]:
+            label = ("  " * depth + name)[:40]
+            lines.append(f"{label:<40} {seconds * 1000:9.1f}  {section}")
+        lines.append("")
+
+    state = _run_state()
+    cold = state.run_number == 1
+    run_kind = "cold" if cold else f"warm, run {state.run_number}"
+    lines.append(f"{'section':<32} {'first render at (ms)':>21} {'took (ms)':>10}")
+    for name, offset, seconds in state.sections:
+        lines.append(f"{name:<32} {(offset + seconds) * 1000:21.1f} {seconds * 1000:10.1f}")
+    if state.run_t0 is not None:
+        total = time.perf_counter() - state.run_t0
+        lines.append(f"{'total script run (' + run_kind + ')':<32} {total * 1000:21.1f}")
+        if cold:
+            since_import = state.run_t0 - _PROCESS_T0
+            lines.append(f"{'profiling.py -> script start':<32} {since_import * 1000:21.1f}")
+    return "\n".join(lines)
+
+
+def report():
+    if not PROFILE_ENABLED:
+        return None
+    text = format_report()
+    logger.warning("Pixar dashboard profile\n%s", text)
+    # Los imports solo se muestran una vez (los siguientes runs ya los tienen cacheados)
+    _import_times.clear()
+    return text
+
+
+# Se activa al importar el módulo, antes que el resto de imports de app.py
+install_import_timer()
@@ -0,0 +1,274 @@
+import copy
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from aggregates import MISSING_RATING, rating_rows
+from data_loader import RecentVersions
+
+# -----------------------------------------------------------------------------------
+# ---- CONFIGURACIÓN ----
+# Cubos como mucho por serie: se elige el nivel más fino que quepa en el rango visible
+PYRAMID_POINTS = int(os.environ.get("PIXAR_PYRAMID_POINTS", "400"))
+# Ventana de la media móvil, en cubos del nivel elegido (1 = sin suavizado)
+SMOOTHING_WINDOW = int(os.environ.get("PIXAR_SMOOTHING_WINDOW", "5"))
+
+LEVELS = ("day", "week", "month", "quarter", "year")
+LEVEL_DAYS = {"day": 1, "week": 7, "month": 30.44, "quarter": 91.31, "year": 365.25}
+PYRAMID_METRICS = ("rotten_tomatoes", "metacritic", "box_office_worldwide")
+PYRAMID_COLUMNS = ["release_date", "year", "film_rating", *PYRAMID_METRICS]
+COUNT, SUM, MIN, MAX = range(4)
+N_STATS = 4
+
+
+# -----------------------------------------------------------------------------------
+# ---- FECHAS Y CUBOS ----
+def release_days(rows):
+    # Fecha de estreno en días; sin fecha (o ilegible), el 1 de enero de su año
+    dates = pd.to_datetime(rows["release_date"], format="%Y-%m-%d", errors="coerce")
+    days = dates.to_numpy(dtype="datetime64[D]")
+    years = rows["year"].to_numpy(dtype=np.int64) - 1970
+    fallback = years.astype("datetime64[Y]").astype("datetime64[D]")
+    return np.where(np.isnat(days), fallback, days)
+
+
+def bucket_starts(days, level):
+    # Inicio del cubo de cada día. Las semanas empiezan en lunes y se cortan en el 1 de
+    # enero: ningún cubo cruza un cambio de año y el filtro de años sigue siendo exacto
+    if level == "day":
+        return days
+    year_start = days.astype("datetime64[Y]").astype("datetime64[D]")
+    if level == "week":
+        weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 fue jueves
+        return np.maximum(days - weekday, year_start)
+    if level == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    if level == "quarter":
+        months = days.astype("datetime64[M]").astype(np.int64)
+        return (months - months % 3).astype("datetime64[M]").astype("datetime64[D]")
+    return year_start
+
+
+def as_day(value):
+    # Extremo de una selección en un eje de fechas de Plotly ("2003-05-12 10:22:11.1"
+    # o milisegundos desde 1970) -> "2003-05-12"
+    if isinstance(value, (int, float)):
+        value = pd.Timestamp(value, unit="ms")
+    return str(np.datetime64(pd.Timestamp(value), "D"))
+
+
+def year_span(selected_year):
+    # Rango de años del slider -> (primer día, último día)
+    return (
+        np.datetime64(f"{int(selected_year[0]):04d}-01-01"),
+        np.datetime64(f"{int(selected_year[1]):04d}-12-31"),
+    )
+
+
+def _empty_stats(n_ratings, n_buckets):
+    stats = np.zeros((N_STATS, n_ratings, n_buckets))
+    stats[MIN] = np.inf
+    stats[MAX] = -np.inf
+    return stats
+
+
+def _combine(stats, other):
+    # Mismo resultado que agregar las filas de ambos juntas
+    stats[COUNT] += other[COUNT]
+    stats[SUM] += other[SUM]
+    np.minimum(stats[MIN], other[MIN], out=stats[MIN])
+    np.maximum(stats[MAX], other[MAX], out=stats[MAX])
+    return stats
+
+
+def _group(cells, n_cells, count, total, low, high):
+    # Reduce por celda: cuenta y suma se suman, mínimo y máximo se combinan
+    stats = _empty_stats(1, n_cells)[:, 0]
+    if len(cells) == 0:
+        return stats
+    stats[COUNT] = np.bincount(cells, count, n_cells)
+    stats[SUM] = np.bincount(cells, total, n_cells)
+    order = np.argsort(cells, kind="stable")
+    sorted_cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]])
+    stats[MIN, sorted_cells[starts]] = np.minimum.reduceat(low[order], starts)
+    stats[MAX, sorted_cells[starts]] = np.maximum.reduceat(high[order], starts)
+    return stats
+
+
+# -----------------------------------------------------------------------------------
+# ---- PIRÁMIDE DE AGREGADOS POR FECHA DE ESTRENO ----
+# Para cada nivel (día -> semana -> mes -> trimestre -> año), cada rating y cada cubo
+# con datos: nº de películas y, por métrica, n, Σ, mín y máx (la media es Σ / n). Solo
+# el nivel día se calcula desde las filas; los demás se agregan desde él. Una serie es
+# un slice de cubos sumado sobre los ratings elegidos, sin tocar las filas.
+class TimePyramid:
+    def __init__(self, metrics=PYRAMID_METRICS):
+        self.metrics = tuple(metrics)
+        self.ratings = []
+        # {nivel: inicios de cubo ordenados}, {nivel: (ratings, cubos)},
+        # {nivel: {métrica: (N_STATS, ratings, cubos)}}
+        self.keys = {level: np.empty(0, dtype="datetime64[D]") for level in LEVELS}
+        self.films = {level: np.zeros((0, 0)) for level in LEVELS}
+        self.stats = {level: {m: _empty_stats(0, 0) for m in self.metrics} for level in LEVELS}
+        self.n_rows = 0
+
+    @classmethod
+    def from_frame(cls, df):
+        pyramid = cls()
+        pyramid.append(df)
+        return pyramid
+
+    # ---- Crecimiento de ejes (ratings / cubos nuevos) ----
+    def _ensure_ratings(self, labels):
+        extra = len([r for r in labels if r not in self.ratings])
+        if not extra:
+            return
+        self.ratings.extend(r for r in labels if r not in self.ratings)
+        for level in LEVELS:
+            n_buckets = len(self.keys[level])
+            self.films[level] = np.vstack([self.films[level], np.zeros((extra, n_buckets))])
+            for m in self.metrics:
+                self.stats[level][m] = np.concatenate(
+                    [self.stats[level][m], _empty_stats(extra, n_buckets)], axis=1
+                )
+
+    def _merge(self, level, keys, films, stats):
+        # Suma un bloque (cubos `keys`, todos los ratings) al nivel
+        keys_all = np.union1d(self.keys[level], keys)
+        if len(keys_all) != len(self.keys[level]):
+            old = np.searchsorted(keys_all, self.keys[level])
+            grown = np.zeros((len(self.ratings), len(keys_all)))
+            grown[:, old] = self.films[level]
+            self.films[level] = grown
+            for m in self.metrics:
+                grown = _empty_stats(len(self.ratings), len(keys_all))
+                grown[:, :, old] = self.stats[level][m]
+                self.stats[level][m] = grown
+            self.keys[level] = keys_all
+
+        new = np.searchsorted(keys_all, keys)
+        self.films[level][:, new] += films
+        for m in self.metrics:
+            self.stats[level][m][:, :, new] = _combine(self.stats[level][m][:, :, new], stats[m])
+
+    # ---- Alta incremental de filas ----
+    def append(self, rows):
+        if len(rows) == 0:
+            return self
+
+        days = release_days(rows)
+        # Códigos por fila y etiquetas (pocas): sin pasar la columna a objetos
+        codes, labels = pd.factorize(rows["film_rating"])
+        labels = list(labels)
+        if (codes == -1).any():
+            codes = np.where(codes == -1, len(labels), codes)
+            labels.append(MISSING_RATING)
+        self._ensure_ratings(labels)
+        r_idx = np.array([self.ratings.index(r) for r in labels], dtype=np.int64)[codes]
+        n_ratings = len(self.ratings)
+
+        # Nivel día, desde las filas
+        day_keys, day_idx = np.unique(days, return_inverse=True)
+        cell = r_idx * len(day_keys) + day_idx
+        n_cells = n_ratings * len(day_keys)
+        films = np.bincount(cell, minlength=n_cells).reshape(n_ratings, -1).astype(float)
+        stats = {}
+        for m in self.metrics:
+            values = rows[m].to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            v = values[valid]
+            stats[m] = _group(cell[valid], n_cells, None, v, v, v).reshape(
+                N_STATS, n_ratings, -1
+            )
+        self._merge("day", day_keys, films, stats)
+
+        # Niveles superiores, desde el bloque del nivel día (ratings x días con datos)
+        occupied_r, occupied_d = np.nonzero(films)
+        for level in LEVELS[1:]:
+            keys, key_idx = np.unique(bucket_starts(day_keys, level), return_inverse=True)
+            cell = occupied_r * len(keys) + key_idx[occupied_d]
+            n_cells = n_ratings * len(keys)
+            level_films = np.bincount(
+                cell, films[occupied_r, occupied_d], n_cells
+            ).reshape(n_ratings, -1)
+            level_stats = {}
+            for m in self.metrics:
+                day_stats = stats[m][:, occupied_r, occupied_d]
+                level_stats[m] = _group(cell, n_cells, *day_stats).reshape(
+                    N_STATS, n_ratings, -1
+                )
+            self._merge(level, keys, level_films, level_stats)
+
+        self.n_rows += len(rows)
+        return self
+
+    # ---- Consultas ----
+    def _span(self, level, start, end):
+        keys = self.keys[level]
+        # Cubo que contiene `start` (puede empezar antes) hasta el que contiene `end`
+        start = bucket_starts(np.array([start], dtype="datetime64[D]"), level)[0]
+        return (
+            np.searchsorted(keys, start, side="left"),
+            np.searchsorted(keys, np.datetime64(end, "D"), side="right"),
+        )
+
+    def level_for(self, start, end, selected_ratings=None, max_points=PYRAMID_POINTS):
+        # El nivel más fino con como mucho max_points cubos con películas en el rango
+        rows = rating_rows(self.ratings, selected_ratings)
+        for level in LEVELS:
+            lo, hi = self._span(level, start, end)
+            if np.count_nonzero(self.films[level][rows, lo:hi].sum(axis=0)) <= max_points:
+                return level
+        return LEVELS[-1]
+
+    def series(self, metric, level, start, end, selected_ratings=None):
+        # Un renglón por cubo con datos de la métrica: inicio, n, Σ, media, mín, máx
+        rows = rating_rows(self.ratings, selected_ratings)
+        lo, hi = self._span(level, start, end)
+        stats = self.stats[level][metric][:, rows, lo:hi]
+        count = stats[COUNT].sum(axis=0)
+        keep = count > 0
+        total = stats[SUM].sum(axis=0)[keep]
+        return pd.DataFrame(
+            {
+                "period": self.keys[level][lo:hi][keep],
+                "count": count[keep],
+                "sum": total,
+                "mean": total / count[keep],
+                "min": stats[MIN].min(axis=0, initial=np.inf)[keep],
+                "max": stats[MAX].max(axis=0, initial=-np.inf)[keep],
+            }
+        )
+
+
+def rolling_mean(series, level, window=SMOOTHING_WINDOW):
+    # Media móvil centrada de `window` cubos del nivel (en días), ponderada por nº de
+    # películas: sumas acumuladas de n y Σ de los cubos, no de las filas
+    t = series["period"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    half = window * LEVEL_DAYS[level] / 2
+    lo = np.searchsorted(t, t - half, side="left")
+    hi = np.searchsorted(t, t + half, side="right")
+    counts = np.r_[0.0, np.cumsum(series["count"].to_numpy())]
+    sums = np.r_[0.0, np.cumsum(series["sum"].to_numpy())]
+    return (sums[hi] - sums[lo]) / (counts[hi] - counts[lo])
+
+
+# -----------------------------------------------------------------------------------
+# ---- UNA INSTANCIA POR VERSIÓN DEL DATASET ----
+_recent_pyramids = RecentVersions()
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_time_pyramid(_df, version):
+    # En streaming se parte de la versión anterior y solo se añaden las filas nuevas
+    # (copia: las sesiones que aún usan la versión anterior no ven cambios a medias)
+    base, n_rows = _recent_pyramids.closest_ancestor(_df)
+    if base is not None:
+        pyramid = copy.deepcopy(base).append(_df.iloc[n_rows:])
+    else:
+        pyramid = TimePyramid.from_frame(_df)
+    _recent_pyramids.put(_df, version, pyramid)
+    return pyramid
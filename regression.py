@@ -0,0 +1,188 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from aggregates import MISSING_RATING, rating_rows
+from data_loader import RecentVersions
+
+# -----------------------------------------------------------------------------------
+# ---- MÍNIMOS CUADRADOS EN FORMA CERRADA ----
+# Misma pendiente, intercepto y R² que statsmodels.OLS(y, add_constant(x)),
+# que es lo que usa px.scatter(trendline="ols"), pero sin importar statsmodels.
+
+
+def fit_ols(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    n = len(x)
+    if n < 2:
+        return None
+
+    # Centramos antes de multiplicar para no perder precisión con valores grandes
+    x_mean, y_mean = x.mean(), y.mean()
+    dx, dy = x - x_mean, y - y_mean
+    sxx, sxy, syy = dx @ dx, dx @ dy, dy @ dy
+    if sxx == 0:
+        return None
+
+    slope = sxy / sxx
+    intercept = y_mean - slope * x_mean
+    r2 = sxy * sxy / (sxx * syy) if syy else 0.0
+    return {"slope": slope, "intercept": intercept, "r2": r2, "n": n}
+
+
+def trendline_points(x, y, fit):
+    # Como plotly express, pero un punto por cada x distinta (ordenada) con dato en x
+    # e y: la misma recta y el mismo hover sin repetir puntos en el payload
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    xs = np.unique(x[~(np.isnan(x) | np.isnan(y))])
+    return xs, fit["intercept"] + fit["slope"] * xs
+
+
+def fit_from_sums(n, sx, sy, sxx, sxy, syy, shift_x=0.0, shift_y=0.0):
+    # Mismo ajuste que fit_ols a partir de sumas de (x - shift_x) e (y - shift_y): con
+    # el desplazamiento cerca de la media, restar sx²/n no se come las cifras de sxx
+    if n < 2:
+        return None
+    sxx_c = sxx - sx * sx / n
+    sxy_c = sxy - sx * sy / n
+    syy_c = syy - sy * sy / n
+    # x constante: sxx_c es solo error de redondeo
+    if sxx_c <= 1e-12 * sxx:
+        return None
+
+    slope = sxy_c / sxx_c
+    intercept = shift_y + sy / n - slope * (shift_x + sx / n)
+    r2 = sxy_c * sxy_c / (sxx_c * syy_c) if syy_c > 1e-12 * syy else 0.0
+    return {"slope": slope, "intercept": intercept, "r2": r2, "n": int(n)}
+
+
+# -----------------------------------------------------------------------------------
+# ---- ESTADÍSTICOS SUFICIENTES POR (RATING, AÑO) ----
+# Para cada recta (x = puntuación, y = taquilla) y cada cubo rating x año se guardan
+# n, Σx, Σy, Σx², Σxy, Σy² de las filas con x e y. Son sumas: se acumulan por año con
+# sumas prefijas y el ajuste de cualquier rango de años y subconjunto de ratings sale
+# de O(ratings) restas, igual que los KPIs (aggregates.py), sin tocar las filas.
+TREND_Y = "box_office_worldwide"
+TREND_X = ("rotten_tomatoes", "metacritic")
+N_STATS = 6  # n, Σx, Σy, Σx², Σxy, Σy²
+
+
+class RegressionStore:
+    def __init__(self, x_columns=TREND_X, y_column=TREND_Y):
+        self.x_columns = tuple(x_columns)
+        self.y_column = y_column
+        self.years = np.empty(0, dtype=np.int64)
+        self.ratings = []
+        # {x: (N_STATS, ratings, años)} y su suma prefija por años (una columna más)
+        self.sums = {x: np.zeros((N_STATS, 0, 0)) for x in self.x_columns}
+        self.prefix = {x: np.zeros((N_STATS, 0, 1)) for x in self.x_columns}
+        # Desplazamiento por recta (medias del primer bloque), fijo desde entonces
+        self.shifts = None
+        self.n_rows = 0
+
+    @classmethod
+    def from_frame(cls, df):
+        store = cls()
+        store.append(df)
+        return store
+
+    # ---- Crecimiento de ejes (años / ratings nuevos) ----
+    def _ensure_axes(self, years, ratings):
+        new_ratings = [r for r in ratings if r not in self.ratings]
+        years_all = np.union1d(self.years, np.unique(years))
+        if not new_ratings and len(years_all) == len(self.years):
+            return
+
+        old_cols = np.searchsorted(years_all, self.years)
+        shape = (N_STATS, len(self.ratings) + len(new_ratings), len(years_all))
+        for x in self.x_columns:
+            sums = np.zeros(shape)
+            sums[:, : len(self.ratings), old_cols] = self.sums[x]
+            self.sums[x] = sums
+        self.ratings.extend(new_ratings)
+        self.years = years_all
+
+    # ---- Alta incremental de filas ----
+    def append(self, rows):
+        if len(rows) == 0:
+            return self
+
+        years = rows["year"].to_numpy(dtype=np.int64)
+        # Códigos por fila y etiquetas (pocas): sin pasar la columna a objetos
+        codes, labels = pd.factorize(rows["film_rating"])
+        labels = list(labels)
+        if (codes == -1).any():
+            codes = np.where(codes == -1, len(labels), codes)
+            labels.append(MISSING_RATING)
+        y = rows[self.y_column].to_numpy(dtype=float)
+        xs = {x: rows[x].to_numpy(dtype=float) for x in self.x_columns}
+        valid = {x: ~(np.isnan(values) | np.isnan(y)) for x, values in xs.items()}
+        if self.shifts is None:
+            self.shifts = {
+                x: (_mean_or_zero(values[valid[x]]), _mean_or_zero(y[valid[x]]))
+                for x, values in xs.items()
+            }
+
+        self._ensure_axes(years, labels)
+        r_idx = np.array([self.ratings.index(r) for r in labels], dtype=np.int64)[codes]
+        cell = r_idx * len(self.years) + np.searchsorted(self.years, years)
+        n_cells = len(self.ratings) * len(self.years)
+
+        for x, values in xs.items():
+            shift_x, shift_y = self.shifts[x]
+            dx = values[valid[x]] - shift_x
+            dy = y[valid[x]] - shift_y
+            cells = cell[valid[x]]
+            sums = self.sums[x]
+            for k, weights in enumerate((None, dx, dy, dx * dx, dx * dy, dy * dy)):
+                sums[k] += np.bincount(cells, weights, minlength=n_cells).reshape(sums.shape[1:])
+            self.prefix[x] = np.concatenate(
+                [np.zeros(sums.shape[:2] + (1,)), np.cumsum(sums, axis=2)], axis=2
+            )
+
+        self.n_rows += len(rows)
+        return self
+
+    # ---- Consultas ----
+    def fit(self, x, selected_year=None, selected_ratings=None):
+        # Mismo resultado que fit_ols sobre las filas del filtro (año + rating)
+        rows = rating_rows(self.ratings, selected_ratings)
+        if selected_year is None:
+            lo, hi = 0, len(self.years)
+        else:
+            lo = np.searchsorted(self.years, selected_year[0], side="left")
+            hi = np.searchsorted(self.years, selected_year[1], side="right")
+        if len(rows) == 0 or hi <= lo:
+            return None
+
+        prefix = self.prefix[x]
+        n, sx, sy, sxx, sxy, syy = (prefix[:, rows, hi] - prefix[:, rows, lo]).sum(axis=1)
+        return fit_from_sums(round(n), sx, sy, sxx, sxy, syy, *self.shifts[x])
+
+
+def _mean_or_zero(values):
+    return float(values.mean()) if len(values) else 0.0
+
+
+# -----------------------------------------------------------------------------------
+# ---- UNA INSTANCIA POR VERSIÓN DEL DATASET ----
+_recent_stores = RecentVersions()
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_regression_store(_df, version):
+    # En streaming se parte de la versión anterior y solo se añaden las filas nuevas
+    # (copia: las sesiones que aún usan la versión anterior no ven cambios a medias)
+    base, n_rows = _recent_stores.closest_ancestor(_df)
+    if base is not None:
+        store = copy.deepcopy(base).append(_df.iloc[n_rows:])
+    else:
+        store = RegressionStore.from_frame(_df)
+    _recent_stores.put(_df, version, store)
+    return store
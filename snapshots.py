@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import streamlit as st
+
+# -----------------------------------------------------------------------------------
+# ---- SNAPSHOTS PRERENDERIZADOS (python prerender.py) ----
+# static/prerender/
+#  ├── current.json              -> versión del dataset de los snapshots vigentes
+#  └── <versión>/
+#       ├── manifest.json         estados (filtros), figuras y tarjetas
+#       ├── figures/<clave>.json.gz
+#       └── index.html(.gz), states/*.html(.gz), cards/*.html(.gz)   (servidor estático)
+# La app solo usa snapshots de la misma versión que el dataset cargado.
+# PIXAR_SNAPSHOTS=0          no lee snapshots (prerender.py lo usa para no leerse a sí mismo)
+# PIXAR_PRERENDER_AUTO=1     lanza prerender.py en segundo plano si están desfasados
+ROOT = Path(__file__).resolve().parent
+SNAPSHOT_DIR = ROOT / "static" / "prerender"
+CURRENT_PATH = SNAPSHOT_DIR / "current.json"
+# Subir este número invalida los snapshots existentes (cambió cómo se construyen o
+# compactan las figuras)
+SNAPSHOT_FORMAT = 5
+SNAPSHOTS_ENABLED = os.environ.get("PIXAR_SNAPSHOTS", "1").lower() not in ("0", "false", "no")
+PRERENDER_AUTO = os.environ.get("PIXAR_PRERENDER_AUTO", "").lower() in ("1", "true", "yes")
+
+
+def figure_key(chart_id, filter_key):
+    # Misma clave que la caché de figuras, sin la versión (va en la carpeta)
+    return hashlib.sha1(repr((chart_id, filter_key)).encode()).hexdigest()[:20]
+
+
+def read_current():
+    try:
+        current = json.loads(CURRENT_PATH.read_text())
+    except (OSError, ValueError):
+        return None
+    # Snapshots de otro formato cuentan como desfasados
+    return current if current.get("format") == SNAPSHOT_FORMAT else None
+
+
+# -----------------------------------------------------------------------------------
+# ---- LECTURA DESDE LA APP ----
+class SnapshotStore:
+    def __init__(self, version, enabled=True):
+        self.version = version
+        self.root = SNAPSHOT_DIR / version
+        current = read_current() if enabled else None
+        self.available = bool(current and current.get("version") == version)
+        self.figures = set()
+        if self.available:
+            manifest = json.loads((self.root / "manifest.json").read_text())
+            self.figures = {entry["key"] for entry in manifest["figures"]}
+
+    def figure(self, chart_id, filter_key):
+        key = figure_key(chart_id, filter_key)
+        if key not in self.figures:
+            return None
+        import plotly.io
+
+        try:
+            with gzip.open(self.root / "figures" / f"{key}.json.gz", "rt") as fh:
+                return plotly.io.from_json(fh.read(), skip_invalid=True)
+        except (OSError, ValueError):
+            # Versión ya borrada por un prerender más nuevo: se construye la figura
+            return None
+
+
+_auto_started = set()
+_auto_lock = threading.Lock()
+
+
+def _start_prerender(version):
+    # Una sola reconstrucción en segundo plano por versión y proceso
+    with _auto_lock:
+        if version in _auto_started:
+            return
+        _auto_started.add(version)
+    subprocess.Popen(
+        [sys.executable, str(ROOT / "prerender.py"), "--quiet"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_store(version, current_version):
+    return SnapshotStore(version)
+
+
+def get_snapshot_store(version):
+    if not SNAPSHOTS_ENABLED:
+        return SnapshotStore(version, enabled=False)
+    # current.json entra en la clave: un prerender nuevo se ve sin reiniciar la app
+    current = read_current()
+    current_version = current.get("version") if current else None
+    if current_version != version and PRERENDER_AUTO:
+        _start_prerender(version)
+    return _load_store(version, current_version)
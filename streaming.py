@@ -0,0 +1,277 @@
+import io
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+
+from data_loader import SOURCE_CSV, dataset_version, extend_lineage, load_dataset
+
+# -----------------------------------------------------------------------------------
+# ---- CONFIGURACIÓN DEL MODO STREAMING ----
+# PIXAR_STREAM=1            sigue las filas que se añadan al CSV sin reiniciar la app
+# PIXAR_STREAM_DIR=ruta     además lee los *.csv que aparezcan en esa carpeta (con cabecera)
+# PIXAR_STREAM_INTERVAL=5   cada cuántos segundos comprueban las sesiones abiertas
+STREAM_ENABLED = os.environ.get("PIXAR_STREAM", "").lower() in ("1", "true", "yes")
+STREAM_DIR = os.environ.get("PIXAR_STREAM_DIR")
+STREAM_INTERVAL = float(os.environ.get("PIXAR_STREAM_INTERVAL", "5"))
+
+SIGNATURE_BYTES = 64
+# Capacidad de los buffers del frame vivo: al llenarse crecen x1.5 (coste amortizado)
+GROWTH = 1.5
+# Trozos Arrow añadidos por columna de texto antes de unirlos en uno
+MAX_CHUNKS = 64
+
+
+class SourceRewritten(Exception):
+    # El fichero no ha crecido por el final (truncado, reemplazado por etl.py...)
+    pass
+
+
+# -----------------------------------------------------------------------------------
+# ---- LECTURA POR OFFSET ----
+# Solo se leen los bytes nuevos, y solo hasta el último salto de línea: una fila que
+# se está escribiendo se recoge en la siguiente pasada.
+class TailReader:
+    def __init__(self, path, offset=0):
+        self.path = Path(path)
+        self.offset = offset
+        self.header = None
+        self.inode = None
+        self.signature = b""
+        if offset:
+            with open(self.path, "rb") as fh:
+                self.header = fh.readline()
+                self.inode = os.fstat(fh.fileno()).st_ino
+                self.signature = self._signature(fh, offset)
+
+    @staticmethod
+    def _signature(fh, offset):
+        # Últimos bytes ya leídos: si cambian, el fichero se reescribió
+        start = max(offset - SIGNATURE_BYTES, 0)
+        fh.seek(start)
+        return fh.read(offset - start)
+
+    def read_new(self, like=None):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        if self.inode is not None and stat.st_ino != self.inode:
+            raise SourceRewritten(self.path)
+        if stat.st_size < self.offset:
+            raise SourceRewritten(self.path)
+        if stat.st_size == self.offset:
+            return None
+
+        with open(self.path, "rb") as fh:
+            if self.header is None:
+                self.header = fh.readline()
+                self.inode = os.fstat(fh.fileno()).st_ino
+                self.offset = max(self.offset, len(self.header))
+            elif self._signature(fh, self.offset) != self.signature:
+                raise SourceRewritten(self.path)
+            fh.seek(self.offset)
+            chunk = fh.read(stat.st_size - self.offset)
+
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return None
+        chunk = chunk[:end]
+        self.offset += end
+        self.signature = (self.signature + chunk)[-SIGNATURE_BYTES:]
+
+        delta = pd.read_csv(io.BytesIO(self.header + chunk))
+        return conform(delta, like) if like is not None else delta
+
+
+def conform(delta, like):
+    # Mismas columnas y tipos que el frame en memoria (el CSV parcial puede inferir otros).
+    # Las categorías se dejan como estén: AppendOnlyFrame las amplía al añadir
+    delta = delta.reindex(columns=like.columns)
+    for col in like.columns:
+        dtype = like[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtype = "category"
+        if delta[col].dtype != dtype:
+            try:
+                delta[col] = delta[col].astype(dtype)
+            except (TypeError, ValueError):
+                pass
+    return delta
+
+
+def _arrow_chunks(values):
+    # Trozos Arrow de una columna de texto (sin copiar)
+    arrow = pa.array(values)
+    return list(arrow.chunks) if isinstance(arrow, pa.ChunkedArray) else [arrow]
+
+
+# -----------------------------------------------------------------------------------
+# ---- FRAME QUE SOLO CRECE POR EL FINAL ----
+# pd.concat copiaría el catálogo entero en cada poll. Aquí las columnas numéricas (y los
+# códigos de las categóricas) viven en buffers con hueco al final: un poll copia solo
+# las filas nuevas y cada snapshot es una vista de las n primeras filas, que ya no
+# cambian. El texto se une como trozos Arrow sin copiar: los del fichero base siguen
+# siendo el mmap compartido. Los números se copian una vez, en el primer poll con filas.
+class AppendOnlyFrame:
+    def __init__(self, frame):
+        self.columns = list(frame.columns)
+        self.dtypes = dict(frame.dtypes)
+        self.n_rows = len(frame)
+        self.capacity = max(int(self.n_rows * GROWTH), 1024)
+        self.buffers = {}  # columna -> array NumPy (valores o códigos de categoría)
+        self.chunks = {}  # columna -> (tipo Arrow, trozos base, trozos añadidos)
+        for col in self.columns:
+            values = frame[col].array
+            if isinstance(self.dtypes[col], pd.CategoricalDtype):
+                self._allocate(col, values.codes)
+            elif hasattr(values, "__arrow_array__"):
+                base = _arrow_chunks(values)
+                self.chunks[col] = (base[0].type if base else pa.string(), base, [])
+            else:
+                self._allocate(col, np.asarray(values))
+
+    def _allocate(self, col, values, capacity=None):
+        buffer = np.empty(capacity or self.capacity, dtype=values.dtype)
+        buffer[: self.n_rows] = values[: self.n_rows]
+        self.buffers[col] = buffer
+
+    def _reserve(self, n_new):
+        if self.n_rows + n_new <= self.capacity:
+            return
+        self.capacity = max(int(self.capacity * GROWTH), self.n_rows + n_new)
+        # Buffers nuevos: los snapshots anteriores siguen con los suyos
+        for col, buffer in self.buffers.items():
+            self._allocate(col, buffer)
+
+    def append(self, delta):
+        n_old, n_new = self.n_rows, len(delta)
+        self._reserve(n_new)
+        for col in self.columns:
+            dtype = self.dtypes[col]
+            if col in self.chunks:
+                arrow_type, base, added = self.chunks[col]
+                added.extend(
+                    chunk.cast(arrow_type) for chunk in _arrow_chunks(delta[col].astype(dtype).array)
+                )
+                if len(added) > MAX_CHUNKS:
+                    added[:] = [pa.concat_arrays(added)]
+            elif isinstance(dtype, pd.CategoricalDtype):
+                # Categorías nuevas al final: los códigos existentes no cambian
+                extra = pd.Index(delta[col].dropna().unique()).difference(dtype.categories)
+                if len(extra):
+                    dtype = self.dtypes[col] = pd.CategoricalDtype(
+                        dtype.categories.append(extra), dtype.ordered
+                    )
+                codes = pd.Categorical(delta[col], dtype=dtype).codes
+                if codes.dtype.itemsize > self.buffers[col].dtype.itemsize:
+                    self._allocate(col, self.buffers[col].astype(codes.dtype), self.capacity)
+                self.buffers[col][n_old : n_old + n_new] = codes
+            else:
+                values = delta[col].to_numpy()
+                buffer = self.buffers[col]
+                if buffer.dtype.kind in "iu" and values.dtype.kind == "f" and np.isnan(values).any():
+                    # Enteros con huecos: la columna pasa a float (igual que con pd.concat)
+                    self.dtypes[col] = np.dtype(float)
+                    self._allocate(col, buffer.astype(float), self.capacity)
+                self.buffers[col][n_old : n_old + n_new] = values
+        self.n_rows += n_new
+        return self.frame()
+
+    def frame(self):
+        n = self.n_rows
+        data = {}
+        for col in self.columns:
+            dtype = self.dtypes[col]
+            if col in self.chunks:
+                arrow_type, base, added = self.chunks[col]
+                data[col] = pd.array(pa.chunked_array(base + added, type=arrow_type), dtype=dtype)
+            elif isinstance(dtype, pd.CategoricalDtype):
+                data[col] = pd.Categorical.from_codes(
+                    self.buffers[col][:n], dtype=dtype, validate=False
+                )
+            else:
+                data[col] = self.buffers[col][:n]
+        return pd.DataFrame(data, copy=False)
+
+
+# -----------------------------------------------------------------------------------
+# ---- DATASET VIVO (COMPARTIDO ENTRE SESIONES) ----
+class LiveDataset:
+    def __init__(self, source=SOURCE_CSV, drop_dir=None):
+        self.source = Path(source)
+        self.drop_dir = Path(drop_dir) if drop_dir else None
+        self._poll_lock = threading.Lock()
+        self._load_base()
+
+    def _load_base(self):
+        frame = load_dataset(self.source)
+        self.base_version = dataset_version(frame)
+        self.reader = TailReader(self.source, offset=frame.attrs.get("source_size", 0))
+        self.drop_readers = {}
+        self.frame = frame
+        # Se crea en el primer poll con filas nuevas: hasta entonces, el mmap compartido
+        self.buffer = None
+
+    @property
+    def version(self):
+        return dataset_version(self.frame)
+
+    def _new_rows(self):
+        deltas = [self.reader.read_new(like=self.frame)]
+        if self.drop_dir is not None and self.drop_dir.is_dir():
+            for path in sorted(self.drop_dir.glob("*.csv")):
+                reader = self.drop_readers.setdefault(path.name, TailReader(path))
+                try:
+                    deltas.append(reader.read_new(like=self.frame))
+                except SourceRewritten:
+                    # Un fichero de la carpeta reemplazado se vuelve a leer entero
+                    reader = self.drop_readers[path.name] = TailReader(path)
+                    deltas.append(reader.read_new(like=self.frame))
+        deltas = [d for d in deltas if d is not None and len(d)]
+        return pd.concat(deltas, ignore_index=True) if deltas else None
+
+    def poll(self):
+        # Una sola sesión lee a la vez; las demás siguen con el snapshot actual
+        if not self._poll_lock.acquire(blocking=False):
+            return False
+        try:
+            try:
+                delta = self._new_rows()
+            except SourceRewritten:
+                self._load_base()
+                return True
+            if delta is None:
+                return False
+
+            parent = self.frame
+            if self.buffer is None:
+                self.buffer = AppendOnlyFrame(parent)
+            frame = self.buffer.append(delta)
+            frame.attrs["version"] = f"{self.base_version}+{len(frame)}"
+            extend_lineage(frame, parent)
+            # Cambio de referencia atómico: cada run ve un snapshot completo
+            self.frame = frame
+            return True
+        finally:
+            self._poll_lock.release()
+
+
+@st.cache_resource(show_spinner=False)
+def get_live_dataset(source, drop_dir):
+    return LiveDataset(source, drop_dir)
+
+
+def live_dataset(source=None):
+    source = source or os.environ.get("PIXAR_DATA_CSV") or SOURCE_CSV
+    return get_live_dataset(str(source), STREAM_DIR)
+
+
+def get_live_data(source=None):
+    live = live_dataset(source)
+    live.poll()
+    return live.frame